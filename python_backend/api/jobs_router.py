@@ -0,0 +1,138 @@
+"""
+API routes for background jobs: long videos, large batches and bulk ingestion
+of directories run off the request, and clients poll for progress and partial
+results.
+"""
+import os
+import glob
+import time
+import asyncio
+import logging
+import functools
+from fastapi import APIRouter, HTTPException
+from typing import Any, Dict, List, Optional
+
+from models import (
+    PreprocessingOptions, TextProcessingOptions, VideoProcessingOptions, BatchOCRRequest, VideoOCRRequest,
+    BulkIngestRequest, JobRequest, JobStatus
+)
+from core.video_processor import process_video_for_ocr
+from core.batch_processor import iter_batch_results, batch_summary
+from core.bulk_ingest import run_bulk_ingest
+from core.jobs import Job, job_store, worker_pool
+from api.responses import OrjsonResponse
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+async def _run_video_job(job: Job, request: VideoOCRRequest) -> Dict[str, Any]:
+    """OCR a video in the worker pool, publishing frame progress and the unique texts found so far."""
+    texts_seen = 0
+
+    def on_progress(progress: Dict[str, Any]) -> None:
+        nonlocal texts_seen
+        job.progress = {
+            "completed": progress["frames_scanned"],
+            "total": progress["total_frames"],
+            "unique_frames": progress["unique_frames"],
+            "frames_with_text": progress["frames_with_text"],
+            "eta_seconds": progress["eta_seconds"],
+        }
+        if len(progress["texts"]) != texts_seen:
+            texts_seen = len(progress["texts"])
+            job.partial_results = list(dict.fromkeys(progress["texts"]))
+
+    start_time = time.time()
+    loop = asyncio.get_event_loop()
+    result = await loop.run_in_executor(worker_pool, functools.partial(
+        process_video_for_ocr, request.file_path,
+        request.video_options or VideoProcessingOptions(), request.preprocessing_options or PreprocessingOptions(),
+        progress_callback=on_progress, should_cancel=job.cancel_event.is_set
+    ))
+    result.processing_time = time.time() - start_time
+    result.engine_used = "OneOCR"
+    if not result.success and not job.cancel_event.is_set():
+        raise RuntimeError(result.error_message)
+    return result.model_dump()
+
+async def _run_batch_job(job: Job, request: BatchOCRRequest) -> Dict[str, Any]:
+    """OCR a batch like /ocr/batch, publishing each result as it finishes."""
+    start_time = time.time()
+    options = request.preprocessing_options or PreprocessingOptions()
+    text_options = request.text_processing_options or TextProcessingOptions()
+    total = len(request.file_paths)
+    job.progress = {"completed": 0, "total": total}
+
+    results: List[Optional[Dict[str, Any]]] = [None] * total
+    files_processed = 0
+    async for index, result in iter_batch_results(request.file_paths, options, text_options):
+        results[index] = result.to_dict(text_options.detail_level, text_options.fields)
+        job.partial_results.append({"index": index, "result": results[index]})
+        files_processed += result.success
+        completed = len(job.partial_results)
+        job.progress = {
+            "completed": completed,
+            "total": total,
+            "eta_seconds": (time.time() - start_time) * (total - completed) / completed,
+        }
+    return {"results": results, **batch_summary(start_time, total, files_processed, total - files_processed)}
+
+async def _run_ingest_job(job: Job, request: BulkIngestRequest) -> Dict[str, Any]:
+    """Ingest a directory or glob into a JSONL file; results go to the file, not the job."""
+    def on_progress(counts: Dict[str, Any]) -> None:
+        job.progress = {"completed": counts["files_processed"] + counts["files_failed"]}
+
+    return await run_bulk_ingest(request, progress_callback=on_progress)
+
+@router.post("", response_model=JobStatus, status_code=202, response_class=OrjsonResponse)
+async def create_job(request: JobRequest):
+    """
+    Starts a background job and returns its id right away. job_type 'video' takes
+    a VideoOCRRequest in video_request, 'batch' a BatchOCRRequest in batch_request,
+    and 'ingest' a BulkIngestRequest in ingest_request.
+    """
+    if request.job_type == "video":
+        if request.video_request is None:
+            raise HTTPException(status_code=400, detail="'video_request' is required for video jobs")
+        if not os.path.exists(request.video_request.file_path):
+            raise HTTPException(status_code=404, detail="Video file not found")
+        job = job_store.submit("video", functools.partial(_run_video_job, request=request.video_request))
+    elif request.job_type == "batch":
+        if request.batch_request is None:
+            raise HTTPException(status_code=400, detail="'batch_request' is required for batch jobs")
+        job = job_store.submit("batch", functools.partial(_run_batch_job, request=request.batch_request))
+    elif request.job_type == "ingest":
+        ingest = request.ingest_request
+        if ingest is None:
+            raise HTTPException(status_code=400, detail="'ingest_request' is required for ingest jobs")
+        if not glob.has_magic(ingest.source) and not os.path.isdir(ingest.source):
+            raise HTTPException(status_code=404, detail="Source directory not found")
+        if not os.path.isdir(os.path.dirname(os.path.abspath(ingest.output_path))):
+            raise HTTPException(status_code=400, detail="Output directory does not exist")
+        job = job_store.submit("ingest", functools.partial(_run_ingest_job, request=ingest))
+    else:
+        raise HTTPException(status_code=400, detail="job_type must be 'video', 'batch' or 'ingest'")
+
+    logger.info(f"Started {job.job_type} job {job.id}")
+    return OrjsonResponse(job.to_status().model_dump(), status_code=202)
+
+@router.get("", response_model=List[JobStatus], response_class=OrjsonResponse)
+async def list_jobs():
+    """Lists retained jobs, oldest first, without their results."""
+    return OrjsonResponse([job.to_status(include_results=False).model_dump() for job in job_store.list()])
+
+@router.get("/{job_id}", response_model=JobStatus, response_class=OrjsonResponse)
+async def get_job(job_id: str, include_results: bool = True):
+    """Reports a job's status and progress, with its partial or final results unless include_results is false."""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return OrjsonResponse(job.to_status(include_results).model_dump())
+
+@router.delete("/{job_id}", response_model=JobStatus, response_class=OrjsonResponse)
+async def cancel_job(job_id: str):
+    """Cancels a queued or running job; finished jobs are returned unchanged."""
+    job = job_store.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return OrjsonResponse(job.to_status(include_results=False).model_dump())
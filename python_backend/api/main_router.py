@@ -4,24 +4,32 @@ Main API routes for image, batch, and document processing.
 import os
 import time
 import logging
-import tempfile
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import functools
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request
-from typing import Optional
-import aiofiles
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from models import (
     PreprocessingOptions, TextProcessingOptions, OCRResult, DocumentExtractionResult, 
-    BatchOCRRequest, BatchOCRResult, DocumentExtractionRequest, ImageOCRRequest
+    BatchOCRRequest, BatchOCRResult, BatchUploadOptions, DocumentExtractionRequest, ImageOCRRequest
+)
+from core.ocr_processor import perform_ocr_on_image_compact, perform_ocr_on_bytes
+from core.ocr_columns import CompactOCRResult
+from core.batch_processor import iter_batch_results, process_uploaded_images, batch_summary
+from core.jobs import worker_pool
+from core.document_processor import extract_text_from_document, iter_pdf_pages, iter_text_chunks, check_page_selection
+from api.uploads import read_image_upload, iter_multipart_parts
+from config import SUPPORTED_DOCUMENT_FORMATS
+from api.responses import (
+    OrjsonResponse, read_json_body, ocr_result_response, ocr_batch_response, stream_media_type, encode_stream_record
 )
-from core.ocr_processor import perform_ocr_on_image
-from core.document_processor import extract_text_from_document
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.post("/ocr/image", response_model=OCRResult)
+@router.post("/ocr/image", response_model=OCRResult, response_class=OrjsonResponse)
 async def process_image(
     request: Request,
     # Optional parameters for multipart form
@@ -29,21 +37,32 @@ async def process_image(
     file_path: Optional[str] = Form(None),
     enhance_contrast: Optional[bool] = Form(default=True),
     denoise: Optional[bool] = Form(default=True), 
+    denoise_method: Optional[str] = Form(default="auto"),
     threshold_method: Optional[str] = Form(default="adaptive_gaussian"),
     apply_morphology: Optional[bool] = Form(default=True),
     deskew: Optional[bool] = Form(default=True),
+    deskew_method: Optional[str] = Form(default="projection"),
     upscale: Optional[bool] = Form(default=True),
+    adaptive: Optional[bool] = Form(default=False),
     # Text processing options
     use_advanced_processing: Optional[bool] = Form(default=True),
-    reading_order: Optional[str] = Form(default="ltr_ttb")
+    reading_order: Optional[str] = Form(default="ltr_ttb"),
+    enable_layout_analysis: Optional[bool] = Form(default=True),
+    preserve_line_breaks: Optional[bool] = Form(default=True),
+    merge_fragmented_words: Optional[bool] = Form(default=True),
+    table_export_format: Optional[str] = Form(default=None),
+    detail_level: Optional[str] = Form(default="words"),
+    fields: Optional[str] = Form(default=None)  # Comma-separated OCRResult field names
 ):
     """
     Processes an image for OCR. Accepts either:
     1. Multipart form data with file upload or file_path
     2. JSON request with ImageOCRRequest structure
+    Responds with JSON, or MessagePack / an Arrow IPC stream when the Accept
+    header asks for application/msgpack or application/vnd.apache.arrow.stream.
     """
     start_time = time.time()
-    temp_file = None
+    upload = None
     
     try:
         content_type = request.headers.get("content-type", "")
@@ -53,36 +72,31 @@ async def process_image(
             options = PreprocessingOptions(
                 enhance_contrast=enhance_contrast if enhance_contrast is not None else True,
                 denoise=denoise if denoise is not None else True,
+                denoise_method=denoise_method if denoise_method is not None else "auto",
                 threshold_method=threshold_method if threshold_method is not None else "adaptive_gaussian",
                 apply_morphology=apply_morphology if apply_morphology is not None else True,
                 deskew=deskew if deskew is not None else True,
-                upscale=upscale if upscale is not None else True
+                deskew_method=deskew_method if deskew_method is not None else "projection",
+                upscale=upscale if upscale is not None else True,
+                adaptive=adaptive if adaptive is not None else False
             )
 
             text_options = TextProcessingOptions(
                 use_advanced_processing=use_advanced_processing if use_advanced_processing is not None else True,
-                reading_order=reading_order if reading_order is not None else "ltr_ttb"
+                reading_order=reading_order if reading_order is not None else "ltr_ttb",
+                enable_layout_analysis=enable_layout_analysis if enable_layout_analysis is not None else True,
+                preserve_line_breaks=preserve_line_breaks if preserve_line_breaks is not None else True,
+                merge_fragmented_words=merge_fragmented_words if merge_fragmented_words is not None else True,
+                table_export_format=table_export_format or None,
+                detail_level=detail_level or "words",
+                fields=[name.strip() for name in fields.split(",") if name.strip()] if fields else None
             )
             
-            # Case 1: File upload - optimized async handling
+            # Case 1: File upload - read into memory and hashed on the way, decoded
+            # from that buffer without a temporary file
             if file is not None:
-                # Create temporary file with proper extension
-                file_extension = ""
-                if file.filename:
-                    file_extension = os.path.splitext(file.filename)[1].lower()
-                
-                # Use async context manager for better resource handling
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_extension)
-                temp_file.close()  # Close the file handle immediately
-                
-                # Write content asynchronously for better performance
-                async with aiofiles.open(temp_file.name, 'wb') as f:
-                    # Read file in chunks to handle large files efficiently
-                    chunk_size = 8192
-                    while chunk := await file.read(chunk_size):
-                        await f.write(chunk)
-                
-                image_path = temp_file.name
+                upload = await read_image_upload(file)
+                image_path = file.filename
                 
             # Case 2: File path in form
             elif file_path is not None:
@@ -95,7 +109,7 @@ async def process_image(
                 
         elif "application/json" in content_type:
             # Handle JSON request
-            body = await request.json()
+            body = await read_json_body(request)
             json_request = ImageOCRRequest(**body)
             
             if not os.path.exists(json_request.file_path):
@@ -108,11 +122,16 @@ async def process_image(
         else:
             raise HTTPException(status_code=400, detail="Content-Type must be multipart/form-data or application/json")
         
-        # Process the image asynchronously for better concurrency
+        # Process the image in the shared worker pool for better concurrency
         loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor(max_workers=1) as executor:
+        if upload is not None:
+            data, file_hash = upload
+            result = await loop.run_in_executor(worker_pool, functools.partial(
+                perform_ocr_on_bytes, data, options, text_options, file_path=image_path, file_hash=file_hash
+            ))
+        else:
             result = await loop.run_in_executor(
-                executor, perform_ocr_on_image, image_path, options, text_options
+                worker_pool, perform_ocr_on_image_compact, image_path, options, text_options
             )
         
         result.processing_time = time.time() - start_time
@@ -120,103 +139,201 @@ async def process_image(
         
         if not result.success:
             raise HTTPException(status_code=500, detail=result.error_message)
-            
-        return result
+        
+        # Serialize only what was asked for, straight from the compact columns,
+        # as JSON or the binary format the Accept header asks for
+        return ocr_result_response(request, result, text_options)
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error processing image: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing image: {str(e)}")
-    finally:
-        # Clean up temporary file asynchronously if created
-        if temp_file and os.path.exists(temp_file.name):
-            try:
-                # Use async file deletion for better performance
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, os.unlink, temp_file.name)
-            except Exception as e:
-                logger.warning(f"Failed to delete temporary file {temp_file.name}: {e}")
-
-async def _process_single_image(file_path: str, options: PreprocessingOptions, text_options: TextProcessingOptions, executor: ThreadPoolExecutor) -> OCRResult:
-    """Process a single image using shared thread pool for better efficiency."""
-    if not os.path.exists(file_path):
-        return OCRResult(
-            text="", confidence=0, processing_time=0, file_path=file_path,
-            success=False, error_message="File not found", engine_used="OneOCR"
-        )
-
-    # Run CPU-bound OCR processing in shared thread pool
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(
-        executor, perform_ocr_on_image, file_path, options, text_options
-    )
-
-    result.engine_used = "OneOCR"
-    return result
 
-@router.post("/ocr/batch", response_model=BatchOCRResult)
-async def process_batch_ocr(request: BatchOCRRequest):
-    """Processes multiple image files concurrently for improved performance."""
+@router.post("/ocr/batch", response_model=BatchOCRResult, response_class=OrjsonResponse)
+async def process_batch_ocr(request: BatchOCRRequest, http_request: Request):
+    """
+    Processes multiple image files concurrently for improved performance.
+    Negotiates the response format like /ocr/image.
+    """
     start_time = time.time()
     options = request.preprocessing_options or PreprocessingOptions()
     text_options = request.text_processing_options or TextProcessingOptions()
-    
-    # Process images concurrently with optimized resource management
-    max_concurrent = min(6, len(request.file_paths))  # Reduced for better stability
-    semaphore = asyncio.Semaphore(max_concurrent)
-
-    # Use shared thread pool for better resource efficiency
-    with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
-        async def process_with_semaphore(file_path: str) -> OCRResult:
-            async with semaphore:
-                return await _process_single_image(file_path, options, text_options, executor)
-
-        # Execute all tasks concurrently
-        tasks = [process_with_semaphore(file_path) for file_path in request.file_paths]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # Handle any exceptions that occurred during processing
-    processed_results = []
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            logger.error(f"Error processing {request.file_paths[i]}: {result}")
-            processed_results.append(OCRResult(
-                text="", confidence=0, processing_time=0,
-                file_path=request.file_paths[i],
-                success=False, error_message=str(result), engine_used="OneOCR"
-            ))
-        else:
-            processed_results.append(result)
-    
-    total_time = time.time() - start_time
+
+    processed_results: List[Optional[CompactOCRResult]] = [None] * len(request.file_paths)
+    async for index, result in iter_batch_results(request.file_paths, options, text_options):
+        processed_results[index] = result
+
     files_processed = sum(1 for r in processed_results if r.success)
-    files_failed = len(processed_results) - files_processed
-    
-    logger.info(f"Batch processed {len(request.file_paths)} files in {total_time:.2f}s (concurrent)")
+    summary = batch_summary(start_time, len(request.file_paths), files_processed,
+                             len(processed_results) - files_processed)
+    logger.info(f"Batch processed {len(request.file_paths)} files in {summary['total_processing_time']:.2f}s (concurrent)")
     
-    return BatchOCRResult(
-        results=processed_results,
-        total_processing_time=total_time,
-        batch_size=len(request.file_paths),
-        files_processed=files_processed,
-        files_failed=files_failed
-    )
-
-# Placeholder for document extraction
-@router.post("/extract/document", response_model=DocumentExtractionResult)
-async def extract_document_text(request: DocumentExtractionRequest):
-    """Extracts text from a document file (PDF only)."""
+    # BatchOCRResult-shaped payload, serialized straight from the compact results
+    return ocr_batch_response(http_request, processed_results, text_options, summary)
+
+@router.post("/ocr/batch/stream")
+async def process_batch_ocr_stream(request: BatchOCRRequest, http_request: Request):
+    """
+    Processes a batch like /ocr/batch, but streams each result as soon as it
+    finishes instead of holding them all: NDJSON by default, Server-Sent Events
+    when the Accept header asks for text/event-stream. Records are
+    {"type": "result", "index": <position in file_paths>, "result": <OCRResult>},
+    then one {"type": "summary", ...} with the remaining BatchOCRResult fields.
+    """
+    start_time = time.time()
+    options = request.preprocessing_options or PreprocessingOptions()
+    text_options = request.text_processing_options or TextProcessingOptions()
+    media_type = stream_media_type(http_request)
+
+    async def records() -> AsyncIterator[bytes]:
+        files_processed = files_failed = 0
+        async for index, result in iter_batch_results(request.file_paths, options, text_options):
+            if result.success:
+                files_processed += 1
+            else:
+                files_failed += 1
+            record = {"type": "result", "index": index,
+                      "result": result.to_dict(text_options.detail_level, text_options.fields)}
+            yield encode_stream_record(media_type, record)
+        summary = batch_summary(start_time, len(request.file_paths), files_processed, files_failed)
+        logger.info(f"Batch streamed {len(request.file_paths)} files in {summary['total_processing_time']:.2f}s")
+        yield encode_stream_record(media_type, {"type": "summary", **summary})
+
+    return StreamingResponse(records(), media_type=media_type)
+
+@router.post("/ocr/batch/upload", response_model=BatchOCRResult, response_class=OrjsonResponse)
+async def process_batch_upload(request: Request):
+    """
+    Processes many uploaded images in one multipart/form-data request. Each file
+    part starts OCR as soon as it has fully arrived, while later parts are still
+    uploading, under the same concurrency limit as /ocr/batch. Options go in an
+    optional 'options' part holding BatchUploadOptions JSON, which must come
+    before the files. Responds like /ocr/batch, with results in upload order.
+    """
+    start_time = time.time()
+    parts = iter_multipart_parts(request)
+    upload_options = BatchUploadOptions()
+    first_file = None
+    async for part in parts:
+        if part.filename is not None:
+            first_file = part
+            break
+        if part.name == "options":
+            try:
+                upload_options = BatchUploadOptions.model_validate_json(bytes(part.data))
+            except ValidationError as e:
+                raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
+    options = upload_options.preprocessing_options or PreprocessingOptions()
+    text_options = upload_options.text_processing_options or TextProcessingOptions()
+
+    async def uploads():
+        if first_file is None:
+            return
+        yield first_file.filename, first_file.data, first_file.file_hash
+        async for part in parts:
+            if part.filename is None:
+                raise HTTPException(status_code=400, detail=f"Form field '{part.name}' must come before the files")
+            yield part.filename, part.data, part.file_hash
+
+    results = await process_uploaded_images(uploads(), options, text_options)
+    files_processed = sum(1 for r in results if r.success)
+    summary = batch_summary(start_time, len(results), files_processed, len(results) - files_processed)
+    logger.info(f"Batch upload processed {len(results)} files in {summary['total_processing_time']:.2f}s")
+    return ocr_batch_response(request, results, text_options, summary)
+
+async def _check_document_request(request: DocumentExtractionRequest, formats: List[str]) -> None:
     if not os.path.exists(request.file_path):
         raise HTTPException(status_code=404, detail="Document file not found")
 
     _, ext = os.path.splitext(request.file_path)
-    if ext.lower() != ".pdf":
-        raise HTTPException(status_code=400, detail="Only PDF files are supported for document extraction")
+    if ext.lower() not in formats:
+        raise HTTPException(status_code=400, detail=f"Unsupported document format; expected one of {', '.join(formats)}")
 
-    result = extract_text_from_document(request.file_path)
+    if request.pages:
+        # Checking a PDF selection against its page count opens the document
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(worker_pool, check_page_selection, request.file_path, request.pages)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/extract/document", response_model=DocumentExtractionResult)
+async def extract_document_text(request: DocumentExtractionRequest):
+    """
+    Extracts text from a PDF, DOCX, TXT or RTF file. For PDFs, `pages` limits
+    extraction to the selected pages; pages with an embedded text layer are read
+    directly and image-only pages are rasterized and OCR'd. For DOCX,
+    `ocr_images` adds the text of embedded images. For TXT, the encoding is
+    detected and `max_bytes` caps how much of the file is read.
+    """
+    await _check_document_request(request, SUPPORTED_DOCUMENT_FORMATS)
+
+    # Extraction (and OCR of image-only pages) runs in the shared worker pool
+    loop = asyncio.get_event_loop()
+    result = await loop.run_in_executor(worker_pool, extract_text_from_document, request.file_path, request)
 
     if not result.success:
         raise HTTPException(status_code=500, detail=result.error_message)
 
-    return result
\ No newline at end of file
+    return result
+
+@router.post("/extract/document/stream")
+async def extract_document_text_stream(request: DocumentExtractionRequest, http_request: Request):
+    """
+    Extracts text like /extract/document, but streams it as it is produced
+    (NDJSON, or Server-Sent Events when the Accept header asks for
+    text/event-stream), so large documents stream with flat memory. For PDFs,
+    pages are rasterized one at a time as OCR capacity frees up and each is sent
+    as {"type": "page", "page": <DocumentPage>} when done, not necessarily in
+    page order. TXT files are sent in order as decoded {"type": "text", "text": ...}
+    chunks. Then one {"type": "summary", ...} follows with the remaining
+    DocumentExtractionResult fields except the text. PDF and TXT only.
+    """
+    await _check_document_request(request, [".pdf", ".txt"])
+    start_time = time.time()
+    file_type = os.path.splitext(request.file_path)[1].lower().lstrip(".")
+    media_type = stream_media_type(http_request)
+    loop = asyncio.get_event_loop()
+
+    async def records() -> AsyncIterator[bytes]:
+        stats: Dict[str, Any] = {}
+        counts: Dict[str, int] = {}
+        if file_type == "pdf":
+            items = iter_pdf_pages(request.file_path, request, stats)
+            counts.update(native_pages=0, ocr_pages=0)
+        else:
+            items = iter_text_chunks(request.file_path, request, stats)
+        error_message = None
+        step = None
+        try:
+            while True:
+                step = loop.run_in_executor(worker_pool, next, items, None)
+                try:
+                    item = await step
+                except Exception as e:
+                    logger.error(f"Document extraction failed for {request.file_path}: {e}")
+                    error_message = str(e)
+                    break
+                if item is None:
+                    break
+                if isinstance(item, str):
+                    record = {"type": "text", "text": item}
+                else:
+                    counts[f"{item.method}_pages"] += 1
+                    record = {"type": "page", "page": item.model_dump()}
+                yield encode_stream_record(media_type, record)
+            summary = {
+                "type": "summary", "file_path": request.file_path, "file_type": file_type,
+                "processing_time": time.time() - start_time, "success": error_message is None,
+                "error_message": error_message, "metadata": {**stats, **counts},
+            }
+            yield encode_stream_record(media_type, summary)
+        finally:
+            # A client that goes away mid-stream lands here too; the generator
+            # can only be closed once its current step has returned
+            if step is not None:
+                await asyncio.wait([step])
+            await loop.run_in_executor(worker_pool, items.close)
+
+    return StreamingResponse(records(), media_type=media_type)
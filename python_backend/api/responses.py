@@ -0,0 +1,119 @@
+"""
+Fast JSON rendering and parsing for the API routes, using orjson, plus content
+negotiation of the binary OCR result formats (MessagePack, Arrow IPC stream)
+and framing of streamed records (NDJSON, Server-Sent Events).
+"""
+import logging
+from typing import Any, Dict, List
+
+import orjson
+from fastapi import HTTPException, Request
+from starlette.responses import Response
+
+from models import TextProcessingOptions
+from core.ocr_columns import CompactOCRResult
+from utils.result_encoding import (
+    JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE, encode_msgpack, encode_arrow_stream
+)
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# Accept header media types -> the format served for them
+_MEDIA_TYPE_ALIASES = {
+    JSON_MEDIA_TYPE: JSON_MEDIA_TYPE,
+    "application/*": JSON_MEDIA_TYPE,
+    "*/*": JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE: MSGPACK_MEDIA_TYPE,
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+    ARROW_STREAM_MEDIA_TYPE: ARROW_STREAM_MEDIA_TYPE,
+}
+
+class OrjsonResponse(Response):
+    """JSON response rendered with orjson; NumPy scalars and arrays serialize natively."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+async def read_json_body(request: Request) -> Any:
+    """Parse the request body with orjson; malformed JSON is a 400."""
+    try:
+        return orjson.loads(await request.body())
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+
+def negotiate_media_type(request: Request) -> str:
+    """
+    Result format for the request's Accept header: the supported media type with
+    the highest q-value (earliest on ties), JSON when none is supported. Entries
+    with q=0 are "not acceptable" and never selected.
+    """
+    best, best_q = JSON_MEDIA_TYPE, -1.0
+    for entry in request.headers.get("accept", "").split(","):
+        media_type, *params = (part.strip() for part in entry.split(";"))
+        served = _MEDIA_TYPE_ALIASES.get(media_type.lower())
+        if served is None:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q <= 0.0:
+            continue
+        if q > best_q:
+            best, best_q = served, q
+    return best
+
+def _binary_response(media_type: str, encode) -> Response:
+    try:
+        return Response(content=encode(), media_type=media_type)
+    except ImportError as e:
+        logger.warning(f"Cannot serve {media_type}: {e}")
+        raise HTTPException(status_code=406, detail=f"{media_type} responses are not available on this server")
+
+def ocr_result_response(request: Request, result: CompactOCRResult, text_options: TextProcessingOptions) -> Response:
+    """One OCR result in the negotiated format, honoring the detail level and field selection."""
+    level, fields = text_options.detail_level, text_options.fields
+    media_type = negotiate_media_type(request)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return _binary_response(media_type, lambda: encode_msgpack(result.to_dict(level, fields, packed=True)))
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        return _binary_response(media_type, lambda: encode_arrow_stream([result], level, fields))
+    return OrjsonResponse(result.to_dict(level, fields))
+
+def ocr_batch_response(request: Request, results: List[CompactOCRResult], text_options: TextProcessingOptions,
+                       summary: Dict[str, Any]) -> Response:
+    """
+    BatchOCRResult-shaped response in the negotiated format: `summary` holds the
+    batch fields besides the results (Arrow schema metadata for Arrow streams).
+    """
+    level, fields = text_options.detail_level, text_options.fields
+    media_type = negotiate_media_type(request)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return _binary_response(media_type, lambda: encode_msgpack(
+            {"results": [r.to_dict(level, fields, packed=True) for r in results], **summary}))
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        return _binary_response(media_type, lambda: encode_arrow_stream(results, level, fields, batch=summary))
+    return OrjsonResponse({"results": [r.to_dict(level, fields) for r in results], **summary})
+
+def stream_media_type(request: Request) -> str:
+    """Framing for a streamed response: SSE when the client accepts text/event-stream, NDJSON otherwise."""
+    accept = request.headers.get("accept", "").lower()
+    return SSE_MEDIA_TYPE if SSE_MEDIA_TYPE in accept else NDJSON_MEDIA_TYPE
+
+def encode_stream_record(media_type: str, record: Dict[str, Any]) -> bytes:
+    """
+    One record of a streamed response: a JSON line for NDJSON, or an SSE event
+    named after the record's "type" with the JSON on a single data line.
+    """
+    body = orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY)
+    if media_type == SSE_MEDIA_TYPE:
+        return b"event: " + record["type"].encode() + b"\ndata: " + body + b"\n\n"
+    return body + b"\n"
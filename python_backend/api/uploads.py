@@ -0,0 +1,140 @@
+"""
+Reading uploaded files without per-request temporary files where possible.
+
+Images are read into one in-memory buffer in large chunks and hashed as the
+chunks arrive, so OCR can decode them with cv2.imdecode and look up the cache
+without reading anything back. Videos need a path for cv2.VideoCapture, so they
+are streamed to a temporary file chunk by chunk instead of being buffered whole.
+Multi-file requests are parsed straight off the request stream, handing out
+each part as soon as it has arrived. All of them enforce MAX_FILE_SIZE_MB.
+"""
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional, Tuple
+
+import aiofiles
+from fastapi import HTTPException, Request, UploadFile
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from core.ocr_processor import content_hasher
+from config import MAX_FILE_SIZE_MB, UPLOAD_CHUNK_SIZE
+
+MAX_UPLOAD_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+MAX_FIELD_BYTES = 1024 * 1024  # Plain (non-file) form fields
+
+def _check_size(size: int) -> None:
+    if size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Uploaded file exceeds {MAX_FILE_SIZE_MB} MB")
+
+async def read_image_upload(file: UploadFile) -> Tuple[bytearray, str]:
+    """Read an uploaded image into memory, returning its bytes and content hash."""
+    hasher = content_hasher()
+    buffer = bytearray()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        hasher.update(chunk)
+        buffer += chunk
+        _check_size(len(buffer))
+    return buffer, hasher.hexdigest()
+
+async def save_upload_to_disk(file: UploadFile) -> str:
+    """
+    Stream an upload to a temporary file (keeping its extension) and return the
+    path; the caller deletes it. Nothing is left behind if the upload fails.
+    """
+    suffix = os.path.splitext(file.filename)[1].lower() if file.filename else ""
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    try:
+        size = 0
+        async with aiofiles.open(path, 'wb') as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                _check_size(size)
+                await f.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+@dataclass
+class UploadedPart:
+    """One part of a multipart request, held in memory."""
+    name: str
+    filename: Optional[str]  # None for plain form fields
+    data: bytearray
+    file_hash: Optional[str] = None  # Content hash of file parts, computed as the data arrived
+
+class _PartCollector:
+    """python-multipart callbacks that collect parts as they complete."""
+
+    def __init__(self):
+        self.completed: List[UploadedPart] = []
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._part: Optional[UploadedPart] = None
+        self._hasher = None
+
+    def callbacks(self):
+        return {
+            "on_header_field": self.on_header_field, "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end, "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data, "on_part_end": self.on_part_end,
+        }
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, params = parse_options_header(self._disposition)
+        self._disposition = b""
+        if b"name" not in params:
+            raise HTTPException(status_code=400, detail='Multipart part without a "name" in its Content-Disposition')
+        filename = params[b"filename"].decode("utf-8", "replace") if b"filename" in params else None
+        self._part = UploadedPart(params[b"name"].decode("utf-8", "replace"), filename, bytearray())
+        self._hasher = content_hasher() if filename is not None else None
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        chunk = data[start:end]
+        self._part.data += chunk
+        if self._hasher is not None:
+            self._hasher.update(chunk)
+            _check_size(len(self._part.data))
+        elif len(self._part.data) > MAX_FIELD_BYTES:
+            raise HTTPException(status_code=413, detail=f"Form field '{self._part.name}' is too large")
+
+    def on_part_end(self) -> None:
+        if self._hasher is not None:
+            self._part.file_hash = self._hasher.hexdigest()
+        self.completed.append(self._part)
+        self._part, self._hasher = None, None
+
+async def iter_multipart_parts(request: Request) -> AsyncIterator[UploadedPart]:
+    """
+    Parse a multipart/form-data body incrementally, yielding each part as soon as
+    its last byte has arrived. The rest of the body is not read while the
+    consumer is busy with a part, so a slow consumer holds back the upload
+    instead of letting it pile up in memory.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Content-Type must be multipart/form-data with a boundary")
+
+    collector = _PartCollector()
+    parser = MultipartParser(params[b"boundary"], collector.callbacks())
+    async for chunk in request.stream():
+        parser.write(chunk)
+        while collector.completed:
+            yield collector.completed.pop(0)
+    parser.finalize()
+    for part in collector.completed:
+        yield part
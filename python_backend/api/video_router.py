@@ -4,17 +4,20 @@ API routes dedicated to video processing.
 import os
 import time
 import logging
-import tempfile
+import asyncio
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request
 from typing import Optional
 
 from models import PreprocessingOptions, VideoProcessingOptions, VideoOCRRequest, VideoOCRResult
 from core.video_processor import process_video_for_ocr
+from core.jobs import worker_pool
+from api.uploads import save_upload_to_disk
+from api.responses import OrjsonResponse, read_json_body
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/ocr", tags=["Video OCR"])
 
-@router.post("/video", response_model=VideoOCRResult)
+@router.post("/video", response_model=VideoOCRResult, response_class=OrjsonResponse)
 async def process_video(
     request: Request,
     # Optional parameters for multipart form
@@ -26,10 +29,13 @@ async def process_video(
     max_frames: Optional[int] = Form(default=1000),
     enhance_contrast: Optional[bool] = Form(default=True),
     denoise: Optional[bool] = Form(default=True),
+    denoise_method: Optional[str] = Form(default="auto"),
     threshold_method: Optional[str] = Form(default="adaptive_gaussian"),
     apply_morphology: Optional[bool] = Form(default=True),
     deskew: Optional[bool] = Form(default=True),
-    upscale: Optional[bool] = Form(default=True)
+    deskew_method: Optional[str] = Form(default="projection"),
+    upscale: Optional[bool] = Form(default=True),
+    adaptive: Optional[bool] = Form(default=False)
 ):
     """
     Processes a video for OCR. Accepts either:
@@ -37,7 +43,7 @@ async def process_video(
     2. JSON request with VideoOCRRequest structure
     """
     start_time = time.time()
-    temp_file = None
+    temp_path = None
     
     try:
         content_type = request.headers.get("content-type", "")
@@ -54,28 +60,19 @@ async def process_video(
             ocr_options = PreprocessingOptions(
                 enhance_contrast=enhance_contrast if enhance_contrast is not None else True,
                 denoise=denoise if denoise is not None else True,
+                denoise_method=denoise_method if denoise_method is not None else "auto",
                 threshold_method=threshold_method if threshold_method is not None else "adaptive_gaussian",
                 apply_morphology=apply_morphology if apply_morphology is not None else True,
                 deskew=deskew if deskew is not None else True,
-                upscale=upscale if upscale is not None else True
+                deskew_method=deskew_method if deskew_method is not None else "projection",
+                upscale=upscale if upscale is not None else True,
+                adaptive=adaptive if adaptive is not None else False
             )
             
-            # Case 1: File upload
+            # Case 1: File upload - streamed to disk in large chunks, never held whole in memory
             if file is not None:
-                # Create temporary file with proper extension
-                file_extension = ""
-                if file.filename:
-                    file_extension = os.path.splitext(file.filename)[1].lower()
-                
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_extension)
-                
-                # Write uploaded content to temp file
-                content = await file.read()
-                temp_file.write(content)
-                temp_file.flush()
-                temp_file.close()
-                
-                video_path = temp_file.name
+                temp_path = await save_upload_to_disk(file)
+                video_path = temp_path
                 
             # Case 2: File path in form
             elif file_path is not None:
@@ -88,7 +85,7 @@ async def process_video(
                 
         elif "application/json" in content_type:
             # Handle JSON request
-            body = await request.json()
+            body = await read_json_body(request)
             json_request = VideoOCRRequest(**body)
             
             if not os.path.exists(json_request.file_path):
@@ -101,8 +98,9 @@ async def process_video(
         else:
             raise HTTPException(status_code=400, detail="Content-Type must be multipart/form-data or application/json")
         
-        # Process the video
-        result = process_video_for_ocr(video_path, video_options, ocr_options)
+        # Process the video in the shared worker pool so the event loop keeps serving other requests
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(worker_pool, process_video_for_ocr, video_path, video_options, ocr_options)
         result.processing_time = time.time() - start_time
         result.engine_used = "OneOCR"
         
@@ -118,8 +116,8 @@ async def process_video(
         raise HTTPException(status_code=500, detail=f"Error processing video: {str(e)}")
     finally:
         # Clean up temporary file if created
-        if temp_file and os.path.exists(temp_file.name):
+        if temp_path and os.path.exists(temp_path):
             try:
-                os.unlink(temp_file.name)
+                os.unlink(temp_path)
             except Exception as e:
-                logger.warning(f"Failed to delete temporary file {temp_file.name}: {e}")
\ No newline at end of file
+                logger.warning(f"Failed to delete temporary file {temp_path}: {e}")
\ No newline at end of file
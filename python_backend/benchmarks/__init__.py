@@ -0,0 +1,4 @@
+"""
+Standalone benchmark scripts for the OCR pipeline.
+Run from the python_backend directory, e.g. `python -m benchmarks.bench_denoise`.
+"""
@@ -0,0 +1,43 @@
+"""
+Compare skew estimators on rotated synthetic pages: latency and angle error.
+A page counts as a miss when the error exceeds --tolerance degrees.
+
+Usage: python -m benchmarks.bench_deskew [--pages 4] [--angles -8 -4 -1.5 0 2 6]
+"""
+import argparse
+
+from core.image_preprocessor import estimate_skew_angle
+from benchmarks.synthetic import make_page, rotate_page, time_call, print_table
+
+METHODS = ("hough", "projection")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--angles", type=float, nargs="+", default=[-8.0, -4.0, -1.5, 0.0, 2.0, 6.0])
+    parser.add_argument("--lines", type=int, default=30, help="Text lines per page (page density)")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    stats = {m: {"ms": 0.0, "err": 0.0, "misses": 0} for m in METHODS}
+    samples = 0
+
+    for seed in range(args.pages):
+        page, _ = make_page(seed, lines=args.lines)
+        for angle in args.angles:
+            rotated = rotate_page(page, angle)
+            samples += 1
+            for method in METHODS:
+                ms, estimate = time_call(estimate_skew_angle, rotated, method, repeat=args.repeat)
+                # The estimator returns the correcting rotation, i.e. -angle
+                error = abs(estimate + angle)
+                stats[method]["ms"] += ms
+                stats[method]["err"] += error
+                stats[method]["misses"] += int(error > args.tolerance)
+
+    rows = [[m, stats[m]["ms"] / samples, stats[m]["err"] / samples, f"{stats[m]['misses']}/{samples}"] for m in METHODS]
+    print_table(["method", "ms/page", "mean_abs_err_deg", "misses"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Layout post-processing benchmark with a golden regression check.
+
+The golden set (benchmarks/golden/layout.json) records a hash of the text the
+post-processor produces for synthetic pages across sizes, column counts, reading
+orders and with/without engine lines. Every run verifies the current engine
+against it before timing pages of 100 to 10k words, both through the full
+pipeline and through the fast path (layout analysis and fragment merging off),
+plus synthetic tables through table extraction.
+
+Usage: python -m benchmarks.bench_layout [--words 100 1000 10000] [--write-golden]
+"""
+import argparse
+import functools
+import hashlib
+import itertools
+import json
+import os
+
+from core.ocr_columns import extract_columns, LineColumns
+from utils.text_postprocessor import improve_text_structure
+from benchmarks.synthetic import make_engine_result, make_table_result, time_call, print_table
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "golden", "layout.json")
+READING_ORDERS = ("ltr_ttb", "rtl_ttb", "ttb_ltr", "ttb_rtl")
+
+def _golden_cases():
+    for words, columns, seed in itertools.product((1, 2, 3, 40, 250, 1200), (1, 2, 3), (0, 1)):
+        for with_lines, order in itertools.product((True, False), READING_ORDERS):
+            yield {"words": words, "columns": columns, "seed": seed, "with_lines": with_lines, "reading_order": order}
+
+def _run_case(case: dict) -> str:
+    engine_result = make_engine_result(case["words"], seed=case["seed"], columns=case["columns"])
+    words, lines = extract_columns(engine_result)
+    if not case["with_lines"]:
+        lines = LineColumns.empty()
+    return improve_text_structure(words, lines, reading_order=case["reading_order"])
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def check_golden() -> int:
+    """Return the number of golden cases whose output changed."""
+    with open(GOLDEN_PATH, encoding="utf-8") as f:
+        golden = json.load(f)
+    mismatches = 0
+    for entry in golden:
+        text = _run_case(entry["case"])
+        if _digest(text) != entry["sha256"]:
+            mismatches += 1
+            print(f"MISMATCH {entry['case']}: expected {entry['preview']!r}, got {text[:60]!r}")
+    print(f"golden: {len(golden) - mismatches}/{len(golden)} cases match")
+    return mismatches
+
+def write_golden():
+    entries = []
+    for case in _golden_cases():
+        text = _run_case(case)
+        entries.append({"case": case, "sha256": _digest(text), "preview": text[:60]})
+    os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+    with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=1)
+    print(f"Wrote {len(entries)} golden cases to {GOLDEN_PATH}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--write-golden", action="store_true", help="Regenerate the golden file from the current engine")
+    args = parser.parse_args()
+
+    if args.write_golden:
+        write_golden()
+        return
+    if check_golden():
+        raise SystemExit(1)
+
+    rows = []
+    for n, columns in itertools.product(args.words, (1, 3)):
+        words, lines = extract_columns(make_engine_result(n, columns=columns))
+        lines_ms, _ = time_call(improve_text_structure, words, lines, repeat=args.repeat)
+        words_ms, _ = time_call(improve_text_structure, words, LineColumns.empty(), repeat=args.repeat)
+        fast_path = functools.partial(improve_text_structure, enable_layout_analysis=False, merge_fragmented_words=False)
+        fast_ms, _ = time_call(fast_path, words, lines, repeat=args.repeat)
+        rows.append([n, columns, lines_ms, words_ms, fast_ms])
+    print_table(["words", "columns", "with_lines_ms", "words_only_ms", "fast_path_ms"], rows)
+
+    table_rows = []
+    for n_rows, n_cols in ((10, 4), (100, 8)):
+        words, lines = extract_columns(make_table_result(n_rows, n_cols))
+        ms, text = time_call(improve_text_structure, words, lines, repeat=args.repeat)
+        table_rows.append([f"{n_rows}x{n_cols}", len(words), ms, text.count(" | ") > 0])
+    print_table(["table", "words", "ms", "detected"], table_rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark of the text post-processing stage alone, per page.
+
+Times typical pages (default 300 words) through each post-processing
+configuration, plus the fixed per-call costs around it: fetching the shared
+postprocessor versus constructing one, and the whitespace normalizer. Pass
+--history FILE to append the results as one JSON line per run, so the per-page
+cost can be tracked across commits.
+
+Usage: python -m benchmarks.bench_postprocess [--words 300] [--pages 20] [--history FILE]
+"""
+import argparse
+import functools
+import json
+import platform
+import time
+
+from core.ocr_columns import extract_columns, LineColumns
+from utils.text_postprocessor import create_text_postprocessor, get_text_postprocessor
+from benchmarks.synthetic import make_engine_result, make_table_result, time_call, print_table
+
+CONFIGS = {
+    "full": {},
+    "no_line_breaks": {"preserve_line_breaks": False},
+    "no_fragment_merge": {"merge_fragmented_words": False},
+    "fast_path": {"enable_layout_analysis": False, "merge_fragmented_words": False},
+}
+
+def _per_page_ms(processor, pages, repeat: int) -> float:
+    def run():
+        for words, lines in pages:
+            processor.process_page(words, lines)
+    ms, _ = time_call(run, repeat=repeat)
+    return ms / len(pages)
+
+def _per_call_us(fn, calls: int, repeat: int) -> float:
+    def run():
+        for _ in range(calls):
+            fn()
+    ms, _ = time_call(run, repeat=repeat)
+    return ms * 1000.0 / calls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=300, help="Words per page")
+    parser.add_argument("--pages", type=int, default=20, help="Distinct pages per layout")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--history", help="Append results as a JSON line to this file")
+    args = parser.parse_args()
+
+    layouts = {
+        "1col": [extract_columns(make_engine_result(args.words, seed=s)) for s in range(args.pages)],
+        "3col": [extract_columns(make_engine_result(args.words, seed=s, columns=3)) for s in range(args.pages)],
+        "table": [extract_columns(make_table_result(seed=s)) for s in range(args.pages)],
+    }
+    layouts["1col_words_only"] = [(words, LineColumns.empty()) for words, _ in layouts["1col"]]
+
+    results = {}
+    rows = []
+    for config, options in CONFIGS.items():
+        processor = get_text_postprocessor(**options)
+        for layout, pages in layouts.items():
+            ms = _per_page_ms(processor, pages, args.repeat)
+            results[f"{config}/{layout}_ms"] = round(ms, 4)
+            rows.append([config, layout, ms, 1000.0 / ms if ms else 0.0])
+    print_table(["config", "layout", "ms_per_page", "pages_per_s"], rows)
+
+    text = get_text_postprocessor().process_page(*layouts["1col"][0]).text
+    normalize = functools.partial(get_text_postprocessor()._clean_and_format_text, text)
+    overheads = {
+        "get_text_postprocessor": _per_call_us(get_text_postprocessor, 10000, args.repeat),
+        "create_text_postprocessor": _per_call_us(create_text_postprocessor, 10000, args.repeat),
+        f"normalize_{len(text)}_chars": _per_call_us(normalize, 1000, args.repeat),
+    }
+    print()
+    print_table(["call", "us"], [[name, us] for name, us in overheads.items()])
+    results.update({f"{name}_us": round(us, 3) for name, us in overheads.items()})
+
+    if args.history:
+        record = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                  "words": args.words, "pages": args.pages, "results": results}
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"\nAppended results to {args.history}")
+
+if __name__ == "__main__":
+    main()
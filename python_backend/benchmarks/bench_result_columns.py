@@ -0,0 +1,58 @@
+"""
+Per-page cost of turning engine output into results: validated per-word Pydantic
+models (the previous approach) versus column extraction, optional materialization
+with model_construct, and the cost of caching each form.
+
+Usage: python -m benchmarks.bench_result_columns [--words 100 1000 5000]
+"""
+import argparse
+import gzip
+import pickle
+
+from models import BoundingBox, WordDetail
+from core.ocr_columns import extract_columns
+from benchmarks.synthetic import make_engine_result, time_call, print_table
+
+def _validated_words(engine_result: dict) -> list:
+    """Per-word model construction with validation, as the extractor used to do."""
+    words = []
+    for line in engine_result['lines']:
+        for word in line['words']:
+            r = word['bounding_rect']
+            xs, ys = (r['x1'], r['x2'], r['x3'], r['x4']), (r['y1'], r['y2'], r['y3'], r['y4'])
+            words.append(WordDetail(
+                text=word['text'], confidence=word['confidence'],
+                bbox=BoundingBox(x=int(min(xs)), y=int(min(ys)),
+                                 width=int(max(xs) - min(xs)), height=int(max(ys) - min(ys))),
+                polygon=[[int(x), int(y)] for x, y in zip(xs, ys)]
+            ))
+    return words
+
+def _cache_roundtrip(obj) -> int:
+    blob = gzip.compress(pickle.dumps(obj), compresslevel=6)
+    pickle.loads(gzip.decompress(blob))
+    return len(blob)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for n in args.words:
+        engine_result = make_engine_result(n)
+        validated_ms, models = time_call(_validated_words, engine_result, repeat=args.repeat)
+        columns_ms, (words, _) = time_call(extract_columns, engine_result, repeat=args.repeat)
+        materialize_ms, _ = time_call(words.to_models, repeat=args.repeat)
+        dumped = [m.model_dump() for m in models]
+        dict_cache_ms, dict_bytes = time_call(_cache_roundtrip, dumped, repeat=args.repeat)
+        col_cache_ms, col_bytes = time_call(_cache_roundtrip, words, repeat=args.repeat)
+        rows.append([n, validated_ms, columns_ms, columns_ms + materialize_ms,
+                     dict_cache_ms, col_cache_ms, f"{dict_bytes // 1024}K/{col_bytes // 1024}K"])
+
+    print_table(["words", "validated_ms", "columns_ms", "columns+models_ms",
+                 "cache_dicts_ms", "cache_columns_ms", "cache_size dicts/cols"], rows)
+
+if __name__ == "__main__":
+    main()
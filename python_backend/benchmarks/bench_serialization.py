@@ -0,0 +1,107 @@
+"""
+Serialization cost of a 50-image BatchOCRResult response.
+
+Compares building Pydantic models and encoding them the way FastAPI's default
+path does (jsonable_encoder + json.dumps), model_dump with json / orjson, and the
+direct path the OCR routes use: plain dicts straight from the compact columns,
+encoded with orjson, and the binary formats served on request (MessagePack with
+packed columns, Arrow IPC stream) when their packages are installed. Times
+include materializing models or dicts from the cached compact results, since
+that is part of every response. Decoding is timed for the client side.
+
+Usage: python -m benchmarks.bench_serialization [--images 50] [--words 300] [--detail-level words]
+"""
+import argparse
+import json
+
+import numpy as np
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from models import BatchOCRResult
+from core.ocr_columns import CompactOCRResult, extract_columns
+from utils.result_encoding import encode_msgpack, encode_arrow_stream
+from benchmarks.synthetic import make_engine_result, time_call, print_table
+
+def _compact_results(images: int, words: int):
+    results = []
+    for seed in range(images):
+        word_columns, line_columns = extract_columns(make_engine_result(words, seed=seed))
+        results.append(CompactOCRResult(
+            text=" ".join(word_columns.text), confidence=float(word_columns.confidence.mean()),
+            processing_time=0.1, words=word_columns, lines=line_columns, file_path=f"/data/page_{seed:03d}.png",
+            metadata={"preprocessing_path": "preprocessed", "engine_input_copies": 1},
+        ))
+    return results
+
+def _batch_model(results, detail_level: str) -> BatchOCRResult:
+    return BatchOCRResult(
+        results=[r.to_ocr_result(detail_level) for r in results],
+        total_processing_time=1.0, batch_size=len(results),
+        files_processed=len(results), files_failed=0,
+    )
+
+def _batch_dict(results, detail_level: str, packed: bool = False) -> dict:
+    return {
+        "results": [r.to_dict(detail_level, packed=packed) for r in results],
+        "total_processing_time": 1.0, "batch_size": len(results),
+        "files_processed": len(results), "files_failed": 0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=50)
+    parser.add_argument("--words", type=int, default=300, help="Words per image")
+    parser.add_argument("--detail-level", default="words", choices=["text", "lines", "words", "full"])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = _compact_results(args.images, args.words)
+    level = args.detail_level
+    paths = {
+        "models + jsonable_encoder + json": lambda: json.dumps(jsonable_encoder(_batch_model(results, level))).encode(),
+        "models + model_dump + json": lambda: json.dumps(_batch_model(results, level).model_dump(mode="json")).encode(),
+        "models + model_dump + orjson": lambda: orjson.dumps(_batch_model(results, level).model_dump(mode="json")),
+        "models + model_dump_json": lambda: _batch_model(results, level).model_dump_json().encode(),
+        "compact to_dict + orjson": lambda: orjson.dumps(_batch_dict(results, level)),
+    }
+
+    body = orjson.dumps(_batch_dict(results, level))
+    decoders = {
+        "json.loads": lambda: json.loads(body),
+        "orjson.loads": lambda: orjson.loads(body),
+    }
+    try:
+        import msgpack
+    except ImportError:
+        print("msgpack not installed, skipping MessagePack")
+    else:
+        packed_body = encode_msgpack(_batch_dict(results, level, packed=True))
+        paths["compact packed + msgpack"] = lambda: encode_msgpack(_batch_dict(results, level, packed=True))
+        decoders["msgpack + np.frombuffer boxes"] = lambda: [
+            np.frombuffer(r["word_details"]["bbox"], "<i4").reshape(-1, 4)
+            for r in msgpack.unpackb(packed_body)["results"] if "word_details" in r
+        ]
+    try:
+        import pyarrow as pa
+    except ImportError:
+        print("pyarrow not installed, skipping Arrow")
+    else:
+        arrow_body = encode_arrow_stream(results, level, batch={"batch_size": len(results)})
+        paths["compact arrow stream"] = lambda: encode_arrow_stream(results, level, batch={"batch_size": len(results)})
+        decoders["arrow stream read"] = lambda: pa.ipc.open_stream(arrow_body).read_all()
+
+    rows = []
+    baseline = None
+    for name, fn in paths.items():
+        ms, encoded = time_call(fn, repeat=args.repeat)
+        baseline = baseline or ms
+        rows.append([name, ms, baseline / ms, len(encoded) // 1024])
+    print(f"{args.images} images x {args.words} words, detail_level={level}")
+    print_table(["encode", "ms", "speedup", "kb"], rows)
+
+    print()
+    print_table(["decode", "ms"], [[name, time_call(fn, repeat=args.repeat)[0]] for name, fn in decoders.items()])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Deterministic synthetic test set used by the benchmarks.
+Pages are rendered on the fly from a fixed seed, so the set is reproducible
+without shipping binary fixtures.
+"""
+import time
+import random
+import logging
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WORDS = (
+    "invoice total amount due date customer account number payment reference "
+    "the quick brown fox jumps over lazy dog optical character recognition "
+    "service report quarterly revenue growth shipping address order summary "
+    "tax subtotal balance page section table column value description item"
+).split()
+
+def make_page(seed: int = 0, lines: int = 20, width: int = 1600, font_scale: float = 1.1) -> Tuple[np.ndarray, str]:
+    """Render a clean BGR page of random words and return it with its ground truth text."""
+    rng = random.Random(seed)
+    line_height = int(48 * font_scale)
+    height = line_height * (lines + 2)
+    page = np.full((height, width, 3), 255, dtype=np.uint8)
+    truth_lines = []
+
+    for i in range(lines):
+        words, x = [], 40
+        while True:
+            word = rng.choice(_WORDS)
+            (w, _), _ = cv2.getTextSize(word + " ", cv2.FONT_HERSHEY_SIMPLEX, font_scale, 2)
+            if x + w > width - 40:
+                break
+            words.append(word)
+            x += w
+        text = " ".join(words)
+        cv2.putText(page, text, (40, line_height * (i + 1) + line_height // 2),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 0, 0), 2, cv2.LINE_AA)
+        truth_lines.append(text)
+
+    return page, "\n".join(truth_lines)
+
+def make_engine_result(words: int = 1000, seed: int = 0, columns: int = 1,
+                       page_width: int = 2400, words_per_line: int = 10, column_gap: int = 300) -> dict:
+    """
+    Build a OneOCR-shaped result dict (lines -> words with 4-corner boxes) laid out
+    as `columns` text columns, without running the engine.
+    """
+    rng = random.Random(seed)
+    line_height = 40
+    column_width = (page_width - column_gap * (columns - 1)) // columns
+    lines_per_column = max(1, -(-words // (words_per_line * columns)))
+    lines, remaining = [], words
+
+    def rect(x1, y1, x2, y2):
+        return {'x1': x1, 'y1': y1, 'x2': x2, 'y2': y1, 'x3': x2, 'y3': y2, 'x4': x1, 'y4': y2}
+
+    for col in range(columns):
+        col_left = col * (column_width + column_gap)
+        for row in range(lines_per_column):
+            if remaining <= 0:
+                break
+            y = 50 + row * line_height + rng.uniform(-2, 2)
+            x, line_words = col_left + rng.uniform(0, 10), []
+            for _ in range(min(words_per_line, remaining)):
+                word = rng.choice(_WORDS)
+                w = min(len(word) * 14.0, column_width / words_per_line - 8)
+                line_words.append({'text': word, 'confidence': rng.uniform(0.6, 1.0),
+                                   'bounding_rect': rect(x, y, x + w, y + 28)})
+                x += w + 8 + rng.uniform(0, 4)
+            remaining -= len(line_words)
+            first, last = line_words[0]['bounding_rect'], line_words[-1]['bounding_rect']
+            lines.append({'text': " ".join(w['text'] for w in line_words),
+                          'bounding_rect': rect(first['x1'], first['y1'], last['x2'], last['y3']),
+                          'words': line_words})
+
+    return {'text': "\n".join(line['text'] for line in lines), 'text_angle': 0.0, 'lines': lines}
+
+def make_table_result(rows: int = 10, columns: int = 4, seed: int = 0, title: bool = True,
+                      cell_width: int = 260, row_height: int = 50) -> dict:
+    """
+    OneOCR-shaped result for a grid of short cells (one to two words each), one
+    engine line per cell, optionally under a title line spanning the first columns.
+    """
+    rng = random.Random(seed)
+    lines = []
+
+    def rect(x1, y1, x2, y2):
+        return {'x1': x1, 'y1': y1, 'x2': x2, 'y2': y1, 'x3': x2, 'y3': y2, 'x4': x1, 'y4': y2}
+
+    def add_line(texts, x, y, max_word_width=cell_width * 0.4):
+        words = []
+        for text in texts:
+            w = min(len(text) * 14.0, max_word_width)
+            words.append({'text': text, 'confidence': rng.uniform(0.6, 1.0), 'bounding_rect': rect(x, y, x + w, y + 28)})
+            x += w + 10
+        first, last = words[0]['bounding_rect'], words[-1]['bounding_rect']
+        lines.append({'text': " ".join(texts), 'bounding_rect': rect(first['x1'], first['y1'], last['x2'], last['y3']),
+                      'words': words})
+
+    top = 50
+    if title:
+        add_line([rng.choice(_WORDS) for _ in range(max(2, columns * 2))], 20, top, max_word_width=cell_width / 3)
+        top += row_height
+    for row in range(rows):
+        for col in range(columns):
+            add_line([rng.choice(_WORDS) for _ in range(rng.randint(1, 2))],
+                     20 + col * cell_width + rng.uniform(0, 6), top + row * row_height + rng.uniform(-2, 2))
+
+    return {'text': "\n".join(line['text'] for line in lines), 'text_angle': 0.0, 'lines': lines}
+
+def add_gaussian_noise(image: np.ndarray, sigma: float, seed: int = 0) -> np.ndarray:
+    """Add zero-mean Gaussian noise with the given sigma (0-255 scale)."""
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(0.0, sigma, image.shape).astype(np.float32)
+    return np.clip(image.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+def rotate_page(image: np.ndarray, angle: float) -> np.ndarray:
+    """Rotate a page by `angle` degrees (counter-clockwise), padding with white."""
+    h, w = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    return cv2.warpAffine(image, matrix, (w, h), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=(255, 255, 255))
+
+def psnr(reference: np.ndarray, image: np.ndarray) -> float:
+    """Peak signal-to-noise ratio between two equally sized images."""
+    if reference.ndim == 3:
+        reference = cv2.cvtColor(reference, cv2.COLOR_BGR2GRAY)
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return float(cv2.PSNR(reference, image))
+
+def get_ocr_text_fn() -> Optional[Callable[[np.ndarray], str]]:
+    """Return a function that OCRs an ndarray, or None when OneOCR is unavailable."""
+    try:
+        from core.ocr_instance import initialize_ocr, get_ocr_instance
+        from core.engine_adapter import recognize_image
+        initialize_ocr()
+        engine = get_ocr_instance()
+    except Exception as e:
+        logger.warning(f"OneOCR unavailable, OCR accuracy will not be measured: {e}")
+        return None
+
+    def _ocr(image: np.ndarray) -> str:
+        result = recognize_image(engine, image) or {}
+        return " ".join(line.get('text', '') for line in result.get('lines', []))
+
+    return _ocr
+
+def character_accuracy(truth: str, text: str) -> float:
+    """1 - normalized edit distance over whitespace-normalized text."""
+    import Levenshtein
+    truth, text = " ".join(truth.split()), " ".join(text.split())
+    if not truth:
+        return 1.0 if not text else 0.0
+    return max(0.0, 1.0 - Levenshtein.distance(truth, text) / len(truth))
+
+def time_call(fn: Callable, *args, repeat: int = 3) -> Tuple[float, object]:
+    """Return (best wall time in ms, last result) over `repeat` calls."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0, result
+
+def print_table(headers: List[str], rows: List[List[object]]):
+    """Print a simple fixed-width table."""
+    widths = [max(len(str(h)), *(len(_fmt(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(_fmt(v).ljust(w) for v, w in zip(row, widths)))
+
+def _fmt(value: object) -> str:
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
@@ -8,6 +8,7 @@ SUPPORTED_DOCUMENT_FORMATS = ['.pdf', '.docx', '.txt', '.rtf']
 
 # File and request limits
 MAX_FILE_SIZE_MB = 200
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read from an upload per call (images go to memory, videos to disk)
 MAX_BATCH_SIZE = 50
 
 # OCR processing parameters
@@ -20,14 +21,33 @@ CACHE_TTL_SECONDS = 7200  # 2 hours - longer cache retention
 
 # Performance settings
 MAX_CONCURRENT_REQUESTS = 8  # Maximum concurrent OCR processing
+MAX_CONCURRENT_PAGES = 4  # Pages of one multi-page image OCR'd (and decoded ahead) at once
+# Pages run on a pool of their own, so up to MAX_CONCURRENT_REQUESTS + MAX_CONCURRENT_PAGES engine calls run at once
 REQUEST_TIMEOUT_SECONDS = 30  # Timeout for individual requests
 BATCH_PROCESSING_CHUNK_SIZE = 4  # Process batches in chunks
+MAX_BATCH_CONCURRENCY = 6  # Images of one batch OCR'd at once (also bounds uploads held in memory)
+BULK_INGEST_WINDOW = 64  # Paths enumerated and in flight at once during bulk ingestion; checkpointed per window
+
+# Background jobs (/jobs)
+MAX_CONCURRENT_JOBS = 2       # Jobs running at once; later ones wait queued
+MAX_RETAINED_JOBS = 100       # Finished jobs kept for polling, oldest dropped first
+JOB_RETENTION_SECONDS = 3600  # Finished jobs are dropped after this long
 
 # Preprocessing defaults - optimized
-DEFAULT_IMAGE_DPI = 300
+DEFAULT_IMAGE_DPI = 300  # Also the rasterization DPI for document pages that need OCR
 MIN_IMAGE_WIDTH_FOR_OCR = 800  # Increased for better OCR accuracy
 MAX_IMAGE_DIMENSION = 4096  # Prevent memory issues with very large images
 
+# Denoising - strength is derived from the estimated noise sigma (0-255 scale)
+DENOISE_MIN_NOISE_SIGMA = 4.0  # Skip denoising below this estimated noise level
+DENOISE_HEAVY_NOISE_SIGMA = 15.0  # 'auto' switches from bilateral to NLM above this
+DENOISE_NLM_MAX_DIMENSION = 800  # NLM runs on a proxy no larger than this
+
+# Deskew - angle estimation runs on a downsampled proxy
+DESKEW_PROXY_WIDTH = 1000
+DESKEW_SEARCH_RANGE = 10.0  # Degrees searched either side of horizontal (projection method)
+DESKEW_MAX_SAMPLE_POINTS = 20000  # Foreground pixels used for projection profiles
+
 # Performance monitoring
 SLOW_REQUEST_THRESHOLD = 2.0  # Log requests taking longer than this
 CACHE_CLEANUP_PROBABILITY = 0.01  # 1% chance per request
@@ -38,4 +58,14 @@ CACHE_CLEANUP_PROBABILITY = 0.01  # 1% chance per request
 # Text post-processing configuration
 USE_ADVANCED_TEXT_PROCESSING = True  # Enable advanced text structure processing
 DEFAULT_READING_ORDER = "ltr_ttb"    # Default reading order: left-to-right, top-to-bottom
-ENABLE_LAYOUT_ANALYSIS = True        # Enable automatic layout detection and processing
\ No newline at end of file
+ENABLE_LAYOUT_ANALYSIS = True        # Enable automatic layout detection and processing
+# Table extraction
+TABLE_MIN_GUTTER_RATIO = 0.5      # Minimum column gutter width (relative to median word height)
+TABLE_GUTTER_ROW_TOLERANCE = 0.1  # Fraction of rows allowed to cross a column gutter (spanning cells)
+TABLE_MIN_FILL_RATIO = 0.5        # Minimum share of grid positions holding a cell
+TABLE_MAX_WORDS_PER_CELL = 4      # Median words per cell above this reads as running text
+TABLE_RULING_MIN_LENGTH_RATIO = 2.0  # Shortest ruling line (relative to median word height); glyph strokes are shorter
+# Document extraction
+PDF_MIN_NATIVE_TEXT_CHARS = 32  # PDF pages with fewer embedded text characters are OCR'd instead
+TXT_ENCODING_SAMPLE_BYTES = 64 * 1024  # Prefix of a text file used to detect its encoding
+TXT_CHUNK_BYTES = 1024 * 1024          # Text files are decoded (and streamed) this many bytes at a time
@@ -0,0 +1,168 @@
+"""
+Concurrent OCR of a batch of image files, yielding results as they finish.
+Shared by the batch routes and batch jobs, plus the same scheduling for images
+uploaded in one request.
+"""
+import os
+import time
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from models import PreprocessingOptions, TextProcessingOptions
+from core.ocr_processor import (
+    PreparedImage, perform_ocr_on_image_compact, perform_ocr_on_bytes, preprocess_image_files,
+    group_paths_by_image_size
+)
+from core.ocr_columns import CompactOCRResult
+from core.jobs import worker_pool
+from config import MAX_BATCH_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+async def process_single_image(file_path: str, options: PreprocessingOptions, text_options: TextProcessingOptions, executor: ThreadPoolExecutor,
+                                prepared: Optional[PreparedImage] = None) -> CompactOCRResult:
+    """
+    Process a single image using shared thread pool for better efficiency.
+    `prepared` (from preprocess_image_files) saves reading and hashing the file again.
+    """
+    if not os.path.exists(file_path):
+        return CompactOCRResult(
+            text="", confidence=0, processing_time=0, file_path=file_path,
+            success=False, error_message="File not found", engine_used="OneOCR"
+        )
+
+    # Run CPU-bound OCR processing in shared thread pool
+    loop = asyncio.get_event_loop()
+    if prepared is None:
+        result = await loop.run_in_executor(
+            executor, perform_ocr_on_image_compact, file_path, options, text_options
+        )
+    else:
+        result = await loop.run_in_executor(executor, functools.partial(
+            perform_ocr_on_bytes, prepared.data, options, text_options, file_path=file_path,
+            file_hash=prepared.file_hash, preprocessed_image=prepared.preprocessed
+        ))
+
+    result.engine_used = "OneOCR"
+    return result
+
+def failed_result(file_path: str, error_message: str) -> CompactOCRResult:
+    return CompactOCRResult(
+        text="", confidence=0, processing_time=0, file_path=file_path,
+        success=False, error_message=error_message, engine_used="OneOCR"
+    )
+
+async def iter_batch_results(file_paths: List[str], options: PreprocessingOptions,
+                              text_options: TextProcessingOptions) -> AsyncIterator[Tuple[int, CompactOCRResult]]:
+    """
+    Yield (index into file_paths, result) for every requested file as soon as its
+    OCR finishes. Same-sized images are decoded and preprocessed as one stack;
+    missing files and failures come back as unsuccessful results. A path listed
+    more than once is processed once and yielded for each of its indices.
+    """
+    indices: Dict[str, List[int]] = {}
+    for index, path in enumerate(file_paths):
+        indices.setdefault(path, []).append(index)
+
+    existing_paths = []
+    for path in indices:
+        if os.path.exists(path):
+            existing_paths.append(path)
+        else:
+            for index in indices[path]:
+                yield index, failed_result(path, "File not found")
+
+    # Process images concurrently with optimized resource management
+    max_concurrent = max(1, min(MAX_BATCH_CONCURRENCY, len(file_paths)))  # Reduced for better stability
+    semaphore = asyncio.Semaphore(max_concurrent)
+    loop = asyncio.get_event_loop()
+
+    # Blocking work goes to the shared worker pool, never a pool of our own: a
+    # pool joined on exit would block the event loop until running OCR finishes
+    async def prepare_group(paths: List[str]) -> Dict[str, PreparedImage]:
+        # Same-sized images are read once and preprocessed as one stack, then OCR'd individually
+        async with semaphore:
+            try:
+                return await loop.run_in_executor(worker_pool, preprocess_image_files, paths, options, text_options)
+            except Exception as e:
+                logger.warning(f"Batch preprocessing failed for {len(paths)} files: {e}")
+                return {}
+
+    async def process_file(file_path: str, group: "asyncio.Future[Dict[str, PreparedImage]]") -> Tuple[str, Any]:
+        try:
+            prepared = (await group).get(file_path)
+            async with semaphore:
+                return file_path, await process_single_image(file_path, options, text_options, worker_pool, prepared)
+        except Exception as e:
+            return file_path, e
+
+    groups = await loop.run_in_executor(worker_pool, group_paths_by_image_size, existing_paths)
+    prepare_tasks, file_tasks = [], []
+    for group in groups:
+        prepared = asyncio.ensure_future(prepare_group(group))
+        prepare_tasks.append(prepared)
+        file_tasks.extend(asyncio.ensure_future(process_file(path, prepared)) for path in group)
+    try:
+        for finished in asyncio.as_completed(file_tasks):
+            file_path, result = await finished
+            if isinstance(result, Exception):
+                logger.error(f"Error processing {file_path}: {result}")
+                result = failed_result(file_path, str(result))
+            for index in indices[file_path]:
+                yield index, result
+    finally:
+        # A client that stops reading a stream cancels whatever has not started
+        # yet; work already running in the pool finishes without being waited for
+        for task in prepare_tasks + file_tasks:
+            task.cancel()
+
+async def process_uploaded_images(uploads: AsyncIterator[Tuple[Optional[str], Union[bytes, bytearray], Optional[str]]],
+                                  options: PreprocessingOptions,
+                                  text_options: TextProcessingOptions) -> List[CompactOCRResult]:
+    """
+    OCR uploaded images given as (filename, encoded bytes, content hash or None),
+    starting each one as soon as `uploads` yields it, under the same concurrency
+    limit and on the same shared worker pool as file batches. Results come back
+    in upload order. While every slot is busy the next upload is not requested,
+    so a fast upload waits for the OCR instead of piling up in memory.
+    """
+    semaphore = asyncio.Semaphore(MAX_BATCH_CONCURRENCY)
+    loop = asyncio.get_event_loop()
+
+    async def process_upload(filename: Optional[str], data: Union[bytes, bytearray],
+                             file_hash: Optional[str]) -> CompactOCRResult:
+        # Holds the slot acquired for it before it was scheduled
+        try:
+            result = await loop.run_in_executor(worker_pool, functools.partial(
+                perform_ocr_on_bytes, data, options, text_options, file_path=filename, file_hash=file_hash
+            ))
+            result.engine_used = "OneOCR"
+            return result
+        except Exception as e:
+            logger.error(f"Error processing upload {filename}: {e}")
+            return failed_result(filename, str(e))
+        finally:
+            semaphore.release()
+
+    tasks = []
+    try:
+        async for filename, data, file_hash in uploads:
+            await semaphore.acquire()
+            tasks.append(asyncio.ensure_future(process_upload(filename, data, file_hash)))
+        return list(await asyncio.gather(*tasks))
+    finally:
+        # An aborted upload cancels the OCR not yet started, without waiting for the rest
+        for task in tasks:
+            task.cancel()
+
+def batch_summary(start_time: float, batch_size: int, files_processed: int, files_failed: int) -> Dict[str, Any]:
+    """BatchOCRResult fields besides the results."""
+    return {
+        "total_processing_time": time.time() - start_time,
+        "batch_size": batch_size,
+        "files_processed": files_processed,
+        "files_failed": files_failed,
+    }
@@ -0,0 +1,123 @@
+"""
+Server-side bulk ingestion: OCR every image under a directory or matching a glob
+and append the results to a JSONL file, one OCRResult per line.
+
+Paths are enumerated lazily (os.scandir, glob.iglob) and handed to the batch
+scheduler BULK_INGEST_WINDOW at a time, so memory and in-flight work stay flat
+however many files match. The output file is the checkpoint: results are
+appended as they finish and the file is fsynced after every window. Rerunning
+with the same output resumes, skipping the paths already recorded successfully.
+Failed files are retried and their new record is appended after the failed one,
+so the last record for a path is the one that counts.
+"""
+import os
+import glob
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+import orjson
+
+from models import BulkIngestRequest, PreprocessingOptions, TextProcessingOptions
+from core.batch_processor import iter_batch_results
+from core.jobs import worker_pool
+from config import SUPPORTED_IMAGE_FORMATS, BULK_INGEST_WINDOW
+
+logger = logging.getLogger(__name__)
+
+def _scan_directory(directory: str, recursive: bool) -> Iterator[str]:
+    """Files under `directory`, using the type info os.scandir already has (no stat per file)."""
+    pending = [directory]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    yield entry.path
+                elif recursive and entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+
+def iter_image_paths(source: str, recursive: bool = False, extensions: Optional[List[str]] = None) -> Iterator[str]:
+    """Lazily enumerate image files in a directory, or matching a glob pattern, by extension."""
+    wanted = {ext.lower() if ext.startswith(".") else f".{ext.lower()}" for ext in (extensions or SUPPORTED_IMAGE_FORMATS)}
+    if os.path.isdir(source):
+        paths = _scan_directory(source, recursive)
+    else:
+        paths = (path for path in glob.iglob(source, recursive=recursive) if os.path.isfile(path))
+    for path in paths:
+        if os.path.splitext(path)[1].lower() in wanted:
+            yield path
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """
+    Paths recorded as successfully OCR'd in an existing output file; failures are
+    left out so a resumed run retries them. A last line cut short by a crash is
+    truncated away so appending continues from a clean line boundary.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    good_size = 0
+    with open(output_path, "rb+") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = orjson.loads(line)
+                if record["success"]:
+                    done.add(record["file_path"])
+            except (orjson.JSONDecodeError, KeyError, TypeError):
+                break
+            good_size += len(line)
+        f.truncate(good_size)
+    return done
+
+def _next_window(paths: Iterator[str], done: Set[str], size: int) -> List[str]:
+    window = []
+    for path in paths:
+        if path not in done:
+            window.append(path)
+            if len(window) == size:
+                break
+    return window
+
+def _checkpoint(output) -> None:
+    output.flush()
+    os.fsync(output.fileno())
+
+async def run_bulk_ingest(request: BulkIngestRequest,
+                          progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Run an ingestion to completion and return its summary. progress_callback, if
+    given, receives the running counts after every window. Cancelling the calling
+    task stops it after the results written so far, ready to resume.
+    """
+    start_time = time.time()
+    options = request.preprocessing_options or PreprocessingOptions()
+    text_options = request.text_processing_options or TextProcessingOptions()
+    loop = asyncio.get_event_loop()
+
+    done = await loop.run_in_executor(worker_pool, load_checkpoint, request.output_path) if request.resume else set()
+    counts = {"files_processed": 0, "files_failed": 0, "files_skipped": len(done)}
+    paths = iter_image_paths(request.source, request.recursive, request.extensions)
+
+    with open(request.output_path, "ab" if request.resume else "wb") as output:
+        while True:
+            # Enumeration touches the filesystem, so it stays off the event loop too
+            window = await loop.run_in_executor(worker_pool, _next_window, paths, done, BULK_INGEST_WINDOW)
+            if not window:
+                break
+            async for index, result in iter_batch_results(window, options, text_options):
+                record = result.to_dict(text_options.detail_level, text_options.fields)
+                # Resuming keys on the path, so it is written even when `fields` leaves it out
+                record["file_path"] = window[index]
+                output.write(orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n")
+                counts["files_processed" if result.success else "files_failed"] += 1
+            await loop.run_in_executor(worker_pool, _checkpoint, output)
+            if progress_callback is not None:
+                progress_callback(dict(counts))
+
+    summary = {"output_path": request.output_path, "total_processing_time": time.time() - start_time, **counts}
+    logger.info(f"Bulk ingestion of {request.source}: {counts['files_processed']} processed, "
+                f"{counts['files_failed']} failed, {counts['files_skipped']} already done")
+    return summary
@@ -1,52 +1,400 @@
 """
 Document text extraction from various file formats (PDF, DOCX, etc.)
 """
+import os
+import time
+import codecs
 import logging
-from models import DocumentExtractionResult
+import posixpath
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future, as_completed, wait, FIRST_COMPLETED
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from models import (
+    DocumentExtractionRequest, DocumentExtractionResult, DocumentPage, PreprocessingOptions, TextProcessingOptions
+)
+from core.ocr_columns import CompactOCRResult
+from core.ocr_processor import submit_page_ocr
+from config import (
+    DEFAULT_IMAGE_DPI, PDF_MIN_NATIVE_TEXT_CHARS, MAX_CONCURRENT_PAGES, TXT_ENCODING_SAMPLE_BYTES, TXT_CHUNK_BYTES
+)
 
 logger = logging.getLogger(__name__)
 
-def extract_text_from_document(file_path: str) -> DocumentExtractionResult:
+# PDFium is not thread-safe: every call into it goes through this lock. Only the
+# OCR of rendered pages runs in parallel. Documents may be read from different
+# threads over their lifetime (a streamed response), one call at a time.
+_pdfium_lock = threading.Lock()
+
+def _read_pdf_page(pdf, index: int, dpi: int, ocr_fallback: bool) -> Tuple[str, Optional[np.ndarray]]:
+    """
+    Embedded text of one page and, when it has (next to) none and OCR is
+    allowed, the page rendered at `dpi` as a BGR image.
+    """
+    with _pdfium_lock:
+        page = pdf[index]
+        try:
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+            if len(text.strip()) >= PDF_MIN_NATIVE_TEXT_CHARS or not ocr_fallback:
+                return text.replace("\r\n", "\n"), None
+            bitmap = page.render(scale=dpi / 72)
+            image = bitmap.to_numpy().copy()  # The bitmap's buffer is freed on close
+            bitmap.close()
+        finally:
+            page.close()
+    if image.ndim == 3 and image.shape[2] == 4:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    return text.replace("\r\n", "\n"), image
+
+def _ocr_page_result(page_number: int, result: CompactOCRResult, render_time: float) -> DocumentPage:
+    return DocumentPage(
+        page_number=page_number, text=result.text, method="ocr",
+        processing_time=render_time + result.processing_time, confidence=result.confidence,
+        success=result.success, error_message=result.error_message
+    )
+
+def parse_page_ranges(spec: str) -> List[Tuple[int, Optional[int]]]:
+    """
+    Parse a page selection such as "1-3,7,10-" (1-based, inclusive; "10-" runs to
+    the last page, "-5" from the first) into (first, last) pairs, last None for
+    open-ended ranges. Raises ValueError on malformed input.
+    """
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, dash, last = part.partition("-")
+        try:
+            start = int(first) if first.strip() else 1
+            end = (int(last) if last.strip() else None) if dash else start
+        except ValueError:
+            raise ValueError(f"Invalid page range '{part}'")
+        if start < 1 or (end is not None and end < start):
+            raise ValueError(f"Invalid page range '{part}'")
+        ranges.append((start, end))
+    if not ranges:
+        raise ValueError("Empty page selection")
+    return ranges
+
+def _select_pages(spec: Optional[str], page_count: int) -> List[int]:
+    """0-based indices of the selected pages, ascending; pages past the end are ignored."""
+    if not spec:
+        return list(range(page_count))
+    selected = set()
+    for start, end in parse_page_ranges(spec):
+        selected.update(range(start - 1, min(end or page_count, page_count)))
+    if not selected:
+        raise ValueError(f"No pages selected by '{spec}' in a {page_count}-page document")
+    return sorted(selected)
+
+def check_page_selection(file_path: str, spec: str) -> None:
+    """
+    Raise ValueError when `spec` is malformed or, for a PDF, selects none of its
+    pages. A PDF that PDFium cannot open passes; extraction reports that error.
+    """
+    parse_page_ranges(spec)
+    if not file_path.lower().endswith(".pdf"):
+        return
+    import pypdfium2 as pdfium
+
+    try:
+        with _pdfium_lock:
+            pdf = pdfium.PdfDocument(file_path)
+            page_count = len(pdf)
+            pdf.close()
+    except pdfium.PdfiumError:
+        return
+    _select_pages(spec, page_count)
+
+def iter_pdf_pages(file_path: str, request: DocumentExtractionRequest,
+                   stats: Optional[Dict[str, Any]] = None) -> Iterator[DocumentPage]:
+    """
+    Yield the selected pages of a PDF as each one is done, so not necessarily in
+    page order. Pages with a text layer are read straight from PDFium and yielded
+    at once; image-only pages are rendered one at a time at the requested DPI
+    and OCR'd on the page pool, and rendering pauses while MAX_CONCURRENT_PAGES
+    of them are waiting for OCR, so memory stays flat whatever the page count.
+    `stats`, if given, receives page_count, pages_selected and dpi on opening.
+    """
+    import pypdfium2 as pdfium
+
+    dpi = request.dpi or DEFAULT_IMAGE_DPI
+    options = request.preprocessing_options or PreprocessingOptions()
+    text_options = request.text_processing_options or TextProcessingOptions()
+
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(file_path)
+        page_count = len(pdf)
+    pending: Dict["Future[CompactOCRResult]", Tuple[int, float]] = {}
+    try:
+        indices = _select_pages(request.pages, page_count)
+        if stats is not None:
+            stats.update(page_count=page_count, pages_selected=len(indices), dpi=dpi)
+
+        def finished(futures) -> Iterator[DocumentPage]:
+            for future in futures:
+                page_number, render_time = pending.pop(future)
+                yield _ocr_page_result(page_number, future.result(), render_time)
+
+        for index in indices:
+            page_start = time.time()
+            text, image = _read_pdf_page(pdf, index, dpi, request.ocr_fallback)
+            if image is None:
+                yield DocumentPage(page_number=index + 1, text=text, method="native",
+                                   processing_time=time.time() - page_start)
+            else:
+                if len(pending) >= MAX_CONCURRENT_PAGES:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from finished(done)
+                future = submit_page_ocr(list(pending), image, index + 1, options, text_options, file_path)
+                pending[future] = (index + 1, time.time() - page_start)
+            yield from finished([future for future in pending if future.done()])
+        yield from finished(as_completed(list(pending)))
+    finally:
+        # Also reached when a streaming client goes away: drop OCR not yet started
+        for future in pending:
+            future.cancel()
+        with _pdfium_lock:
+            pdf.close()
+
+def _extract_pdf(file_path: str, request: DocumentExtractionRequest) -> Tuple[List[DocumentPage], Dict[str, Any]]:
+    """Per-page text of a PDF in page order, with page counts for the result metadata."""
+    stats: Dict[str, Any] = {}
+    pages = sorted(iter_pdf_pages(file_path, request, stats), key=lambda page: page.page_number)
+    ocr_pages = sum(1 for page in pages if page.method == "ocr")
+    stats.update(native_pages=len(pages) - ocr_pages, ocr_pages=ocr_pages)
+    return pages, stats
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_BLIP = "{http://schemas.openxmlformats.org/drawingml/2006/main}blip"
+_VML_IMAGEDATA = "{urn:schemas-microsoft-com:vml}imagedata"
+_PACKAGE_RELS = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+
+def _docx_image_targets(docx: zipfile.ZipFile) -> Dict[str, str]:
+    """Relationship id -> archive path of the images the main document part refers to."""
+    try:
+        rels = ET.fromstring(docx.read("word/_rels/document.xml.rels"))
+    except KeyError:
+        return {}
+    targets = {}
+    for rel in rels.iter(_PACKAGE_RELS):
+        if rel.get("Type", "").endswith("/image") and rel.get("TargetMode") != "External":
+            target = rel.get("Target", "")
+            targets[rel.get("Id")] = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("word", target))
+    return targets
+
+def _extract_docx(file_path: str, request: DocumentExtractionRequest) -> Tuple[str, Dict[str, Any]]:
+    """
+    Text of a DOCX, one line per paragraph (table cells included), from a
+    streaming parse of word/document.xml. With request.ocr_images, embedded
+    images are read from the archive and decoded one at a time as they are
+    reached, OCR'd on the page pool (at most MAX_CONCURRENT_PAGES decoded at
+    once), and their text is placed after the paragraph holding them. An image
+    used several times is OCR'd once; images missing from the archive or that
+    OpenCV cannot decode (EMF, WMF) are skipped.
+    """
+    options = request.preprocessing_options or PreprocessingOptions()
+    text_options = request.text_processing_options or TextProcessingOptions()
+    segments: List[Union[str, "Future[CompactOCRResult]"]] = []
+    image_results: Dict[str, Optional["Future[CompactOCRResult]"]] = {}
+    stats = {"paragraphs": 0, "images": 0, "images_ocr": 0, "images_skipped": 0}
+
+    with zipfile.ZipFile(file_path) as docx:
+        image_targets = _docx_image_targets(docx)
+        runs: List[str] = []
+        paragraph_images: List["Future[CompactOCRResult]"] = []
+        try:
+            with docx.open("word/document.xml") as xml:
+                for event, elem in ET.iterparse(xml, events=("end",)):
+                    tag = elem.tag
+                    if tag == f"{_W}t":
+                        runs.append(elem.text or "")
+                    elif tag == f"{_W}tab":
+                        runs.append("\t")
+                    elif tag in (f"{_W}br", f"{_W}cr"):
+                        runs.append("\n")
+                    elif tag in (_BLIP, _VML_IMAGEDATA):
+                        target = image_targets.get(elem.get(f"{_R}embed") or elem.get(f"{_R}id"))
+                        if target is None:
+                            continue
+                        stats["images"] += 1
+                        if not request.ocr_images:
+                            continue
+                        if target not in image_results:
+                            try:
+                                data = docx.read(target)
+                            except KeyError:
+                                logger.warning(f"Skipping image {target} missing from {file_path}")
+                                stats["images_skipped"] += 1
+                                image_results[target] = None
+                                continue
+                            image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                            del data
+                            if image is None:
+                                logger.warning(f"Skipping undecodable image {target} in {file_path}")
+                                stats["images_skipped"] += 1
+                                image_results[target] = None
+                            else:
+                                in_flight = [f for f in image_results.values() if f is not None]
+                                image_results[target] = submit_page_ocr(
+                                    in_flight, image, len(image_results) + 1, options, text_options, file_path
+                                )
+                                del image
+                        if image_results[target] is not None:
+                            paragraph_images.append(image_results[target])
+                    elif tag == f"{_W}p":
+                        text = "".join(runs)
+                        if text.strip():
+                            segments.append(text)
+                        segments.extend(paragraph_images)
+                        runs, paragraph_images = [], []
+                        stats["paragraphs"] += 1
+                        elem.clear()  # Keep the parsed tree from growing with the document
+        except BaseException:
+            for future in image_results.values():
+                if future is not None:
+                    future.cancel()
+            raise
+
+    lines = []
+    for segment in segments:
+        if isinstance(segment, str):
+            lines.append(segment)
+            continue
+        result = segment.result()
+        if result.success and result.text.strip():
+            lines.append(result.text.strip())
+    stats["images_ocr"] = sum(1 for future in image_results.values() if future is not None)
+    return "\n".join(lines), stats
+
+def _extract_rtf(file_path: str) -> str:
+    """
+    Plain text of an RTF file. RTF is 7-bit with escapes for everything else, so
+    Latin-1 reads any stray 8-bit byte without failing.
+    """
+    from striprtf.striprtf import rtf_to_text
+
+    with open(file_path, "r", encoding="latin-1") as f:
+        return rtf_to_text(f.read(), errors="ignore")
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"),  # Before UTF-16: same leading bytes
+    (codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+def detect_text_encoding(sample: bytes) -> str:
+    """
+    Encoding of a text file judged from a prefix: a byte order mark, else UTF-8
+    if the sample is valid UTF-8 (allowing a character cut off at its end), else
+    chardet's guess. ASCII is widened to UTF-8, as the rest of the file may not be.
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    import chardet
+
+    encoding = chardet.detect(sample)["encoding"]
+    if not encoding or encoding.lower() == "ascii":
+        return "utf-8"
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return "utf-8"
+
+def iter_text_chunks(file_path: str, request: DocumentExtractionRequest,
+                     stats: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """
+    Decode a text file TXT_CHUNK_BYTES at a time, with the encoding detected on
+    its first TXT_ENCODING_SAMPLE_BYTES and undecodable bytes replaced, never
+    holding the file in memory whole. Line endings are normalized to "\n" like
+    text-mode open(). request.max_bytes stops reading early. `stats`, if given,
+    receives encoding, file_size, truncated and the running bytes_read.
+    """
+    with open(file_path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        limit = min(file_size, request.max_bytes or file_size)
+        sample = f.read(min(limit, TXT_ENCODING_SAMPLE_BYTES))
+        encoding = detect_text_encoding(sample) if sample else None
+        if stats is not None:
+            stats.update(encoding=encoding, file_size=file_size, bytes_read=0, truncated=limit < file_size)
+        if not sample:
+            return
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        f.seek(0)
+        bytes_read = 0
+        pending_cr = ""
+        while bytes_read < limit:
+            data = f.read(min(TXT_CHUNK_BYTES, limit - bytes_read))
+            if not data:  # The file shrank while being read
+                break
+            bytes_read += len(data)
+            text = pending_cr + decoder.decode(data, final=bytes_read >= limit)
+            # A "\r\n" may straddle two chunks
+            pending_cr = "\r" if text.endswith("\r") and bytes_read < limit else ""
+            if pending_cr:
+                text = text[:-1]
+            if stats is not None:
+                stats["bytes_read"] = bytes_read
+            if text:
+                yield text.replace("\r\n", "\n").replace("\r", "\n")
+
+def extract_text_from_document(file_path: str,
+                               request: Optional[DocumentExtractionRequest] = None) -> DocumentExtractionResult:
     """
     Extracts plain text from a document file.
     Currently supports PDF, DOCX, TXT, and RTF files.
     """
-    import time
     start_time = time.time()
-    
+    request = request or DocumentExtractionRequest(file_path=file_path)
+
     try:
         file_extension = file_path.lower().split('.')[-1]
         extracted_text = ""
-        
+        pages = None
+        metadata = {}
+
         if file_extension == 'txt':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                extracted_text = f.read()
-        
+            extracted_text = "".join(iter_text_chunks(file_path, request, metadata))
+
         elif file_extension == 'pdf':
-            # TODO: Implement PDF text extraction
-            raise NotImplementedError("PDF text extraction not yet implemented")
-            
+            pages, metadata = _extract_pdf(file_path, request)
+            extracted_text = "\n\n".join(page.text.strip() for page in pages if page.text.strip())
+
         elif file_extension == 'docx':
-            # TODO: Implement DOCX text extraction
-            raise NotImplementedError("DOCX text extraction not yet implemented")
-            
+            extracted_text, metadata = _extract_docx(file_path, request)
+
         elif file_extension == 'rtf':
-            # TODO: Implement RTF text extraction
-            raise NotImplementedError("RTF text extraction not yet implemented")
-            
+            extracted_text = _extract_rtf(file_path)
+
         else:
             raise ValueError(f"Unsupported file format: {file_extension}")
-        
+
         processing_time = time.time() - start_time
-        
+
         return DocumentExtractionResult(
             text=extracted_text,
             file_path=file_path,
             file_type=file_extension,
             processing_time=processing_time,
-            success=True
+            success=True,
+            metadata=metadata,
+            pages=pages
         )
-        
+
     except Exception as e:
         logger.error(f"Document extraction failed for {file_path}: {e}")
         return DocumentExtractionResult(
@@ -0,0 +1,81 @@
+"""
+Engine input adapter that hands decoded images to OneOCR with as few buffer copies as possible.
+
+OneOCR consumes contiguous 8-bit BGRA. `recognize_cv2` accepts an ndarray and passes
+a BGRA buffer straight to the engine by pointer, whereas `recognize_pil` converts,
+splits, merges and serializes the image several times. Every copy made on the way
+in is counted per thread so callers can report it per request.
+"""
+import logging
+import threading
+from typing import Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from utils.performance import update_performance_metrics
+
+logger = logging.getLogger(__name__)
+
+_copy_stats = threading.local()
+
+def reset_copy_counter():
+    """Reset the copy counter for the current thread (call once per request)."""
+    _copy_stats.count = 0
+
+def get_copy_count() -> int:
+    """Number of image buffer copies made for the engine on this thread since the last reset."""
+    return getattr(_copy_stats, 'count', 0)
+
+def _record_copy(count: int = 1):
+    _copy_stats.count = get_copy_count() + count
+    update_performance_metrics("engine_input_copies", count)
+
+def _to_pil_image(image: np.ndarray) -> Image.Image:
+    """Wrap an ndarray as a PIL image, sharing the buffer where PIL allows it."""
+    height, width = image.shape[:2]
+    if image.ndim == 2:
+        if image.flags['C_CONTIGUOUS']:
+            # Mode 'L' with matching rawmode shares the numpy buffer
+            return Image.frombuffer('L', (width, height), image, 'raw', 'L', 0, 1)
+        _record_copy()
+        return Image.fromarray(image)
+    if not image.flags['C_CONTIGUOUS']:
+        image = np.ascontiguousarray(image)
+        _record_copy()
+    # PIL only shares the buffer when the raw mode equals the image mode, and it
+    # has no BGR(A) modes, so colour input is decoded into a new RGB(A) image.
+    # That is still one copy instead of cvtColor + fromarray.
+    _record_copy()
+    if image.shape[2] == 4:
+        return Image.frombuffer('RGBA', (width, height), image, 'raw', 'BGRA', 0, 1)
+    return Image.frombuffer('RGB', (width, height), image, 'raw', 'BGR', 0, 1)
+
+def recognize_image(ocr_instance, image: Union[str, np.ndarray]) -> dict:
+    """
+    Run OCR on a file path or a decoded image (grayscale, BGR or BGRA uint8 ndarray).
+    Uses the engine's ndarray entry point when available, falling back to PIL.
+    """
+    if isinstance(image, str):
+        decoded = cv2.imread(image, cv2.IMREAD_COLOR)
+        if decoded is None:
+            raise ValueError(f"Could not read image: {image}")
+        image = decoded
+
+    if image.dtype != np.uint8:
+        image = cv2.convertScaleAbs(image)
+        _record_copy()
+
+    if not hasattr(ocr_instance, 'recognize_cv2'):
+        return ocr_instance.recognize_pil(_to_pil_image(image))
+
+    if image.ndim == 3 and image.shape[2] == 4:
+        # Already in engine layout; the engine reads the buffer by pointer
+        if not image.flags['C_CONTIGUOUS']:
+            image = np.ascontiguousarray(image)
+            _record_copy()
+    else:
+        # The engine converts grayscale/BGR to a fresh contiguous BGRA buffer
+        _record_copy()
+    return ocr_instance.recognize_cv2(image)
@@ -5,11 +5,15 @@ Includes deskewing, upscaling, and other enhancement techniques with minimal mem
 import cv2
 import numpy as np
 import logging
-from typing import Tuple
+from typing import List, Sequence, Tuple, Union
 from functools import lru_cache
 
 from models import PreprocessingOptions
-from config import MIN_IMAGE_WIDTH_FOR_OCR
+from config import (
+    MIN_IMAGE_WIDTH_FOR_OCR, DENOISE_MIN_NOISE_SIGMA,
+    DENOISE_HEAVY_NOISE_SIGMA, DENOISE_NLM_MAX_DIMENSION,
+    DESKEW_PROXY_WIDTH, DESKEW_SEARCH_RANGE, DESKEW_MAX_SAMPLE_POINTS
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,41 +28,161 @@ def _get_morphology_kernel(size: int = 1):
     """Cached morphology kernel to avoid recreation."""
     return np.ones((size, size), np.uint8)
 
-def deskew_image(image: np.ndarray) -> np.ndarray:
-    """Memory-optimized skew detection and correction for OCR accuracy."""
+# Laplacian-difference kernel for Immerkaer's fast noise variance estimate
+_NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+
+DENOISE_METHODS = ("auto", "bilateral", "median", "gaussian", "nlm_downscaled", "nlm")
+
+def estimate_noise_sigma(gray: np.ndarray) -> float:
+    """
+    Estimate the standard deviation of additive noise (0-255 scale).
+    Uses Immerkaer's method: a single 3x3 convolution that cancels image
+    structure, so it is cheap enough to run on every request.
+    """
+    height, width = gray.shape[:2]
+    if height < 3 or width < 3:
+        return 0.0
+    response = cv2.filter2D(gray.astype(np.float32), -1, _NOISE_KERNEL, borderType=cv2.BORDER_REFLECT)
+    total = float(np.abs(response[1:-1, 1:-1]).sum())
+    return total * np.sqrt(0.5 * np.pi) / (6.0 * (width - 2) * (height - 2))
+
+def _nlm_denoise(gray: np.ndarray, h: float) -> np.ndarray:
+    """Non-local means with parameters matching the original pipeline."""
+    return cv2.fastNlMeansDenoising(gray, None, h=h, templateWindowSize=7, searchWindowSize=15)
+
+def denoise_image(gray: np.ndarray, method: str = "auto", strength: float = 8.0) -> np.ndarray:
+    """
+    Denoise a grayscale image with the selected backend.
+    `strength` is the (estimated) noise sigma and scales each filter's parameters.
+    """
+    if method not in DENOISE_METHODS:
+        logger.warning(f"Unknown denoise method '{method}', falling back to 'auto'")
+        method = "auto"
+    if method == "auto":
+        method = "nlm_downscaled" if strength >= DENOISE_HEAVY_NOISE_SIGMA else "bilateral"
+
+    if method == "median":
+        return cv2.medianBlur(gray, 3 if strength < 20 else 5)
+
+    if method == "gaussian":
+        sigma = float(np.clip(strength / 10.0, 0.5, 2.0))
+        return cv2.GaussianBlur(gray, (0, 0), sigma)
+
+    if method == "bilateral":
+        sigma_color = float(np.clip(strength * 2.5, 10.0, 75.0))
+        return cv2.bilateralFilter(gray, 5, sigma_color, 5)
+
+    h = float(np.clip(strength, 3.0, 20.0))
+    if method == "nlm":
+        return _nlm_denoise(gray, h)
+
+    # nlm_downscaled: run NLM on a bounded proxy and scale the result back up
+    height, width = gray.shape[:2]
+    scale = DENOISE_NLM_MAX_DIMENSION / max(height, width)
+    if scale >= 1.0:
+        return _nlm_denoise(gray, h)
+    small = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    # Downscaling averages out part of the noise, so soften h accordingly
+    small = _nlm_denoise(small, max(3.0, h * scale ** 0.5))
+    return cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+
+def _to_deskew_proxy(image: np.ndarray, interpolation: int = cv2.INTER_AREA) -> np.ndarray:
+    """Grayscale copy of the image no wider than DESKEW_PROXY_WIDTH for angle estimation."""
     # Work with grayscale to reduce memory usage
     if len(image.shape) > 2:
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     else:
         gray = image
-    
-    # Use more efficient approach for angle detection
+
     # Reduce image size for angle calculation to speed up processing
     height, width = gray.shape
-    if width > 1000:  # Only downsample large images
-        scale_factor = 1000 / width
-        small_width = 1000
-        small_height = int(height * scale_factor)
-        small_gray = cv2.resize(gray, (small_width, small_height), interpolation=cv2.INTER_AREA)
-    else:
-        small_gray = gray
-    
-    # Fast skew detection using edges
+    if width > DESKEW_PROXY_WIDTH:  # Only downsample large images
+        scale_factor = DESKEW_PROXY_WIDTH / width
+        small_height = max(1, int(height * scale_factor))
+        return cv2.resize(gray, (DESKEW_PROXY_WIDTH, small_height), interpolation=interpolation)
+    return gray
+
+def _estimate_skew_hough(small_gray: np.ndarray) -> float:
+    """Skew angle from near-horizontal Hough lines over Canny edges."""
     edges = cv2.Canny(small_gray, 50, 150, apertureSize=3)
     lines = cv2.HoughLines(edges, 1, np.pi/180, threshold=100, min_theta=np.pi/180*85, max_theta=np.pi/180*95)
-    
+
     if lines is not None and len(lines) > 0:
         angles = []
         for line in lines[:10]:  # Limit to first 10 lines for speed
             _, theta = line[0]  # rho not needed
             angle = (theta - np.pi/2) * 180 / np.pi
             angles.append(angle)
-        
+
         # Use median angle for robustness
-        angle = np.median(angles) if angles else 0
-    else:
-        angle = 0
-        
+        return float(np.median(angles)) if angles else 0.0
+    return 0.0
+
+def _projection_score(xs: np.ndarray, ys: np.ndarray, angle: float, bins: int) -> float:
+    """Sharpness of the horizontal projection profile after rotating points by `angle` degrees."""
+    rad = np.deg2rad(angle)
+    # Row coordinate of each foreground pixel once the page is rotated by `angle`
+    rows = (ys * np.cos(rad) + xs * np.sin(rad)).astype(np.int32)
+    rows -= rows.min()
+    profile = np.bincount(rows, minlength=bins).astype(np.float64)
+    # Aligned text lines give tall, narrow peaks: maximize squared row-to-row differences
+    return float(np.square(np.diff(profile)).sum())
+
+def _estimate_skew_projection(small_gray: np.ndarray) -> float:
+    """
+    Skew angle from projection-profile sharpness on the binarized proxy.
+    Foreground pixel coordinates are rotated analytically (no image warps), with a
+    coarse search over +/-DESKEW_SEARCH_RANGE followed by a 0.1 degree refinement.
+    """
+    _, binary = cv2.threshold(small_gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    points = cv2.findNonZero(binary)
+    if points is None or len(points) < 50:
+        return 0.0
+    xs, ys = points.reshape(-1, 2).T
+
+    # Bound the work on dense pages. Random (seeded) sampling rather than a fixed
+    # stride, which aliases with the row-major pixel order and fakes sharp profiles.
+    if len(xs) > DESKEW_MAX_SAMPLE_POINTS:
+        keep = np.random.default_rng(0).integers(0, len(xs), DESKEW_MAX_SAMPLE_POINTS)
+        xs, ys = xs[keep], ys[keep]
+    xs = xs.astype(np.float32) - small_gray.shape[1] / 2
+    ys = ys.astype(np.float32) - small_gray.shape[0] / 2
+    bins = int(np.hypot(*small_gray.shape)) + 2
+
+    def best_angle(candidates: np.ndarray) -> Tuple[float, float]:
+        scores = [_projection_score(xs, ys, a, bins) for a in candidates]
+        idx = int(np.argmax(scores))
+        return float(candidates[idx]), scores[idx]
+
+    coarse, _ = best_angle(np.arange(-DESKEW_SEARCH_RANGE, DESKEW_SEARCH_RANGE + 0.5, 1.0))
+    skew, score = best_angle(np.arange(coarse - 0.5, coarse + 0.55, 0.1))
+
+    # Reject flat profiles (no line structure): not measurably better than no rotation
+    if score <= _projection_score(xs, ys, 0.0, bins) * 1.02:
+        return 0.0
+    # The text is skewed by `skew`; rotating the opposite way straightens it
+    return -skew
+
+_SKEW_ESTIMATORS = {
+    "hough": _estimate_skew_hough,
+    "projection": _estimate_skew_projection,
+}
+
+def estimate_skew_angle(image: np.ndarray, method: str = "projection") -> float:
+    """Estimate the rotation (degrees, counter-clockwise) that straightens the text."""
+    estimator = _SKEW_ESTIMATORS.get(method)
+    if estimator is None:
+        logger.warning(f"Unknown deskew method '{method}', falling back to 'projection'")
+        estimator = _estimate_skew_projection
+    # Projection profiles only need foreground positions, so the proxy can skip
+    # INTER_AREA's (slow, non-integer factor) antialiasing; Hough edges cannot
+    interpolation = cv2.INTER_LINEAR if estimator is _estimate_skew_projection else cv2.INTER_AREA
+    return estimator(_to_deskew_proxy(image, interpolation))
+
+def deskew_image(image: np.ndarray, method: str = "projection") -> np.ndarray:
+    """Memory-optimized skew detection and correction for OCR accuracy."""
+    angle = estimate_skew_angle(image, method)
+
     # Skip rotation for negligible angles
     if abs(angle) < 0.2:
         return image
@@ -72,7 +196,7 @@ def deskew_image(image: np.ndarray) -> np.ndarray:
     rotated_image = cv2.warpAffine(image, rotation_matrix, (w, h),
                                    flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
     
-    logger.debug(f"Deskewed image with angle: {angle:.2f} degrees")
+    logger.debug(f"Deskewed image with angle: {angle:.2f} degrees ({method})")
     return rotated_image
 
 def upscale_if_needed(image: np.ndarray) -> Tuple[np.ndarray, bool]:
@@ -87,6 +211,20 @@ def upscale_if_needed(image: np.ndarray) -> Tuple[np.ndarray, bool]:
         return upscaled_image, True
     return image, False
 
+def _quality_flags(width: int, height: int, laplacian_var: float, contrast: float,
+                   noise_level: float, noise_sigma: float) -> dict:
+    """Turn raw quality measurements into the flags that drive preprocessing."""
+    return {
+        'width': width,
+        'height': height,
+        'is_low_res': width < MIN_IMAGE_WIDTH_FOR_OCR,
+        'is_low_contrast': contrast < 30,
+        'is_blurry': laplacian_var < 100,
+        'is_noisy': noise_level > 50,  # High gradient variance indicates noise
+        'noise_sigma': noise_sigma,
+        'needs_denoise': noise_sigma >= DENOISE_MIN_NOISE_SIGMA
+    }
+
 def _analyze_image_quality(img: np.ndarray) -> dict:
     """Optimized analysis of image quality for OneOCR preprocessing."""
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) > 2 else img
@@ -100,15 +238,201 @@ def _analyze_image_quality(img: np.ndarray) -> dict:
     grad_x = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
     grad_y = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
     noise_level = np.mean(np.sqrt(grad_x**2 + grad_y**2))
+    noise_sigma = estimate_noise_sigma(gray)
 
-    return {
-        'width': width,
-        'height': height,
-        'is_low_res': width < MIN_IMAGE_WIDTH_FOR_OCR,
-        'is_low_contrast': contrast < 30,
-        'is_blurry': laplacian_var < 100,
-        'is_noisy': noise_level > 50  # High gradient variance indicates noise
-    }
+    return _quality_flags(width, height, laplacian_var, contrast, noise_level, noise_sigma)
+
+def _analyze_batch_quality(gray_stack: np.ndarray) -> List[dict]:
+    """
+    Quality analysis for a (N, H, W) grayscale stack.
+    The 3x3 filters run once over the frames stacked vertically; rows that touch a
+    frame seam are excluded so each frame's statistics stay independent.
+    """
+    n, height, width = gray_stack.shape
+    tall = gray_stack.reshape(n * height, width)
+
+    laplacian = cv2.Laplacian(tall, cv2.CV_32F).reshape(n, height, width)[:, 1:-1]
+    laplacian_var = laplacian.var(axis=(1, 2))
+    contrast = gray_stack.reshape(n, -1).std(axis=1, dtype=np.float32)
+
+    grad_x = cv2.Sobel(tall, cv2.CV_32F, 1, 0, ksize=3)
+    grad_y = cv2.Sobel(tall, cv2.CV_32F, 0, 1, ksize=3)
+    noise_level = cv2.magnitude(grad_x, grad_y).reshape(n, height, width)[:, 1:-1].mean(axis=(1, 2))
+
+    response = cv2.filter2D(tall, cv2.CV_32F, _NOISE_KERNEL, borderType=cv2.BORDER_REFLECT)
+    response = np.abs(response.reshape(n, height, width)[:, 1:-1, 1:-1]).sum(axis=(1, 2), dtype=np.float64)
+    noise_sigma = response * np.sqrt(0.5 * np.pi) / (6.0 * max(width - 2, 1) * max(height - 2, 1))
+
+    return [
+        _quality_flags(width, height, float(laplacian_var[i]), float(contrast[i]),
+                       float(noise_level[i]), float(noise_sigma[i]))
+        for i in range(n)
+    ]
+
+def _needs_processing(options: PreprocessingOptions, quality_metrics: dict) -> bool:
+    """Whether any enabled preprocessing step applies to an image with these metrics."""
+    return any([
+        options.upscale and quality_metrics['is_low_res'],
+        options.deskew,
+        _should_denoise(options, quality_metrics),
+        options.enhance_contrast and quality_metrics['is_low_contrast'],
+        options.threshold_method != "none",
+        options.apply_morphology
+    ])
+
+def _should_denoise(options: PreprocessingOptions, quality_metrics: dict) -> bool:
+    # Denoise on measured noise (or an explicit strength), not on blur
+    return options.denoise and (
+        options.denoise_strength is not None or quality_metrics['needs_denoise']
+    )
+
+def _enhance_gray(gray: np.ndarray, options: PreprocessingOptions, quality_metrics: dict) -> np.ndarray:
+    """Upscale, deskew, denoise and contrast steps on a grayscale image."""
+    # 1. Upscale first if needed (affects all subsequent operations)
+    if options.upscale and quality_metrics['is_low_res']:
+        gray, _ = upscale_if_needed(gray)
+        logger.debug(f"Upscaled low-res image from {quality_metrics['width']}px width")
+
+    # 2. Deskew if requested (do early to improve other operations)
+    if options.deskew:
+        gray = deskew_image(gray, options.deskew_method)
+
+    # 3. Apply denoising only if the image is measurably noisy
+    if _should_denoise(options, quality_metrics):
+        strength = options.denoise_strength
+        if strength is None:
+            strength = quality_metrics['noise_sigma']
+        gray = denoise_image(gray, options.denoise_method, strength)
+        logger.debug(f"Applied {options.denoise_method} denoising (strength {strength:.1f})")
+
+    # 4. Enhance contrast only if needed
+    if options.enhance_contrast and quality_metrics['is_low_contrast']:
+        clahe = _get_clahe_processor(clip_limit=2.0, tile_grid_size=8)
+        gray = clahe.apply(gray)
+        logger.debug("Enhanced contrast on low-contrast image")
+
+    return gray
+
+def _apply_morphology(gray: np.ndarray, options: PreprocessingOptions, quality_metrics: dict) -> np.ndarray:
+    # Minimal morphology operations (OneOCR handles most noise well)
+    if options.apply_morphology and quality_metrics['is_noisy']:
+        kernel = _get_morphology_kernel(1)
+        gray = cv2.morphologyEx(gray, cv2.MORPH_CLOSE, kernel)
+    return gray
+
+def preprocess_image_array(img: np.ndarray, options: PreprocessingOptions) -> np.ndarray:
+    """
+    Run the preprocessing pipeline on an already decoded BGR image.
+    Returns the input unchanged when no step applies.
+    """
+    # Quick quality analysis for smart preprocessing
+    quality_metrics = _analyze_image_quality(img)
+
+    # If no preprocessing needed, return original
+    if not _needs_processing(options, quality_metrics):
+        logger.debug("Image quality is good, skipping preprocessing")
+        return img
+
+    # Convert to grayscale once up front so every later step works on one channel.
+    # OneOCR works well with grayscale, no need to convert back to BGR.
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) > 2 else img
+    gray = _enhance_gray(gray, options, quality_metrics)
+
+    # Apply optimized thresholding
+    if options.threshold_method == "adaptive_gaussian":
+        gray = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+    elif options.threshold_method == "otsu":
+        _, gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    gray = _apply_morphology(gray, options, quality_metrics)
+
+    logger.debug(f"Preprocessing completed with smart optimizations")
+    return gray
+
+def _line_centers(profile: np.ndarray) -> np.ndarray:
+    """Centers of the runs of non-zero entries in a 1-D mask profile."""
+    flips = np.diff(np.concatenate(([0], (profile > 0).astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(flips == 1), np.flatnonzero(flips == -1)
+    return (starts + ends - 1) // 2
+
+def detect_ruling_lines(image: np.ndarray, min_length: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find table ruling lines with a morphological opening by horizontal and
+    vertical kernels `min_length` pixels long on the inverted binarized image.
+    Returns the y positions of horizontal lines and the x positions of vertical
+    lines, in image coordinates.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) > 2 else image
+    ink = cv2.adaptiveThreshold(cv2.bitwise_not(gray), 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 15, -2)
+
+    min_length = max(int(min_length), 10)
+    h_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (min_length, 1))
+    v_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, min_length))
+    horizontal = cv2.morphologyEx(ink, cv2.MORPH_OPEN, h_kernel)
+    vertical = cv2.morphologyEx(ink, cv2.MORPH_OPEN, v_kernel)
+
+    # Rows / columns holding any surviving line pixel, merged into one position per line
+    return _line_centers(horizontal.max(axis=1)), _line_centers(vertical.max(axis=0))
+
+def _otsu_thresholds(gray_stack: np.ndarray) -> np.ndarray:
+    """Otsu threshold for every frame of a (N, H, W) stack, solved on all histograms at once."""
+    hists = np.stack([cv2.calcHist([frame], [0], None, [256], [0, 256]).ravel() for frame in gray_stack])
+    levels = np.arange(256, dtype=np.float64)
+    prob = hists / hists.sum(axis=1, keepdims=True)
+    omega = np.cumsum(prob, axis=1)
+    mu = np.cumsum(prob * levels, axis=1)
+    mu_total = mu[:, -1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = (mu_total * omega - mu) ** 2 / (omega * (1.0 - omega))
+    return np.nan_to_num(between, nan=-1.0, posinf=-1.0).argmax(axis=1)
+
+def preprocess_image_batch(images: Union[np.ndarray, Sequence[np.ndarray]],
+                           options: PreprocessingOptions) -> List[np.ndarray]:
+    """
+    Preprocess a stack of same-sized images with shape (N, H, W[, C]).
+
+    Grayscale conversion, quality analysis and Otsu thresholding run across the
+    whole stack; deskew, denoise and CLAHE depend on each frame and stay per frame.
+    Frames that need no processing are returned unchanged, exactly as
+    preprocess_image_array would. Mixed-size sequences fall back to per-image calls.
+    """
+    if not isinstance(images, np.ndarray):
+        if not images:
+            return []
+        if len({img.shape for img in images}) != 1:
+            return [preprocess_image_array(img, options) for img in images]
+        images = np.stack(images)
+
+    if images.ndim == 4:
+        n, height, width, channels = images.shape
+        code = cv2.COLOR_BGRA2GRAY if channels == 4 else cv2.COLOR_BGR2GRAY
+        tall = np.ascontiguousarray(images).reshape(n * height, width, channels)
+        gray_stack = cv2.cvtColor(tall, code).reshape(n, height, width)
+    elif images.ndim == 3:
+        gray_stack = np.ascontiguousarray(images)
+    else:
+        raise ValueError(f"Expected an (N, H, W[, C]) stack, got shape {images.shape}")
+
+    quality = _analyze_batch_quality(gray_stack)
+    results: List[np.ndarray] = list(images)
+    selected = [i for i, q in enumerate(quality) if _needs_processing(options, q)]
+    if not selected:
+        return results
+
+    # Upscale and deskew preserve a common frame size, so the enhanced frames form one stack
+    enhanced = np.stack([_enhance_gray(gray_stack[i], options, quality[i]) for i in selected])
+
+    if options.threshold_method == "otsu":
+        thresholds = _otsu_thresholds(enhanced)
+        enhanced = np.where(enhanced > thresholds[:, None, None], np.uint8(255), np.uint8(0))
+    elif options.threshold_method == "adaptive_gaussian":
+        for frame in enhanced:
+            cv2.adaptiveThreshold(frame, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2, dst=frame)
+
+    for k, i in enumerate(selected):
+        results[i] = _apply_morphology(enhanced[k], options, quality[i])
+    logger.debug(f"Batch-preprocessed {len(selected)}/{len(results)} frames of size {gray_stack.shape[1:]}")
+    return results
 
 def enhanced_preprocess_image(image_path: str, options: PreprocessingOptions) -> np.ndarray:
     """
@@ -121,67 +445,7 @@ def enhanced_preprocess_image(image_path: str, options: PreprocessingOptions) ->
         if img is None:
             raise ValueError(f"Could not read image: {image_path}")
 
-        # Quick quality analysis for smart preprocessing
-        quality_metrics = _analyze_image_quality(img)
-        
-        # If no preprocessing needed, return original
-        needs_processing = any([
-            options.upscale and quality_metrics['is_low_res'],
-            options.deskew,
-            options.denoise and quality_metrics['is_blurry'],
-            options.enhance_contrast and quality_metrics['is_low_contrast'],
-            options.threshold_method != "none",
-            options.apply_morphology
-        ])
-        
-        if not needs_processing:
-            logger.debug("Image quality is good, skipping preprocessing")
-            return img
-
-        # Work in-place to minimize memory usage
-        current_img = img
-        
-        # 1. Upscale first if needed (affects all subsequent operations)
-        if options.upscale and quality_metrics['is_low_res']:
-            current_img, _ = upscale_if_needed(current_img)
-            logger.debug(f"Upscaled low-res image from {quality_metrics['width']}px width")
-
-        # 2. Deskew if requested (do early to improve other operations)
-        if options.deskew:
-            current_img = deskew_image(current_img)
-
-        # 3. Convert to grayscale once for all grayscale operations
-        gray = cv2.cvtColor(current_img, cv2.COLOR_BGR2GRAY)
-        
-        # 4. Apply denoising only if image appears blurry
-        if options.denoise and quality_metrics['is_blurry']:
-            # Use faster denoising for better performance
-            gray = cv2.fastNlMeansDenoising(gray, None, h=8, templateWindowSize=7, searchWindowSize=15)
-            logger.debug("Applied denoising to blurry image")
-
-        # 5. Enhance contrast only if needed
-        if options.enhance_contrast and quality_metrics['is_low_contrast']:
-            clahe = _get_clahe_processor(clip_limit=2.0, tile_grid_size=8)
-            gray = clahe.apply(gray)
-            logger.debug("Enhanced contrast on low-contrast image")
-
-        # 6. Apply optimized thresholding
-        if options.threshold_method == "adaptive_gaussian":
-            gray = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-        elif options.threshold_method == "otsu":
-            _, gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-
-        # 7. Apply minimal morphology operations (OneOCR handles most noise well)
-        if options.apply_morphology and quality_metrics['is_noisy']:
-            kernel = _get_morphology_kernel(1)
-            gray = cv2.morphologyEx(gray, cv2.MORPH_CLOSE, kernel)
-
-        # 8. OneOCR works well with grayscale, no need to convert back to BGR
-        # Return grayscale for better memory efficiency
-        result_img = gray
-            
-        logger.debug(f"Preprocessing completed with smart optimizations")
-        return result_img
+        return preprocess_image_array(img, options)
         
     except Exception as e:
         logger.error(f"Image preprocessing failed for {image_path}: {e}")
@@ -0,0 +1,146 @@
+"""
+Background jobs for long-running OCR work (videos, large batches).
+
+Jobs live in an in-memory store: submitting one returns its id at once, the work
+runs as an asyncio task whose blocking parts go to the shared worker pool, and
+the job's progress and partial results can be read while it runs. At most
+MAX_CONCURRENT_JOBS run at a time and the rest wait queued. Once a job
+completes, its result replaces the partial results. Finished jobs are kept for
+JOB_RETENTION_SECONDS, and at most MAX_RETAINED_JOBS of them.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from models import JobProgress, JobStatus
+from config import MAX_CONCURRENT_REQUESTS, MAX_CONCURRENT_JOBS, MAX_RETAINED_JOBS, JOB_RETENTION_SECONDS
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+# Shared pool for blocking OCR work that must stay off the event loop
+worker_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="ocr-worker")
+
+@dataclass
+class Job:
+    """
+    One background job. The work updates `progress` and `partial_results` as it
+    goes (from a worker thread for video jobs; plain attribute writes only) and
+    polls `cancel_event` where it cannot be interrupted.
+    """
+    id: str
+    job_type: str
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Dict[str, Any] = field(default_factory=dict)
+    partial_results: List[Any] = field(default_factory=list)
+    result: Any = None
+    error_message: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_status(self, include_results: bool = True) -> JobStatus:
+        """Materialize the response model (no re-validation)."""
+        return JobStatus.model_construct(
+            job_id=self.id, job_type=self.job_type, status=self.status,
+            created_at=self.created_at, started_at=self.started_at, finished_at=self.finished_at,
+            progress=JobProgress.model_construct(**{**JobProgress().model_dump(), **self.progress}),
+            partial_results=list(self.partial_results) if include_results else [],
+            result=self.result if include_results else None,
+            error_message=self.error_message,
+        )
+
+class JobStore:
+    """In-memory job registry; jobs are kept in creation order."""
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_JOBS, max_retained: int = MAX_RETAINED_JOBS,
+                 retention_seconds: float = JOB_RETENTION_SECONDS):
+        self._jobs: Dict[str, Job] = {}
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._max_retained = max_retained
+        self._retention_seconds = retention_seconds
+
+    def submit(self, job_type: str, work: Callable[[Job], Awaitable[Any]]) -> Job:
+        """
+        Register a job and schedule `work(job)` on the running event loop. Its
+        return value becomes the job's result.
+        """
+        self.prune()
+        job = Job(id=uuid.uuid4().hex, job_type=job_type)
+        self._jobs[job.id] = job
+        job.task = asyncio.ensure_future(self._run(job, work))
+        return job
+
+    async def _run(self, job: Job, work: Callable[[Job], Awaitable[Any]]) -> None:
+        try:
+            async with self._slots:
+                job.status = "running"
+                job.started_at = time.time()
+                job.result = await work(job)
+            if job.cancel_event.is_set():
+                job.status = "cancelled"
+            else:
+                job.partial_results = []  # Superseded by the result
+                job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.job_type}) failed: {e}", exc_info=True)
+            job.status = "failed"
+            job.error_message = str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self.prune()
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        self.prune()
+        return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Request cancellation. Queued jobs and awaiting work stop at once; work in a
+        worker thread stops at its next cancel_event check.
+        """
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel_event.set()
+            if job.task is not None:
+                job.task.cancel()
+        return job
+
+    def prune(self) -> None:
+        """Drop finished jobs past the retention time, then the oldest beyond the retention count."""
+        cutoff = time.time() - self._retention_seconds
+        finished = [job for job in self._jobs.values() if job.finished]
+        retained = [job for job in finished if job.finished_at is None or job.finished_at >= cutoff]
+        expired = [job for job in finished if job.finished_at is not None and job.finished_at < cutoff]
+        expired.extend(retained[:max(0, len(retained) - self._max_retained)])
+        for job in expired:
+            del self._jobs[job.id]
+
+    async def shutdown(self) -> None:
+        """Cancel unfinished jobs and wait for their tasks to wind down."""
+        tasks = []
+        for job in self._jobs.values():
+            if not job.finished and job.task is not None:
+                job.cancel_event.set()
+                job.task.cancel()
+                tasks.append(job.task)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+job_store = JobStore()
@@ -0,0 +1,344 @@
+"""
+Compact struct-of-arrays representation of OCR output.
+
+Words and lines are kept as NumPy columns (boxes, polygons, confidences) plus a
+list of strings, so extraction, post-processing and caching never build one
+Pydantic object per word. Models are only materialized at the response boundary
+with `model_construct`, since the columns are already validated by construction.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+import logging
+
+import numpy as np
+
+from models import BoundingBox, WordDetail, TextLine, OCRResult
+from config import MIN_OCR_CONFIDENCE
+
+logger = logging.getLogger(__name__)
+
+_CORNER_KEYS = ('x1', 'y1', 'x2', 'y2', 'x3', 'y3', 'x4', 'y4')
+
+# Response detail levels, each including everything of the ones before it
+DETAIL_LEVELS = ("text", "lines", "words", "full")
+DEFAULT_DETAIL_LEVEL = "words"
+# OCRResult structures built per detail level; all other fields are cheap scalars
+_STRUCTURE_FIELDS = ("text_lines", "tables", "word_details", "layout")
+_LEVEL_STRUCTURES = {
+    "text": set(),
+    "lines": {"text_lines", "tables"},
+    "words": {"text_lines", "tables", "word_details"},
+    "full": {"text_lines", "tables", "word_details", "layout"},
+}
+
+def resolve_detail_level(detail_level: Optional[str]) -> str:
+    if detail_level in DETAIL_LEVELS:
+        return detail_level
+    if detail_level:
+        logger.warning(f"Unknown detail level '{detail_level}', using '{DEFAULT_DETAIL_LEVEL}'")
+    return DEFAULT_DETAIL_LEVEL
+
+def response_exclude(detail_level: Optional[str] = DEFAULT_DETAIL_LEVEL,
+                     fields: Optional[List[str]] = None) -> Set[str]:
+    """
+    OCRResult fields left out of a response: structures above the detail level
+    and, when `fields` is given, every field not listed. Unknown names are
+    ignored; success and error_message are always kept so failures stay visible.
+    """
+    excluded = set(_STRUCTURE_FIELDS) - _LEVEL_STRUCTURES[resolve_detail_level(detail_level)]
+    if fields:
+        unknown = set(fields) - set(OCRResult.model_fields)
+        if unknown:
+            logger.warning(f"Ignoring unknown result fields: {sorted(unknown)}")
+        excluded |= set(OCRResult.model_fields) - set(fields) - {"success", "error_message"}
+    return excluded
+
+class Box(NamedTuple):
+    """Lightweight axis-aligned box, attribute-compatible with BoundingBox."""
+    x: int
+    y: int
+    width: int
+    height: int
+
+@dataclass
+class WordColumns:
+    """Recognized words as parallel columns."""
+    text: List[str]
+    confidence: np.ndarray  # (n,) float64
+    boxes: np.ndarray       # (n, 4) int32: x, y, width, height
+    polygons: np.ndarray    # (n, 4, 2) int32
+    line_ids: np.ndarray    # (n,) int32 index into LineColumns, -1 when the line was dropped
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    @classmethod
+    def empty(cls) -> "WordColumns":
+        return cls([], np.zeros(0, np.float64), np.zeros((0, 4), np.int32),
+                   np.zeros((0, 4, 2), np.int32), np.zeros(0, np.int32))
+
+    def box(self, i: int) -> Box:
+        return Box(*(int(v) for v in self.boxes[i]))
+
+    def take(self, indices) -> "WordColumns":
+        """Subset of the words, in the order given by `indices`."""
+        indices = np.asarray(indices, dtype=np.intp)
+        return WordColumns(
+            text=[self.text[i] for i in indices],
+            confidence=self.confidence[indices],
+            boxes=self.boxes[indices],
+            polygons=self.polygons[indices],
+            line_ids=self.line_ids[indices],
+        )
+
+    def to_models(self) -> List[WordDetail]:
+        """Materialize WordDetail models (no re-validation)."""
+        boxes = self.boxes.tolist()
+        polygons = self.polygons.tolist()
+        confidences = self.confidence.tolist()
+        return [
+            WordDetail.model_construct(
+                text=text, confidence=conf,
+                bbox=BoundingBox.model_construct(x=b[0], y=b[1], width=b[2], height=b[3]),
+                polygon=poly
+            )
+            for text, conf, b, poly in zip(self.text, confidences, boxes, polygons)
+        ]
+
+    def to_packed(self) -> Dict[str, Any]:
+        """
+        Columns as packed little-endian buffers for binary formats: confidence
+        float64 (n,), bbox int32 (n, 4) as x, y, width, height, polygon int32 (n, 4, 2).
+        """
+        return {
+            "text": self.text,
+            "confidence": self.confidence.astype("<f8").tobytes(),
+            "bbox": self.boxes.astype("<i4").tobytes(),
+            "polygon": self.polygons.astype("<i4").tobytes(),
+        }
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """WordDetail-shaped plain dicts, for direct JSON serialization."""
+        return [
+            {"text": text, "confidence": conf,
+             "bbox": {"x": b[0], "y": b[1], "width": b[2], "height": b[3]}, "polygon": poly}
+            for text, conf, b, poly in zip(self.text, self.confidence.tolist(),
+                                           self.boxes.tolist(), self.polygons.tolist())
+        ]
+
+@dataclass
+class LineColumns:
+    """Recognized text lines as parallel columns."""
+    text: List[str]
+    confidence: np.ndarray  # (n,) float64
+    boxes: np.ndarray       # (n, 4) int32: x, y, width, height
+    polygons: np.ndarray    # (n, 4, 2) int32
+    angle: float = 0.0      # OneOCR reports one text angle per image
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    @classmethod
+    def empty(cls) -> "LineColumns":
+        return cls([], np.zeros(0, np.float64), np.zeros((0, 4), np.int32), np.zeros((0, 4, 2), np.int32))
+
+    def box(self, i: int) -> Box:
+        return Box(*(int(v) for v in self.boxes[i]))
+
+    def to_models(self) -> List[TextLine]:
+        """Materialize TextLine models (no re-validation)."""
+        boxes = self.boxes.tolist()
+        polygons = self.polygons.tolist()
+        confidences = self.confidence.tolist()
+        return [
+            TextLine.model_construct(
+                text=text, confidence=conf,
+                bbox=BoundingBox.model_construct(x=b[0], y=b[1], width=b[2], height=b[3]),
+                polygon=poly, textline_orientation_angle=self.angle
+            )
+            for text, conf, b, poly in zip(self.text, confidences, boxes, polygons)
+        ]
+
+    def to_packed(self) -> Dict[str, Any]:
+        """Columns as packed little-endian buffers, laid out like WordColumns.to_packed."""
+        return {
+            "text": self.text,
+            "confidence": self.confidence.astype("<f8").tobytes(),
+            "bbox": self.boxes.astype("<i4").tobytes(),
+            "polygon": self.polygons.astype("<i4").tobytes(),
+            "textline_orientation_angle": self.angle,
+        }
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """TextLine-shaped plain dicts, for direct JSON serialization."""
+        return [
+            {"text": text, "confidence": conf,
+             "bbox": {"x": b[0], "y": b[1], "width": b[2], "height": b[3]}, "polygon": poly,
+             "textline_orientation_angle": self.angle}
+            for text, conf, b, poly in zip(self.text, self.confidence.tolist(),
+                                           self.boxes.tolist(), self.polygons.tolist())
+        ]
+
+def _boxes_from_corners(corners: np.ndarray) -> np.ndarray:
+    """(n, 4, 2) float corners -> (n, 4) int32 x, y, width, height (truncating like int())."""
+    mins = corners.min(axis=1)
+    maxs = corners.max(axis=1)
+    return np.concatenate([mins, maxs - mins], axis=1).astype(np.int32)
+
+def extract_columns(oneocr_results: dict) -> "tuple[WordColumns, LineColumns]":
+    """
+    Single pass over the engine's nested dicts into word and line columns.
+    Words that are empty, below MIN_OCR_CONFIDENCE or lack a box are dropped;
+    lines without text or a box are dropped.
+    """
+    word_text, word_conf, word_corners, word_lines = [], [], [], []
+    line_text, line_conf, line_corners = [], [], []
+
+    for line_data in oneocr_results.get('lines', []):
+        words = line_data.get('words', [])
+        line_bbox = line_data.get('bounding_rect', {})
+        line_id = -1
+        if line_data.get('text', '') and line_bbox:
+            line_id = len(line_text)
+            line_text.append(line_data['text'])
+            # Line confidence averages every word, including ones dropped below
+            line_conf.append(sum(w.get('confidence', 0.0) for w in words) / len(words) if words else 0.0)
+            line_corners.append([line_bbox.get(k, 0) for k in _CORNER_KEYS])
+
+        for word_data in words:
+            text = word_data.get('text', '').strip()
+            confidence = word_data.get('confidence', 0.0)
+            word_bbox = word_data.get('bounding_rect', {})
+            if not text or confidence < MIN_OCR_CONFIDENCE or not word_bbox:
+                continue
+            word_text.append(text)
+            word_conf.append(confidence)
+            word_corners.append([word_bbox.get(k, 0) for k in _CORNER_KEYS])
+            word_lines.append(line_id)
+
+    if word_text:
+        corners = np.asarray(word_corners, dtype=np.float64).reshape(-1, 4, 2)
+        words = WordColumns(
+            text=word_text,
+            confidence=np.asarray(word_conf, dtype=np.float64),
+            boxes=_boxes_from_corners(corners),
+            polygons=corners.astype(np.int32),
+            line_ids=np.asarray(word_lines, dtype=np.int32),
+        )
+    else:
+        words = WordColumns.empty()
+
+    if line_text:
+        # Line boxes are derived from the already truncated polygon, as before
+        polygons = np.asarray(line_corners, dtype=np.float64).reshape(-1, 4, 2).astype(np.int32)
+        lines = LineColumns(
+            text=line_text,
+            confidence=np.asarray(line_conf, dtype=np.float64),
+            boxes=_boxes_from_corners(polygons),
+            polygons=polygons,
+            angle=float(oneocr_results.get('text_angle', 0.0) or 0.0),
+        )
+    else:
+        lines = LineColumns.empty()
+
+    return words, lines
+
+@dataclass
+class CompactOCRResult:
+    """OCRResult counterpart that keeps word and line geometry in columns."""
+    text: str
+    confidence: float
+    processing_time: float
+    words: WordColumns = field(default_factory=WordColumns.empty)
+    lines: LineColumns = field(default_factory=LineColumns.empty)
+    tables: List[Any] = field(default_factory=list)  # utils.table_extractor.TableGrid
+    layout: Optional[Any] = None  # utils.page_layout.StructuredPage, built for detail_level='full'
+    file_path: Optional[str] = None
+    success: bool = True
+    error_message: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    engine_used: str = "OneOCR"
+    pages: Optional[List["CompactOCRResult"]] = None  # Per-page results of a multi-page image
+
+    @property
+    def word_count(self) -> int:
+        return len(self.words) if self.pages is None else sum(page.word_count for page in self.pages)
+
+    @property
+    def line_count(self) -> int:
+        return len(self.lines) if self.pages is None else sum(page.line_count for page in self.pages)
+
+    def _response_parts(self, detail_level: Optional[str], fields: Optional[List[str]]):
+        detail_level = resolve_detail_level(detail_level)
+        excluded = response_exclude(detail_level, fields)
+        metadata = self.metadata
+        if detail_level in ("text", "lines"):
+            metadata = {k: v for k, v in metadata.items() if k != "preprocessing_options"}
+        return excluded, metadata
+
+    def to_ocr_result(self, detail_level: Optional[str] = DEFAULT_DETAIL_LEVEL,
+                      fields: Optional[List[str]] = None) -> OCRResult:
+        """
+        Materialize the response model at the API boundary. Only the structures
+        the response will carry are built: 'text' keeps the text and counts,
+        'lines' adds text lines and tables, 'words' word details and 'full' the
+        page layout; `fields` narrows that further (see response_exclude).
+        Below 'words' the preprocessing options are not echoed in metadata.
+        """
+        excluded, metadata = self._response_parts(detail_level, fields)
+        return OCRResult.model_construct(
+            text=self.text,
+            confidence=self.confidence,
+            processing_time=self.processing_time,
+            word_details=self.words.to_models() if "word_details" not in excluded else [],
+            text_lines=self.lines.to_models() if "text_lines" not in excluded else [],
+            tables=[table.to_model() for table in self.tables] if "tables" not in excluded else [],
+            layout=self.layout.to_model() if "layout" not in excluded and self.layout is not None else None,
+            word_count=self.word_count,
+            line_count=self.line_count,
+            file_path=self.file_path,
+            success=self.success,
+            error_message=self.error_message,
+            metadata=metadata,
+            engine_used=self.engine_used,
+            pages=([page.to_ocr_result(detail_level, fields) for page in self.pages]
+                   if "pages" not in excluded and self.pages is not None else None),
+        )
+
+    def to_dict(self, detail_level: Optional[str] = DEFAULT_DETAIL_LEVEL,
+                fields: Optional[List[str]] = None, packed: bool = False) -> Dict[str, Any]:
+        """
+        The response as plain JSON-ready data, straight from the columns: same
+        keys and values as `to_ocr_result(...).model_dump(mode="json")` with the
+        excluded fields left out, without building a model per word. With
+        `packed`, word_details and text_lines are single objects of packed
+        columns (see WordColumns.to_packed) for binary formats.
+        """
+        excluded, metadata = self._response_parts(detail_level, fields)
+        result = {
+            "text": self.text,
+            "confidence": self.confidence,
+            "processing_time": self.processing_time,
+        }
+        if "word_details" not in excluded:
+            result["word_details"] = self.words.to_packed() if packed else self.words.to_dicts()
+        if "text_lines" not in excluded:
+            result["text_lines"] = self.lines.to_packed() if packed else self.lines.to_dicts()
+        if "tables" not in excluded:
+            result["tables"] = [table.to_model().model_dump(mode="json") for table in self.tables]
+        if "layout" not in excluded:
+            result["layout"] = self.layout.to_model().model_dump(mode="json") if self.layout is not None else None
+        result.update(
+            word_count=self.word_count,
+            line_count=self.line_count,
+            file_path=self.file_path,
+            success=self.success,
+            error_message=self.error_message,
+            metadata=metadata,
+            engine_used=self.engine_used,
+        )
+        if "pages" not in excluded:
+            result["pages"] = ([page.to_dict(detail_level, fields, packed) for page in self.pages]
+                               if self.pages is not None else None)
+        return {key: value for key, value in result.items() if key not in excluded}
@@ -2,226 +2,458 @@
 OneOCR-only processing with image preprocessing and result formatting.
 Simplified to use OneOCR exclusively without legacy compatibility.
 """
+import io
 import time
 import hashlib
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Union
 import cv2
-from PIL import Image
+import numpy as np
+from PIL import Image, ImageSequence
 
-from models import PreprocessingOptions, TextProcessingOptions, OCRResult, BoundingBox, WordDetail, TextLine
+from models import PreprocessingOptions, TextProcessingOptions, OCRResult
 from .ocr_instance import get_ocr_instance
-from .image_preprocessor import enhanced_preprocess_image
-from utils.caching import get_cached_result, cache_result
+from .image_preprocessor import (
+    preprocess_image_array, preprocess_image_batch, detect_ruling_lines
+)
+from .engine_adapter import recognize_image, reset_copy_counter, get_copy_count
+from .ocr_columns import CompactOCRResult, extract_columns
+from utils.caching import get_cached_result, cache_result, is_result_cached
 from utils.performance import update_performance_metrics
-from utils.text_postprocessor import improve_text_structure
-from config import MIN_OCR_CONFIDENCE
+from utils.text_postprocessor import get_text_postprocessor
+from utils.table_extractor import TABLE_EXPORT_FORMATS
+from config import BATCH_PROCESSING_CHUNK_SIZE, MAX_CONCURRENT_PAGES
 
 logger = logging.getLogger(__name__)
 
-def _convert_to_pil_image(processed_image) -> Image.Image:
-    """Convert processed image to PIL Image format with memory optimization."""
-    if isinstance(processed_image, str):
-        # Direct file path - let PIL handle it efficiently
-        return Image.open(processed_image)
+# Pages of multi-page images are OCR'd here. Page tasks never wait on other
+# tasks, so callers already running in another pool can block on them safely;
+# queueing them on the shared worker pool instead could deadlock it. The cost is
+# a separate bound: up to MAX_CONCURRENT_REQUESTS + MAX_CONCURRENT_PAGES threads
+# call the engine at once.
+_page_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_PAGES, thread_name_prefix="ocr-page")
+class PreparedImage(NamedTuple):
+    """A batch file read ahead of its OCR: contents, content hash and, if batch-preprocessed, the image."""
+    data: bytes
+    file_hash: str
+    preprocessed: Optional[np.ndarray] = None
+
+# Formats that can hold several pages: TIFF (both byte orders), GIF, WebP
+_MULTI_PAGE_SIGNATURES = (b"II*\x00", b"MM\x00*", b"GIF8")
+
+def _mean_word_confidence(oneocr_results: dict) -> float:
+    """Mean confidence over every recognized word, before any filtering."""
+    confidences = [
+        word.get('confidence', 0.0)
+        for line in oneocr_results.get('lines', [])
+        for word in line.get('words', [])
+    ]
+    return sum(confidences) / len(confidences) if confidences else 0.0
+
+def _recognize_adaptive(ocr_instance, img: np.ndarray, options: PreprocessingOptions) -> tuple[dict, str, np.ndarray]:
+    """
+    OCR the raw image first and only run the preprocessing pipeline when the
+    mean word confidence is below the threshold. Returns the better of the two
+    results, which path produced it ("raw" or "preprocessed") and the image the
+    engine saw for it.
+    """
+    raw_results = recognize_image(ocr_instance, img) or {}
+    raw_confidence = _mean_word_confidence(raw_results)
+    if raw_confidence >= options.adaptive_min_confidence:
+        update_performance_metrics("adaptive_fast_path")
+        return raw_results, "raw", img
+
+    update_performance_metrics("adaptive_fallback")
+    logger.debug(f"Raw OCR confidence {raw_confidence:.2f} below threshold, retrying with preprocessing")
+    try:
+        processed_image = preprocess_image_array(img, options)
+    except Exception as e:
+        logger.warning(f"Adaptive preprocessing failed, keeping raw result: {e}")
+        return raw_results, "raw", img
+
+    processed_results = recognize_image(ocr_instance, processed_image) or {}
+    if _mean_word_confidence(processed_results) > raw_confidence:
+        return processed_results, "preprocessed", processed_image
+    return raw_results, "raw", img
+
+def _decode_image(data: Union[bytes, bytearray, memoryview]) -> np.ndarray:
+    """Decode an encoded image held in memory to BGR, without copying the buffer first."""
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode image")
+    return img
+
+def _read_file(image_path: str) -> bytes:
+    with open(image_path, 'rb') as f:
+        return f.read()
+
+def _build_cache_key(file_hash: str, options: PreprocessingOptions,
+                     text_options: Optional[TextProcessingOptions] = None) -> str:
+    # Text options change the extracted text, so they are part of the key. Detail
+    # levels and field selections only differ in what is materialized, except
+    # that 'full' also builds the page layout, so all others share one entry
+    text_options = text_options or TextProcessingOptions()
+    options_json = (options.model_dump_json() + text_options.model_dump_json(exclude={"detail_level", "fields"}) +
+                    str(text_options.detail_level == "full"))
+    options_hash = hashlib.blake2b(options_json.encode(), digest_size=8).hexdigest()
+    return f"ocr_{file_hash}_{options_hash}"
+
+def _is_multi_page(data: Union[bytes, bytearray, memoryview]) -> bool:
+    """Whether an encoded image holds more than one page; only TIFF, GIF and WebP headers are opened."""
+    header = bytes(data[:12])
+    if not (header.startswith(_MULTI_PAGE_SIGNATURES) or (header[:4] == b"RIFF" and header[8:12] == b"WEBP")):
+        return False
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            return getattr(img, "n_frames", 1) > 1
+    except Exception:
+        return False
+
+def _iter_pages(data: Union[bytes, bytearray, memoryview]) -> Iterator[np.ndarray]:
+    """Decode the pages of a multi-page image one at a time, as BGR arrays."""
+    with Image.open(io.BytesIO(data)) as img:
+        for frame in ImageSequence.Iterator(img):
+            yield cv2.cvtColor(np.asarray(frame.convert("RGB")), cv2.COLOR_RGB2BGR)
+
+def content_hasher():
+    """
+    Incremental hasher for image contents, as used in cache keys: feed it the
+    bytes as they arrive and pass hexdigest() on as the file hash.
+    """
+    return hashlib.blake2b(digest_size=16)
+
+def _hash_bytes(data: Union[bytes, bytearray, memoryview]) -> str:
+    hasher = content_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+def _run_ocr_pipeline(image: Optional[np.ndarray], options: PreprocessingOptions,
+                      text_options: Optional[TextProcessingOptions], file_path: Optional[str],
+                      start_time: float, preprocessed_image: Optional[np.ndarray] = None) -> CompactOCRResult:
+    """
+    Recognize a decoded BGR image and build the compact result.
+    `preprocessed_image` skips the preprocessing step (e.g. after batch preprocessing),
+    and `image` may then be None.
+    """
+    ocr_instance = get_ocr_instance()
+    reset_copy_counter()
+    if preprocessed_image is not None:
+        processed_image = preprocessed_image
+        oneocr_results = recognize_image(ocr_instance, processed_image)
+        preprocessing_path = "preprocessed"
+    elif options.adaptive:
+        oneocr_results, preprocessing_path, processed_image = _recognize_adaptive(ocr_instance, image, options)
     else:
-        # Convert numpy array to PIL with minimal memory overhead
-        if len(processed_image.shape) == 3 and processed_image.shape[2] == 3:
-            # BGR to RGB conversion
-            rgb_image = cv2.cvtColor(processed_image, cv2.COLOR_BGR2RGB)
-        else:
-            # Grayscale or already RGB
-            rgb_image = processed_image
-        return Image.fromarray(rgb_image)
-
-def _extract_word_details(oneocr_results: dict) -> tuple[list[WordDetail], float, int]:
-    """Extract word details from OneOCR results with optimized processing."""
-    word_details = []
-    total_confidence = 0.0
-    word_count = 0
-
-    # Pre-allocate lists for better performance
-    lines = oneocr_results.get('lines', [])
-    if not lines:
-        return word_details, 0.0, 0
-
-    for line_data in lines:
-        words = line_data.get('words', [])
-        for word_data in words:
-            word_text = word_data.get('text', '').strip()
-            word_confidence = word_data.get('confidence', 0.0)
-            word_bbox = word_data.get('bounding_rect', {})
-
-            # Skip low-confidence or empty words early
-            if not word_text or word_confidence < MIN_OCR_CONFIDENCE or not word_bbox:
-                continue
-
-            # Extract coordinates efficiently
-            x1, y1 = word_bbox.get('x1', 0), word_bbox.get('y1', 0)
-            x2, y2 = word_bbox.get('x2', 0), word_bbox.get('y2', 0)
-            x3, y3 = word_bbox.get('x3', 0), word_bbox.get('y3', 0)
-            x4, y4 = word_bbox.get('x4', 0), word_bbox.get('y4', 0)
-
-            # Calculate bounding box efficiently
-            min_x, max_x = min(x1, x2, x3, x4), max(x1, x2, x3, x4)
-            min_y, max_y = min(y1, y2, y3, y4), max(y1, y2, y3, y4)
-
-            bbox = BoundingBox(
-                x=int(min_x), y=int(min_y),
-                width=int(max_x - min_x),
-                height=int(max_y - min_y)
-            )
+        try:
+            processed_image = preprocess_image_array(image, options)
+        except Exception as e:
+            logger.error(f"Image preprocessing failed, using original image: {e}")
+            processed_image = image
 
-            # Create polygon coordinates - convert floats to integers
-            polygon = [[int(x1), int(y1)], [int(x2), int(y2)], [int(x3), int(y3)], [int(x4), int(y4)]]
-
-            word_details.append(WordDetail(
-                text=word_text,
-                confidence=word_confidence,
-                bbox=bbox,
-                polygon=polygon
-            ))
-
-            total_confidence += word_confidence
-            word_count += 1
-
-    return word_details, total_confidence, word_count
-
-def _extract_text_lines(oneocr_results: dict) -> list[TextLine]:
-    """Extract text lines from OneOCR results."""
-    text_lines = []
-    text_angle = oneocr_results.get('text_angle', 0.0)  # OneOCR returns float angles
-
-    for line_data in oneocr_results.get('lines', []):
-        line_text = line_data.get('text', '')
-        line_bbox = line_data.get('bounding_rect', {})
-
-        if line_text and line_bbox:
-            # Convert line bounding_rect to polygon - convert floats to integers
-            polygon = [
-                [int(line_bbox.get('x1', 0)), int(line_bbox.get('y1', 0))],
-                [int(line_bbox.get('x2', 0)), int(line_bbox.get('y2', 0))],
-                [int(line_bbox.get('x3', 0)), int(line_bbox.get('y3', 0))],
-                [int(line_bbox.get('x4', 0)), int(line_bbox.get('y4', 0))]
-            ]
-
-            # Calculate bounding box
-            x_coords = [p[0] for p in polygon]
-            y_coords = [p[1] for p in polygon]
-            x_min, y_min = int(min(x_coords)), int(min(y_coords))
-            x_max, y_max = int(max(x_coords)), int(max(y_coords))
-
-            bbox = BoundingBox(
-                x=x_min, y=y_min,
-                width=x_max - x_min,
-                height=y_max - y_min
-            )
+        # Perform OCR using OneOCR
+        oneocr_results = recognize_image(ocr_instance, processed_image)
+        preprocessing_path = "preprocessed"
+
+    if not oneocr_results or 'lines' not in oneocr_results:
+        logger.warning("No valid OneOCR results received")
+        return CompactOCRResult(
+            text="", confidence=0, processing_time=time.time() - start_time,
+            file_path=file_path, success=True, error_message="No text detected"
+        )
 
-            # Calculate average confidence for the line
-            words = line_data.get('words', [])
-            line_confidence = sum(w.get('confidence', 0.0) for w in words) / len(words) if words else 0.0
+    # Extract structured data from OneOCR results as columns
+    extracted_text = oneocr_results.get('text', '')
+    words, lines = extract_columns(oneocr_results)
 
-            text_lines.append(TextLine(
-                text=line_text,
-                confidence=line_confidence,
-                bbox=bbox,
-                polygon=polygon,
-                textline_orientation_angle=text_angle
-            ))
+    # Calculate average confidence
+    avg_confidence = float(words.confidence.mean()) if len(words) else 0.0
 
-    return text_lines
+    # Apply text post-processing based on options
+    text_options = text_options or TextProcessingOptions()
 
-def perform_ocr_on_image(image_path: str, options: PreprocessingOptions, text_options: TextProcessingOptions) -> OCRResult:
-    """Perform OCR on image using OneOCR with preprocessing and caching."""
+    tables, layout = [], None
+    try:
+        if len(words) and text_options.use_advanced_processing:
+            logger.debug("Applying advanced text post-processing for improved structure")
+            processor = get_text_postprocessor(
+                text_options.reading_order,
+                enable_layout_analysis=text_options.enable_layout_analysis,
+                preserve_line_breaks=text_options.preserve_line_breaks,
+                merge_fragmented_words=text_options.merge_fragmented_words
+            )
+            # Ruling lines are looked up in the image the engine saw, so they share
+            # its coordinates; the scan only runs when the words suggest a table
+            structure = processor.process_page(
+                words, lines, ruling_lines=lambda min_length: detect_ruling_lines(processed_image, min_length),
+                build_layout=text_options.detail_level == "full"
+            )
+            extracted_text, tables, layout = structure.text, structure.tables, structure.layout
+            export_format = text_options.table_export_format
+            if export_format in TABLE_EXPORT_FORMATS:
+                for table in tables:
+                    table.export = table.render(export_format)
+            elif export_format:
+                logger.warning(f"Unsupported table export format '{export_format}', skipping export")
+            logger.debug(f"Post-processed text preview: {extracted_text[:100]}...")
+        else:
+            # Fallback to simple concatenation
+            extracted_text = " ".join(words.text)
+    except Exception as e:
+        logger.error(f"Text post-processing failed, falling back to simple concatenation: {e}")
+        # Fallback to simple concatenation if post-processing fails
+        extracted_text = " ".join(words.text)
+
+    processing_time = time.time() - start_time
+
+    update_performance_metrics("images_processed")
+    return CompactOCRResult(
+        text=extracted_text.strip(),
+        confidence=avg_confidence,
+        processing_time=processing_time,
+        words=words,
+        lines=lines,
+        tables=tables,
+        layout=layout,
+        file_path=file_path,
+        metadata={
+            "preprocessing_options": options.model_dump(),
+            "preprocessing_path": preprocessing_path,
+            "engine_input_copies": get_copy_count()
+        }
+    )
+
+def _hash_page(page: np.ndarray) -> str:
+    hasher = content_hasher()
+    hasher.update(str(page.shape).encode())
+    hasher.update(np.ascontiguousarray(page).data)
+    return hasher.hexdigest()
+
+def _relabel(result: CompactOCRResult, file_path: Optional[str]) -> CompactOCRResult:
+    """
+    A cached result under the current request's path. The cache is keyed by
+    content, so it holds the path of whichever request first OCR'd the image,
+    and that must not leak to other requests.
+    """
+    result.file_path = file_path
+    for page in result.pages or ():
+        page.file_path = file_path
+    return result
+
+def perform_ocr_on_page(page: np.ndarray, page_number: int, options: PreprocessingOptions,
+                        text_options: Optional[TextProcessingOptions] = None,
+                        file_path: Optional[str] = None) -> CompactOCRResult:
+    """
+    OCR one decoded BGR page of a multi-page source, cached by its pixels so
+    unchanged pages are reused across files. The page number goes into metadata.
+    """
     start_time = time.time()
-
-    # Generate cache key
+    cache_key = _build_cache_key(_hash_page(page), options, text_options)
+    result = get_cached_result(cache_key)
+    if result:
+        result.file_path = file_path
+    else:
+        try:
+            result = _run_ocr_pipeline(page, options, text_options, file_path, start_time)
+            if result.error_message is None:
+                cache_result(cache_key, result)
+        except Exception as e:
+            logger.error(f"OCR processing failed for page {page_number} of {file_path or 'in-memory image'}: {e}")
+            update_performance_metrics("error_count")
+            result = CompactOCRResult(
+                text="", confidence=0.0, processing_time=time.time() - start_time,
+                file_path=file_path, success=False, error_message=str(e)
+            )
+    result.metadata = {**result.metadata, "page": page_number}
+    return result
+
+def submit_page_ocr(in_flight: List["Future[CompactOCRResult]"], page: np.ndarray, page_number: int,
+                    options: PreprocessingOptions, text_options: Optional[TextProcessingOptions] = None,
+                    file_path: Optional[str] = None) -> "Future[CompactOCRResult]":
+    """
+    Queue perform_ocr_on_page on the page pool, first blocking while
+    MAX_CONCURRENT_PAGES of the caller's `in_flight` futures are unfinished, so
+    a caller decoding or rendering pages lazily keeps only a few in memory.
+    """
+    pending = [f for f in in_flight if not f.done()]
+    if len(pending) >= MAX_CONCURRENT_PAGES:
+        wait(pending, return_when=FIRST_COMPLETED)
+    return _page_pool.submit(perform_ocr_on_page, page, page_number, options, text_options, file_path)
+
+def _ocr_pages(data: Union[bytes, bytearray, memoryview], options: PreprocessingOptions,
+               text_options: Optional[TextProcessingOptions], file_path: Optional[str],
+               start_time: float) -> CompactOCRResult:
+    """
+    OCR every page of a multi-page image concurrently and combine them. Pages are
+    decoded lazily and only a few ahead of the OCR (see submit_page_ocr).
+    """
+    futures: List["Future[CompactOCRResult]"] = []
+    for page_number, page in enumerate(_iter_pages(data), start=1):
+        futures.append(submit_page_ocr(futures, page, page_number, options, text_options, file_path))
+    pages = [f.result() for f in futures]
+
+    succeeded = [page for page in pages if page.success]
+    word_count = sum(page.word_count for page in succeeded)
+    return CompactOCRResult(
+        text="\n\n".join(page.text for page in succeeded if page.text),
+        confidence=sum(page.confidence * page.word_count for page in succeeded) / word_count if word_count else 0.0,
+        processing_time=time.time() - start_time,
+        file_path=file_path,
+        success=bool(succeeded),
+        error_message=None if succeeded else pages[0].error_message,
+        metadata={"page_count": len(pages), "pages_failed": len(pages) - len(succeeded)},
+        pages=pages,
+    )
+
+def perform_ocr_on_image_compact(image_path: str, options: PreprocessingOptions,
+                                 text_options: Optional[TextProcessingOptions] = None,
+                                 preprocessed_image: Optional[np.ndarray] = None) -> CompactOCRResult:
+    """
+    Perform OCR on image using OneOCR with preprocessing and caching, returning
+    the compact result (failures as unsuccessful results) for callers that
+    serialize it directly. The file is read once, for both hashing and decoding.
+    """
     try:
-        with open(image_path, 'rb') as f:
-            file_hash = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+        data = _read_file(image_path)
     except IOError:
-        return OCRResult(
+        return CompactOCRResult(
             text="", confidence=0, processing_time=0,
             success=False, error_message="File not found or unreadable."
         )
+    return perform_ocr_on_bytes(data, options, text_options, file_path=image_path,
+                                preprocessed_image=preprocessed_image)
+
+def perform_ocr_on_bytes(data: Union[bytes, bytearray, memoryview], options: PreprocessingOptions,
+                         text_options: Optional[TextProcessingOptions] = None, file_path: Optional[str] = None,
+                         file_hash: Optional[str] = None,
+                         preprocessed_image: Optional[np.ndarray] = None) -> CompactOCRResult:
+    """
+    Perform OCR on an encoded image held in memory (file contents or an upload),
+    cached by content like perform_ocr_on_image_compact. The image is decoded
+    with cv2.imdecode straight from `data`; pass `file_hash` (from
+    content_hasher) when the caller already hashed the bytes while reading them.
+    Multi-page images (TIFF, animated GIF/WebP) get one result per page in
+    `pages`, each page cached on its own; the whole is only cached once every
+    page succeeded.
+    """
+    start_time = time.time()
 
-    options_hash = hashlib.blake2b(options.model_dump_json().encode(), digest_size=8).hexdigest()
-    cache_key = f"ocr_{file_hash}_{options_hash}"
-
+    # The cache holds compact results; models are only built for the response
+    cache_key = _build_cache_key(file_hash or _hash_bytes(data), options, text_options)
     cached = get_cached_result(cache_key)
     if cached:
-        return OCRResult(**cached)
+        return _relabel(cached, file_path)
 
     try:
-        ocr_instance = get_ocr_instance()
-        processed_image = enhanced_preprocess_image(image_path, options)
-        pil_image = _convert_to_pil_image(processed_image)
-
-        # Perform OCR using OneOCR
-        oneocr_results = ocr_instance.recognize_pil(pil_image)
-
-        if not oneocr_results or 'lines' not in oneocr_results:
-            logger.warning("No valid OneOCR results received")
-            return OCRResult(
-                text="", confidence=0, processing_time=time.time() - start_time,
-                file_path=image_path, success=True, error_message="No text detected"
-            )
-
-        # Extract structured data from OneOCR results
-        extracted_text = oneocr_results.get('text', '')
-        word_details, total_confidence, word_count = _extract_word_details(oneocr_results)
-        text_lines = _extract_text_lines(oneocr_results)
-
-        # Calculate average confidence
-        avg_confidence = total_confidence / word_count if word_count > 0 else 0.0
-
-        # Apply text post-processing based on options
-        text_options = text_options or TextProcessingOptions()
+        if preprocessed_image is None and _is_multi_page(data):
+            result = _ocr_pages(data, options, text_options, file_path, start_time)
+        else:
+            image = _decode_image(data) if preprocessed_image is None else None
+            result = _run_ocr_pipeline(image, options, text_options, file_path, start_time, preprocessed_image)
+        # A partial multi-page result is not cached: the next request retries the
+        # failed pages, while the pages that succeeded are served from their own entries
+        if result.error_message is None and not result.metadata.get("pages_failed"):
+            cache_result(cache_key, result)
+        return result
 
-        try:
-            if word_details and text_options.use_advanced_processing:
-                logger.debug("Applying advanced text post-processing for improved structure")
-                extracted_text = improve_text_structure(
-                    word_details,
-                    text_lines,
-                    reading_order=text_options.reading_order
-                )
-                logger.debug(f"Post-processed text preview: {extracted_text[:100]}...")
-            else:
-                # Fallback to simple concatenation
-                extracted_text = " ".join([word.text for word in word_details])
-        except Exception as e:
-            logger.error(f"Text post-processing failed, falling back to simple concatenation: {e}")
-            # Fallback to simple concatenation if post-processing fails
-            extracted_text = " ".join([word.text for word in word_details])
-
-        processing_time = time.time() - start_time
-        line_count = len(text_lines)
-
-        result = OCRResult(
-            text=extracted_text.strip(),
-            confidence=avg_confidence,
-            processing_time=processing_time,
-            word_details=word_details,
-            text_lines=text_lines,
-            word_count=word_count,
-            line_count=line_count,
-            file_path=image_path,
-            metadata={"preprocessing_options": options.model_dump()}
+    except Exception as e:
+        logger.error(f"OCR processing failed for {file_path or 'in-memory image'}: {e}", exc_info=True)
+        update_performance_metrics("error_count")
+        return CompactOCRResult(
+            text="",
+            confidence=0.0,
+            processing_time=time.time() - start_time,
+            file_path=file_path,
+            success=False,
+            error_message=str(e)
         )
-        
-        cache_result(cache_key, result.model_dump())
-        update_performance_metrics("images_processed")
-        
-        return result
 
+def perform_ocr_on_image(image_path: str, options: PreprocessingOptions,
+                         text_options: Optional[TextProcessingOptions] = None,
+                         preprocessed_image: Optional[np.ndarray] = None) -> OCRResult:
+    """Perform OCR on image using OneOCR with preprocessing and caching."""
+    text_options = text_options or TextProcessingOptions()
+    result = perform_ocr_on_image_compact(image_path, options, text_options, preprocessed_image)
+    return result.to_ocr_result(text_options.detail_level, text_options.fields)
+
+def perform_ocr_on_array(image: np.ndarray, options: PreprocessingOptions,
+                         text_options: Optional[TextProcessingOptions] = None,
+                         file_path: Optional[str] = None, preprocessed: bool = False) -> OCRResult:
+    """
+    Perform OCR on an in-memory BGR image (no caching).
+    Pass preprocessed=True when the image already went through the preprocessing pipeline.
+    """
+    start_time = time.time()
+    try:
+        result = _run_ocr_pipeline(image, options, text_options, file_path, start_time,
+                                   preprocessed_image=image if preprocessed else None)
+        text_options = text_options or TextProcessingOptions()
+        return result.to_ocr_result(text_options.detail_level, text_options.fields)
     except Exception as e:
-        logger.error(f"OCR processing failed for {image_path}: {e}", exc_info=True)
+        logger.error(f"OCR processing failed for in-memory image {file_path or ''}: {e}", exc_info=True)
         update_performance_metrics("error_count")
         return OCRResult(
             text="",
             confidence=0.0,
             processing_time=time.time() - start_time,
-            file_path=image_path,
+            file_path=file_path,
             success=False,
             error_message=str(e)
-        )
\ No newline at end of file
+        )
+
+def group_paths_by_image_size(image_paths: List[str], max_group_size: int = BATCH_PROCESSING_CHUNK_SIZE) -> List[List[str]]:
+    """
+    Group image paths into chunks of identical pixel size for batch preprocessing.
+    Only the image headers are read; unreadable files end up in their own group.
+    """
+    groups: Dict[Any, List[str]] = {}
+    for path in image_paths:
+        try:
+            with Image.open(path) as img:
+                key = img.size
+        except Exception:
+            key = ("unreadable", path)
+        groups.setdefault(key, []).append(path)
+
+    chunks = []
+    for paths in groups.values():
+        for i in range(0, len(paths), max_group_size):
+            chunks.append(paths[i:i + max_group_size])
+    return chunks
+
+def preprocess_image_files(image_paths: List[str], options: PreprocessingOptions,
+                           text_options: Optional[TextProcessingOptions] = None) -> Dict[str, PreparedImage]:
+    """
+    Read every file once, then decode and batch-preprocess the same-sized images
+    that are not already cached. Returns path -> PreparedImage so the OCR call
+    reuses the contents and hash; cached, multi-page and undecodable files come
+    without a preprocessed image. Unreadable paths are omitted, and in adaptive
+    mode nothing is read ahead (every image is handled per image instead).
+    """
+    if options.adaptive:
+        return {}
+
+    prepared: Dict[str, PreparedImage] = {}
+    paths, images = [], []
+    for path in image_paths:
+        try:
+            data = _read_file(path)
+        except IOError:
+            continue
+        prepared[path] = PreparedImage(data, _hash_bytes(data))
+        # Multi-page images are OCR'd page by page instead
+        if is_result_cached(_build_cache_key(prepared[path].file_hash, options, text_options)) or _is_multi_page(data):
+            continue
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is not None:
+            paths.append(path)
+            images.append(img)
+
+    if not images:
+        return prepared
+    try:
+        for path, processed in zip(paths, preprocess_image_batch(images, options)):
+            prepared[path] = prepared[path]._replace(preprocessed=processed)
+    except Exception as e:
+        logger.error(f"Batch preprocessing failed, falling back to per-image preprocessing: {e}")
+    return prepared
@@ -3,19 +3,18 @@ Intelligent video processing using Structural Similarity Index (SSIM)
 to extract only unique frames for OCR.
 """
 import cv2
-import tempfile
 import logging
-import os
-import shutil
 import time
 import numpy as np
 from skimage.metrics import structural_similarity as ssim
 
-from typing import cast
+from typing import Any, Callable, Dict, List, Optional, cast
 
-from models import VideoProcessingOptions, PreprocessingOptions, VideoOCRResult
-from core.ocr_processor import perform_ocr_on_image
+from models import VideoProcessingOptions, PreprocessingOptions, TextProcessingOptions, VideoOCRResult, OCRResult
+from core.ocr_processor import perform_ocr_on_array
+from core.image_preprocessor import preprocess_image_batch
 from utils.performance import update_performance_metrics
+from config import BATCH_PROCESSING_CHUNK_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -36,13 +35,33 @@ def are_frames_similar(frame1_gray: np.ndarray, frame2_gray: np.ndarray, thresho
     return score > threshold
 
 
-def process_video_for_ocr(video_path: str, video_options: VideoProcessingOptions, ocr_options: PreprocessingOptions) -> VideoOCRResult:
+# Only each frame's text and confidence are used, so no word or line models are built
+_FRAME_TEXT_OPTIONS = TextProcessingOptions(detail_level="text")
+
+def _ocr_frame_batch(frames: List[np.ndarray], ocr_options: PreprocessingOptions) -> List[OCRResult]:
+    """
+    OCR a batch of same-sized unique frames. Frames are preprocessed as one stack;
+    adaptive mode needs the raw frame first, so it keeps per-frame preprocessing.
+    """
+    if ocr_options.adaptive:
+        return [perform_ocr_on_array(frame, ocr_options, _FRAME_TEXT_OPTIONS) for frame in frames]
+
+    processed_frames = preprocess_image_batch(np.stack(frames), ocr_options)
+    return [perform_ocr_on_array(frame, ocr_options, _FRAME_TEXT_OPTIONS, preprocessed=True) for frame in processed_frames]
+
+def process_video_for_ocr(video_path: str, video_options: VideoProcessingOptions, ocr_options: PreprocessingOptions,
+                          progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          should_cancel: Optional[Callable[[], bool]] = None) -> VideoOCRResult:
     """
     Extracts unique frames from a video using SSIM, performs OCR, and returns combined text.
-    This function is now more robust with full try/except/finally blocks.
+    This function is now more robust with full try/except blocks.
+
+    progress_callback, if given, receives a progress dict after every sampled frame
+    (frames scanned, total frames, unique frames, ETA) and the texts accepted so
+    far after every OCR batch. should_cancel is polled per sampled frame; when it
+    returns True, processing stops and an unsuccessful result is returned.
     """
     start_time = time.time()
-    frames_dir = tempfile.mkdtemp(prefix="video_frames_")
 
     # Initialize variables for the result
     all_texts = []
@@ -66,6 +85,34 @@ def process_video_for_ocr(video_path: str, video_options: VideoProcessingOptions
             )
 
         previous_frame_gray = None
+        pending_frames: List[np.ndarray] = []
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or None  # 0 when the container doesn't say
+
+        def report_progress():
+            if progress_callback is None:
+                return
+            elapsed = time.time() - start_time
+            eta_seconds = None
+            if total_frames and frame_count:
+                eta_seconds = max(0.0, elapsed * (total_frames - frame_count) / frame_count)
+            progress_callback({
+                "frames_scanned": frame_count,
+                "total_frames": total_frames,
+                "unique_frames": unique_frames_processed,
+                "frames_with_text": frames_with_text,
+                "eta_seconds": eta_seconds,
+                "texts": all_texts,
+            })
+
+        def flush_pending():
+            nonlocal total_confidence, frames_with_text
+            for ocr_result in _ocr_frame_batch(pending_frames, ocr_options):
+                if ocr_result.success and ocr_result.text and ocr_result.confidence >= video_options.min_confidence:
+                    all_texts.append(ocr_result.text)
+                    total_confidence += ocr_result.confidence
+                    frames_with_text += 1
+            pending_frames.clear()
+            report_progress()
 
         while cap.isOpened() and unique_frames_processed < video_options.max_frames:
             ret, frame = cap.read()
@@ -75,6 +122,19 @@ def process_video_for_ocr(video_path: str, video_options: VideoProcessingOptions
             frame_count += 1
             if frame_count % video_options.frame_interval != 0:
                 continue
+            if should_cancel is not None and should_cancel():
+                cap.release()
+                return VideoOCRResult(
+                    text="\n".join(dict.fromkeys(all_texts)),
+                    confidence=0.0,
+                    processing_time=time.time() - start_time,
+                    frames_processed=unique_frames_processed,
+                    frames_with_text=frames_with_text,
+                    unique_text_segments=len(set(all_texts)),
+                    success=False,
+                    error_message="Video processing cancelled",
+                    metadata={"total_frames_scanned_in_video": frame_count}
+                )
 
             current_frame_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             # Resize for faster SSIM comparison
@@ -84,17 +144,16 @@ def process_video_for_ocr(video_path: str, video_options: VideoProcessingOptions
                 unique_frames_processed += 1
                 previous_frame_gray = current_frame_gray_small
 
-                frame_path = os.path.join(frames_dir, f"frame_{unique_frames_processed:04d}.png")
-                cv2.imwrite(frame_path, frame)
-
-                ocr_result = perform_ocr_on_image(frame_path, ocr_options)
-
-                if ocr_result.success and ocr_result.text and ocr_result.confidence >= video_options.min_confidence:
-                    all_texts.append(ocr_result.text)
-                    total_confidence += ocr_result.confidence
-                    frames_with_text += 1
+                # Unique frames are OCR'd in small same-sized batches, straight from memory
+                pending_frames.append(frame)
+                if len(pending_frames) >= BATCH_PROCESSING_CHUNK_SIZE:
+                    flush_pending()
+                    continue
+            report_progress()
 
         cap.release()
+        if pending_frames:
+            flush_pending()
 
         unique_texts = sorted(list(set(all_texts)), key=all_texts.index)
         combined_text = "\n".join(unique_texts)
@@ -126,8 +185,3 @@ def process_video_for_ocr(video_path: str, video_options: VideoProcessingOptions
             success=False,
             error_message=str(e)
         )
-
-    finally:
-        if os.path.exists(frames_dir):
-            shutil.rmtree(frames_dir, ignore_errors=True)
-            logger.debug(f"Cleaned up temporary directory: {frames_dir}")
\ No newline at end of file
@@ -16,7 +16,8 @@ from starlette.responses import JSONResponse
 
 # Import core components and routers
 from core.ocr_instance import initialize_ocr, is_ocr_initialized
-from api import main_router, video_router
+from api import main_router, video_router, jobs_router
+from core.jobs import job_store, worker_pool
 from utils.performance import performance_metrics, update_performance_metrics
 
 # --- Logging Configuration ---
@@ -42,6 +43,8 @@ async def lifespan(app: FastAPI):
         # Don't exit here - let the service start and provide proper error messages
     yield
     logger.info("--- Service Shutting Down ---")
+    await job_store.shutdown()
+    worker_pool.shutdown(wait=False, cancel_futures=True)
 
 
 # --- FastAPI Application Initialization ---
@@ -106,6 +109,7 @@ async def cache_cleanup_middleware(request: Request, call_next):
 # --- API Routers ---
 app.include_router(main_router.router, tags=["Image & Document OCR"])
 app.include_router(video_router.router)
+app.include_router(jobs_router.router)
 
 
 # --- Health and Metrics Endpoints ---
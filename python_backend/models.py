@@ -10,10 +10,15 @@ class PreprocessingOptions(BaseModel):
     """Options for enhancing image quality before OCR."""
     enhance_contrast: bool = Field(default=False, description="Apply CLAHE to enhance contrast.")
     denoise: bool = Field(default=False, description="Apply denoising filter.")
+    denoise_method: str = Field(default="auto", description="Denoising backend: 'auto', 'bilateral', 'median', 'gaussian', 'nlm_downscaled', 'nlm'.")
+    denoise_strength: Optional[float] = Field(default=None, ge=0.0, description="Override filter strength; estimated from image noise when omitted.")
     threshold_method: str = Field(default="otsu", description="Thresholding method: 'adaptive_gaussian', 'otsu', 'none'.")
     apply_morphology: bool = Field(default=False, description="Apply morphological operations (closing/opening).")
     deskew: bool = Field(default=True, description="Automatically straighten skewed text images.")
+    deskew_method: str = Field(default="projection", description="Skew estimator: 'projection' (profile search on a binarized proxy) or 'hough'.")
     upscale: bool = Field(default=True, description="Upscale low-resolution images for better OCR.")
+    adaptive: bool = Field(default=False, description="OCR the raw image first; run the preprocessing pipeline only if confidence is low.")
+    adaptive_min_confidence: float = Field(default=0.85, ge=0.0, le=1.0, description="Mean word confidence below which adaptive mode retries with preprocessing.")
 
 class TextProcessingOptions(BaseModel):
     """Options for post-processing OCR text to improve structure and readability."""
@@ -22,6 +27,9 @@ class TextProcessingOptions(BaseModel):
     enable_layout_analysis: bool = Field(default=True, description="Enable automatic layout detection (multi-column, tables, etc.).")
     preserve_line_breaks: bool = Field(default=True, description="Preserve natural line breaks in the text.")
     merge_fragmented_words: bool = Field(default=True, description="Attempt to merge fragmented words.")
+    table_export_format: Optional[str] = Field(default=None, description="Also render detected tables as 'csv' or 'markdown'.")
+    detail_level: str = Field(default="words", description="Result detail: 'text', 'lines' (+ text lines and tables), 'words' (+ word details) or 'full' (+ page layout hierarchy).")
+    fields: Optional[List[str]] = Field(default=None, description="Top-level OCRResult fields to return, e.g. ['text', 'confidence']; every field of the detail level when omitted.")
 
 class VideoProcessingOptions(BaseModel):
     """Options for processing video files to extract text."""
@@ -54,6 +62,53 @@ class TextLine(BaseModel):
     polygon: List[List[int]]  # Polygon coordinates
     textline_orientation_angle: float = 0.0  # OneOCR returns float angles
 
+class TableCell(BaseModel):
+    """One cell of a detected table; spans count the grid rows/columns it covers."""
+    row: int
+    col: int
+    row_span: int = 1
+    col_span: int = 1
+    text: str
+    confidence: float
+    bbox: BoundingBox
+
+class TableStructure(BaseModel):
+    """A table detected on a page, as a grid of cells."""
+    rows: int
+    columns: int
+    cells: List[TableCell]
+    bbox: BoundingBox
+    detection_method: str  # 'gaps' (projected box gaps) or 'ruling_lines'
+    export: Optional[str] = None  # CSV / Markdown rendering when table_export_format is set
+
+class LayoutLine(BaseModel):
+    """A line of the page hierarchy; words are indices into OCRResult.word_details."""
+    text: str
+    confidence: float
+    bbox: BoundingBox
+    word_indices: List[int] = []
+    line_index: Optional[int] = None  # Index into OCRResult.text_lines when the engine reported the line
+
+class LayoutParagraph(BaseModel):
+    """A paragraph of the page hierarchy; ids are unique per page, in reading order."""
+    id: int
+    bbox: BoundingBox
+    lines: List[LayoutLine]
+
+class LayoutBlock(BaseModel):
+    """A column or table region of the page hierarchy."""
+    id: int
+    block_type: str  # 'text' or 'table'
+    column_index: int = 0
+    bbox: BoundingBox
+    paragraphs: List[LayoutParagraph]
+    table_index: Optional[int] = None  # Index into OCRResult.tables for 'table' blocks
+
+class PageLayout(BaseModel):
+    """Page -> blocks -> paragraphs -> lines -> words, in reading order."""
+    layout_type: str  # 'single_column', 'multi_column' or 'table'
+    blocks: List[LayoutBlock]
+
 # --- API Result Models ---
 
 class OCRResult(BaseModel):
@@ -63,6 +118,8 @@ class OCRResult(BaseModel):
     processing_time: float
     word_details: List[WordDetail] = []
     text_lines: List[TextLine] = []
+    tables: List[TableStructure] = []
+    layout: Optional[PageLayout] = None  # Only with detail_level='full'
     word_count: int = 0
     line_count: int = 0
     file_path: Optional[str] = None
@@ -70,6 +127,9 @@ class OCRResult(BaseModel):
     error_message: Optional[str] = None
     metadata: Dict[str, Any] = {}
     engine_used: str = "OneOCR"
+    # Multi-page images (TIFF, animated GIF/WebP): one result per page, while the
+    # top level holds the joined text and totals and no word or line geometry
+    pages: Optional[List["OCRResult"]] = None
 
 class BatchOCRResult(BaseModel):
     """Aggregated result of a batch OCR operation."""
@@ -79,6 +139,16 @@ class BatchOCRResult(BaseModel):
     files_processed: int
     files_failed: int
 
+class DocumentPage(BaseModel):
+    """Text of one document page and how it was obtained."""
+    page_number: int
+    text: str
+    method: str  # 'native' (embedded text layer) or 'ocr'
+    processing_time: float  # Text extraction, or rasterization plus OCR
+    confidence: Optional[float] = None  # OCR pages only
+    success: bool = True
+    error_message: Optional[str] = None
+
 class DocumentExtractionResult(BaseModel):
     """Result of extracting plain text from a document file (PDF, DOCX, etc.)."""
     text: str
@@ -88,6 +158,7 @@ class DocumentExtractionResult(BaseModel):
     success: bool
     error_message: Optional[str] = None
     metadata: Dict[str, Any] = {}
+    pages: Optional[List[DocumentPage]] = None  # Paged formats (PDF)
     
 class VideoOCRResult(BaseModel):
     """Structured result of an OCR operation on a video file."""
@@ -111,9 +182,21 @@ class BatchOCRRequest(BaseModel):
     preprocessing_options: Optional[PreprocessingOptions] = None
     text_processing_options: Optional[TextProcessingOptions] = None
 
+class BatchUploadOptions(BaseModel):
+    """Options for a multipart batch upload, sent as the JSON 'options' part ahead of the files."""
+    preprocessing_options: Optional[PreprocessingOptions] = None
+    text_processing_options: Optional[TextProcessingOptions] = None
+
 class DocumentExtractionRequest(BaseModel):
     """Request model for extracting text from a single document."""
     file_path: str
+    pages: Optional[str] = Field(default=None, description="Page selection for paged formats, e.g. '1-3,7,10-' (1-based, inclusive); all pages when omitted.")
+    dpi: Optional[int] = Field(default=None, ge=72, le=1200, description="Rasterization DPI for pages without a text layer; defaults to DEFAULT_IMAGE_DPI.")
+    ocr_fallback: bool = Field(default=True, description="OCR pages that have no embedded text layer.")
+    ocr_images: bool = Field(default=False, description="OCR images embedded in DOCX documents and place their text in document order.")
+    max_bytes: Optional[int] = Field(default=None, ge=1, description="Read at most this many bytes of a TXT file; the result is marked truncated.")
+    preprocessing_options: Optional[PreprocessingOptions] = None
+    text_processing_options: Optional[TextProcessingOptions] = None
 
 class ImageOCRRequest(BaseModel):
     """Request model for processing a single image from a file path."""
@@ -126,3 +209,41 @@ class VideoOCRRequest(BaseModel):
     file_path: str
     video_options: Optional[VideoProcessingOptions] = None
     preprocessing_options: Optional[PreprocessingOptions] = None
+
+class BulkIngestRequest(BaseModel):
+    """Request model for OCR of every image under a directory or matching a glob, written to a JSONL file."""
+    source: str = Field(description="Directory to scan, or a glob pattern such as '/data/scans/**/*.png'.")
+    recursive: bool = Field(default=False, description="Descend into subdirectories (for globs: let '**' span directories).")
+    extensions: Optional[List[str]] = Field(default=None, description="File extensions to include; defaults to the supported image formats.")
+    output_path: str = Field(description="JSONL file receiving one OCRResult per line.")
+    resume: bool = Field(default=True, description="Skip files already recorded successfully in output_path (failed ones are retried) instead of overwriting it.")
+    preprocessing_options: Optional[PreprocessingOptions] = None
+    text_processing_options: Optional[TextProcessingOptions] = None
+
+class JobRequest(BaseModel):
+    """Request model for starting a background job over a video, a batch of images or a bulk ingestion."""
+    job_type: str = Field(description="'video', 'batch' or 'ingest'")
+    video_request: Optional[VideoOCRRequest] = None
+    batch_request: Optional[BatchOCRRequest] = None
+    ingest_request: Optional[BulkIngestRequest] = None
+
+class JobProgress(BaseModel):
+    """Progress of a running job; frame counts apply to video jobs only."""
+    completed: int = 0  # Files done (batch, ingest) or frames scanned (video)
+    total: Optional[int] = None  # None when a video doesn't report its frame count, and for ingestion
+    unique_frames: Optional[int] = None
+    frames_with_text: Optional[int] = None
+    eta_seconds: Optional[float] = None
+
+class JobStatus(BaseModel):
+    """State of a background job, with its results so far."""
+    job_id: str
+    job_type: str
+    status: str  # queued, running, completed, failed or cancelled
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: JobProgress
+    partial_results: List[Any] = []  # Batch: {"index", "result"} records; video: unique texts so far
+    result: Optional[Any] = None  # BatchOCRResult, VideoOCRResult or the ingestion summary once completed
+    error_message: Optional[str] = None
@@ -0,0 +1,53 @@
+"""
+Shared fixtures. The OneOCR engine is replaced by a fake that returns synthetic
+engine results after a configurable delay, so tests exercise scheduling and
+the API without the engine.
+"""
+import threading
+import time
+from typing import List
+
+import cv2
+import numpy as np
+import pytest
+
+import core.ocr_processor as ocr_processor
+from benchmarks.synthetic import make_engine_result
+
+class FakeEngine:
+    """Counts recognitions and sleeps `delay` seconds in each, like a busy engine."""
+
+    def __init__(self):
+        self.delay = 0.0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def recognize(self, ocr_instance, image) -> dict:
+        with self._lock:
+            self.calls += 1
+            seed = self.calls
+        time.sleep(self.delay)
+        return make_engine_result(12, seed=seed)
+
+@pytest.fixture
+def fake_engine(monkeypatch) -> FakeEngine:
+    engine = FakeEngine()
+    monkeypatch.setattr(ocr_processor, "get_ocr_instance", lambda: object())
+    monkeypatch.setattr(ocr_processor, "recognize_image", engine.recognize)
+    return engine
+
+def encode_png(seed: int) -> bytes:
+    """A small PNG with random pixels, so no two seeds share a cache entry."""
+    image = np.random.default_rng(seed).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+@pytest.fixture
+def image_files(tmp_path) -> List[str]:
+    """Eight distinct PNG files, unique to the test."""
+    base = time.time_ns()
+    paths = []
+    for i in range(8):
+        path = tmp_path / f"image{i}.png"
+        path.write_bytes(encode_png(base + i))
+        paths.append(str(path))
+    return paths
@@ -0,0 +1,66 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from tests.conftest import encode_png
+
+client = TestClient(main.app)
+
+def test_cached_image_reports_each_requests_own_path(fake_engine, tmp_path):
+    data = encode_png(1234)
+    paths = [tmp_path / "first.png", tmp_path / "second.png"]
+    for path in paths:
+        path.write_bytes(data)
+
+    responses, engine_calls = [], []
+    requests = [{"json": {"file_path": str(path)}} for path in paths]
+    requests += [{"files": {"file": (name, data, "image/png")}} for name in ("a.png", "b.png")]
+    for kwargs in requests:
+        responses.append(client.post("/ocr/image", **kwargs))
+        engine_calls.append(fake_engine.calls)
+
+    assert [r.status_code for r in responses] == [200] * 4
+    assert [r.json()["file_path"] for r in responses] == [str(paths[0]), str(paths[1]), "a.png", "b.png"]
+    # The second path and the second upload were served from the cache
+    assert engine_calls[1] == engine_calls[0] and engine_calls[3] == engine_calls[2]
+
+def test_batch_upload_reports_each_uploads_own_name(fake_engine):
+    data = encode_png(5678)
+    files = [("files", (name, data, "image/png")) for name in ("f0.png", "f1.png", "f2.png")]
+
+    response = client.post("/ocr/batch/upload", files=files)
+
+    assert response.status_code == 200
+    assert [result["file_path"] for result in response.json()["results"]] == ["f0.png", "f1.png", "f2.png"]
+
+def test_accept_q_zero_is_not_acceptable(fake_engine):
+    files = {"file": ("a.png", encode_png(91), "image/png")}
+
+    response = client.post("/ocr/image", files=files, headers={"Accept": "application/x-msgpack;q=0"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
+
+def test_batch_upload_rejects_malformed_options(fake_engine):
+    files = [("options", (None, b'{"preprocessing_options": ', "application/json")),
+             ("files", ("a.png", encode_png(92), "image/png"))]
+
+    response = client.post("/ocr/batch/upload", files=files)
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
+
+def test_page_selection_past_the_last_page_is_400(tmp_path):
+    pdfium = pytest.importorskip("pypdfium2")
+
+    pdf_path = tmp_path / "two_pages.pdf"
+    pdf = pdfium.PdfDocument.new()
+    for _ in range(2):
+        pdf.new_page(612, 792)
+    pdf.save(str(pdf_path))
+    pdf.close()
+
+    for route in ("/extract/document", "/extract/document/stream"):
+        response = client.post(route, json={"file_path": str(pdf_path), "pages": "5-7"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "No pages selected by '5-7' in a 2-page document"
@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+from models import PreprocessingOptions, TextProcessingOptions
+from core import ocr_processor
+from core.batch_processor import iter_batch_results, process_uploaded_images
+from tests.conftest import encode_png
+
+def test_iter_batch_results_yields_every_index(fake_engine, image_files):
+    paths = image_files + [image_files[0], "/missing/image.png"]
+
+    async def collect():
+        return {index: result async for index, result in iter_batch_results(paths, PreprocessingOptions(), TextProcessingOptions())}
+
+    results = asyncio.run(collect())
+    assert sorted(results) == list(range(len(paths)))
+    assert all(results[i].success for i in range(len(image_files) + 1))
+    assert results[len(paths) - 1].error_message == "File not found"
+
+def test_closing_batch_stream_early_keeps_loop_responsive(fake_engine, image_files):
+    fake_engine.delay = 1.0
+
+    async def close_after_first_result():
+        results = iter_batch_results(image_files, PreprocessingOptions(), TextProcessingOptions())
+        await results.__anext__()
+        # Like a streaming client going away: OCR still running must not be joined on the loop
+        start = time.perf_counter()
+        await results.aclose()
+        await asyncio.sleep(0)
+        return time.perf_counter() - start
+
+    assert asyncio.run(close_after_first_result()) < 0.2
+
+def test_aborted_upload_keeps_loop_responsive(fake_engine):
+    fake_engine.delay = 1.0
+
+    async def uploads():
+        for i in range(3):
+            yield f"upload{i}.png", encode_png(time.time_ns() + i), None
+        await asyncio.sleep(0.1)  # OCR of the first parts is underway
+        raise ConnectionError("client went away")
+
+    async def abort_mid_upload():
+        start = time.perf_counter()
+        try:
+            await process_uploaded_images(uploads(), PreprocessingOptions(), TextProcessingOptions())
+        except ConnectionError:
+            return time.perf_counter() - start
+
+    assert asyncio.run(abort_mid_upload()) < 0.3
+
+def test_batch_reads_and_hashes_each_file_once(fake_engine, image_files, monkeypatch):
+    reads, hashes = [], []
+    read_file, hash_bytes = ocr_processor._read_file, ocr_processor._hash_bytes
+    monkeypatch.setattr(ocr_processor, "_read_file", lambda path: reads.append(path) or read_file(path))
+    monkeypatch.setattr(ocr_processor, "_hash_bytes", lambda data: hashes.append(data) or hash_bytes(data))
+
+    async def collect():
+        return [result async for _, result in iter_batch_results(image_files, PreprocessingOptions(), TextProcessingOptions())]
+
+    assert all(result.success for result in asyncio.run(collect()))
+    assert sorted(reads) == sorted(image_files)
+    assert len(hashes) == len(image_files)
@@ -0,0 +1,22 @@
+import asyncio
+
+import orjson
+
+from models import BulkIngestRequest
+from core.bulk_ingest import run_bulk_ingest
+
+def test_resume_retries_failed_files(fake_engine, image_files, tmp_path):
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"not an image")
+    output_path = str(tmp_path / "out.jsonl")
+    request = BulkIngestRequest(source=str(tmp_path / "*.png"), output_path=output_path, resume=True)
+
+    first = asyncio.run(run_bulk_ingest(request))
+    broken.write_bytes(open(image_files[0], "rb").read())
+    second = asyncio.run(run_bulk_ingest(request))
+
+    assert (first["files_processed"], first["files_failed"]) == (len(image_files), 1)
+    assert (second["files_processed"], second["files_failed"], second["files_skipped"]) == (1, 0, len(image_files))
+    with open(output_path, "rb") as f:
+        records = [orjson.loads(line) for line in f]
+    assert [r["success"] for r in records if r["file_path"] == str(broken)] == [False, True]
@@ -0,0 +1,36 @@
+import zipfile
+
+from models import DocumentExtractionRequest
+from core.document_processor import extract_text_from_document
+from tests.conftest import encode_png
+
+_DOCUMENT = (
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    ' xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+    ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><w:body>'
+    '<w:p><w:r><w:t>Before</w:t></w:r></w:p>'
+    '<w:p><w:r><a:blip r:embed="rId1"/></w:r></w:p>'
+    '<w:p><w:r><a:blip r:embed="rId2"/></w:r></w:p>'
+    '<w:p><w:r><w:t>After</w:t></w:r></w:p>'
+    '</w:body></w:document>'
+)
+_RELS = (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/image" Target="media/missing.png"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/image" Target="media/image.png"/>'
+    '</Relationships>'
+)
+
+def test_docx_image_missing_from_archive_is_skipped(fake_engine, tmp_path):
+    docx_path = tmp_path / "missing_image.docx"
+    with zipfile.ZipFile(docx_path, "w") as docx:
+        docx.writestr("word/document.xml", _DOCUMENT)
+        docx.writestr("word/_rels/document.xml.rels", _RELS)
+        docx.writestr("word/media/image.png", encode_png(93))
+
+    result = extract_text_from_document(str(docx_path), DocumentExtractionRequest(file_path=str(docx_path), ocr_images=True))
+
+    assert result.success
+    lines = result.text.split("\n")
+    assert lines[0] == "Before" and lines[-1] == "After" and len(lines) > 2
+    assert (result.metadata["images"], result.metadata["images_ocr"], result.metadata["images_skipped"]) == (2, 1, 1)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from core.engine_adapter import recognize_image, reset_copy_counter, get_copy_count
+
+class Cv2Engine:
+    """Engine exposing the ndarray entry point."""
+    def recognize_cv2(self, image):
+        return {"lines": []}
+
+class PilEngine:
+    """Engine with only the PIL entry point."""
+    def recognize_pil(self, image):
+        return {"lines": []}
+
+def _copies(engine, image: np.ndarray) -> int:
+    reset_copy_counter()
+    recognize_image(engine, image)
+    return get_copy_count()
+
+GRAY = np.zeros((32, 48), dtype=np.uint8)
+BGR = np.zeros((32, 48, 3), dtype=np.uint8)
+BGRA = np.zeros((32, 48, 4), dtype=np.uint8)
+
+@pytest.mark.parametrize("image, expected", [
+    (BGRA, 0),                          # Engine layout, passed by pointer
+    (GRAY, 1),                          # The engine converts to BGRA
+    (BGR, 1),
+    (BGRA[:, ::2], 1),                  # Non-contiguous: made contiguous first
+    (BGR[:, ::2], 1),                   # Converted by the engine, which copies anyway
+    (BGRA.astype(np.float32), 1),       # Converted to uint8
+])
+def test_ndarray_entry_point_copies(image, expected):
+    assert _copies(Cv2Engine(), image) == expected
+
+@pytest.mark.parametrize("image, expected", [
+    (GRAY, 0),                          # Mode 'L' shares the buffer
+    (BGR, 1),                           # PIL has no BGR(A) modes
+    (BGRA, 1),
+    (GRAY[:, ::2], 1),
+    (BGR[:, ::2], 2),
+])
+def test_pil_fallback_copies(image, expected):
+    assert _copies(PilEngine(), image) == expected
@@ -0,0 +1,55 @@
+import asyncio
+import functools
+import os
+import time
+
+import orjson
+
+from models import BatchOCRRequest, BulkIngestRequest
+from core.jobs import JobStore
+from api.jobs_router import _run_batch_job, _run_ingest_job
+
+def test_batch_job_completes(fake_engine, image_files):
+    async def run():
+        store = JobStore()
+        job = store.submit("batch", functools.partial(_run_batch_job, request=BatchOCRRequest(file_paths=image_files)))
+        await job.task
+        return job
+
+    job = asyncio.run(run())
+    assert job.status == "completed"
+    assert job.result["files_processed"] == len(image_files)
+    assert job.partial_results == []
+
+def test_cancelling_running_batch_job_releases_loop(fake_engine, image_files):
+    fake_engine.delay = 1.0
+
+    async def cancel_mid_batch():
+        store = JobStore()
+        job = store.submit("batch", functools.partial(_run_batch_job, request=BatchOCRRequest(file_paths=image_files)))
+        while not job.partial_results:
+            await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        store.cancel(job.id)
+        await asyncio.wait([job.task])
+        return job, time.perf_counter() - start
+
+    job, elapsed = asyncio.run(cancel_mid_batch())
+    assert job.status == "cancelled"
+    assert elapsed < 0.2
+
+def test_ingest_job_writes_every_image(fake_engine, image_files, tmp_path):
+    output_path = str(tmp_path / "out.jsonl")
+    request = BulkIngestRequest(source=os.path.dirname(image_files[0]), output_path=output_path)
+
+    async def run():
+        store = JobStore()
+        job = store.submit("ingest", functools.partial(_run_ingest_job, request=request))
+        await job.task
+        return job
+
+    job = asyncio.run(run())
+    assert job.status == "completed"
+    assert job.result["files_processed"] == len(image_files)
+    with open(output_path, "rb") as f:
+        assert sorted(orjson.loads(line)["file_path"] for line in f) == sorted(image_files)
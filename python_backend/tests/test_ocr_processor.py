@@ -0,0 +1,34 @@
+import io
+import time
+
+import numpy as np
+from PIL import Image
+
+from models import PreprocessingOptions
+from core import ocr_processor
+from core.ocr_processor import perform_ocr_on_bytes
+
+def encode_tiff(seed: int, page_count: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    pages = [Image.fromarray(rng.integers(0, 256, (48, 64, 3), dtype=np.uint8)) for _ in range(page_count)]
+    buffer = io.BytesIO()
+    pages[0].save(buffer, format="TIFF", save_all=True, append_images=pages[1:])
+    return buffer.getvalue()
+
+def test_partial_multi_page_result_is_not_cached(fake_engine, monkeypatch):
+    failures = [RuntimeError("engine failed")]
+
+    def recognize(ocr_instance, image):
+        if failures:
+            raise failures.pop()
+        return fake_engine.recognize(ocr_instance, image)
+
+    monkeypatch.setattr(ocr_processor, "recognize_image", recognize)
+    data = encode_tiff(time.time_ns(), 3)
+
+    first = perform_ocr_on_bytes(data, PreprocessingOptions())
+    second = perform_ocr_on_bytes(data, PreprocessingOptions())
+
+    assert first.metadata["pages_failed"] == 1
+    assert second.metadata["pages_failed"] == 0
+    assert [page.success for page in second.pages] == [True] * 3
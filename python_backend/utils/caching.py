@@ -36,7 +36,7 @@ class CompressedLRUCache:
         decompressed_data = gzip.decompress(compressed_data)
         return pickle.loads(decompressed_data)
         
-    def get(self, key: str) -> Optional[Dict]:
+    def get(self, key: str) -> Optional[Any]:
         """Get cached result if available and not expired."""
         with self._lock:
             if key not in self._cache:
@@ -68,7 +68,13 @@ class CompressedLRUCache:
                 update_performance_metrics("cache_miss")
                 return None
     
-    def put(self, key: str, result: Dict):
+    def contains(self, key: str) -> bool:
+        """Check for a live entry without touching LRU order or hit/miss metrics."""
+        with self._lock:
+            cached_item = self._cache.get(key)
+            return cached_item is not None and time.time() - cached_item['timestamp'] <= self.ttl_seconds
+
+    def put(self, key: str, result: Any):
         """Cache result with compression and LRU eviction."""
         with self._lock:
             try:
@@ -120,11 +126,15 @@ class CompressedLRUCache:
 ocr_cache = CompressedLRUCache()
 cache_lock = threading.RLock()  # Keep for backward compatibility
 
-def get_cached_result(cache_key: str) -> Optional[Dict]:
+def get_cached_result(cache_key: str) -> Optional[Any]:
     """Get cached OCR result if available and not expired."""
     return ocr_cache.get(cache_key)
 
-def cache_result(cache_key: str, result: Dict):
+def is_result_cached(cache_key: str) -> bool:
+    """Check whether a live cached result exists, without counting a hit or miss."""
+    return ocr_cache.contains(cache_key)
+
+def cache_result(cache_key: str, result: Any):
     """Cache OCR result with compression and LRU eviction."""
     ocr_cache.put(cache_key, result)
 
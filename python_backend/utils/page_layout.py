@@ -0,0 +1,80 @@
+"""
+Hierarchical page structure: page -> blocks -> paragraphs -> lines -> words.
+
+Built by the text postprocessor from the blocks it already orders, so the
+hierarchy follows the same reading order and paragraph breaks as the page text.
+Words are referenced by index into the page's word columns (OCRResult.word_details)
+and engine lines by index into its line columns (OCRResult.text_lines), so no word
+geometry is duplicated.
+"""
+from dataclasses import dataclass
+from typing import List, Optional
+
+from core.ocr_columns import Box
+from models import BoundingBox, LayoutLine, LayoutParagraph, LayoutBlock, PageLayout
+
+@dataclass
+class StructuredLine:
+    """One line of text in reading order."""
+    text: str
+    bbox: Box
+    confidence: float
+    word_ids: List[int]          # Indices into the page's WordColumns
+    line_id: Optional[int] = None  # Index into the page's LineColumns, None for word-grouped lines
+
+@dataclass
+class StructuredParagraph:
+    id: int  # Page-wide paragraph id, in reading order
+    lines: List[StructuredLine]
+    bbox: Box
+
+@dataclass
+class StructuredBlock:
+    """Column or table region holding paragraphs."""
+    id: int
+    block_type: str  # 'text' or 'table'
+    column_index: int
+    paragraphs: List[StructuredParagraph]
+    bbox: Box
+    table_index: Optional[int] = None  # Index into the page's tables for 'table' blocks
+
+@dataclass
+class StructuredPage:
+    layout_type: str
+    blocks: List[StructuredBlock]
+
+    def to_model(self) -> PageLayout:
+        """Materialize the response model (no re-validation)."""
+        def bbox(box: Box) -> BoundingBox:
+            return BoundingBox.model_construct(x=box.x, y=box.y, width=box.width, height=box.height)
+        return PageLayout.model_construct(
+            layout_type=self.layout_type,
+            blocks=[
+                LayoutBlock.model_construct(
+                    id=block.id, block_type=block.block_type, column_index=block.column_index,
+                    bbox=bbox(block.bbox), table_index=block.table_index,
+                    paragraphs=[
+                        LayoutParagraph.model_construct(
+                            id=paragraph.id, bbox=bbox(paragraph.bbox),
+                            lines=[
+                                LayoutLine.model_construct(
+                                    text=line.text, confidence=line.confidence, bbox=bbox(line.bbox),
+                                    word_indices=line.word_ids, line_index=line.line_id
+                                )
+                                for line in paragraph.lines
+                            ]
+                        )
+                        for paragraph in block.paragraphs
+                    ]
+                )
+                for block in self.blocks
+            ]
+        )
+
+def union_box(boxes: List[Box]) -> Box:
+    """Smallest box enclosing all of `boxes`."""
+    left = min(b.x for b in boxes)
+    top = min(b.y for b in boxes)
+    right = max(b.x + b.width for b in boxes)
+    bottom = max(b.y + b.height for b in boxes)
+    return Box(left, top, right - left, bottom - top)
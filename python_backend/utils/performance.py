@@ -21,6 +21,9 @@ class PerformanceMetrics:
             "videos_processed": 0,
             "documents_processed": 0,
             "frames_processed_from_videos": 0,
+            "adaptive_fast_path": 0,
+            "adaptive_fallback": 0,
+            "engine_input_copies": 0,
             "startup_time": time.time(),
         }
 
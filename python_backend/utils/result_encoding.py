@@ -0,0 +1,89 @@
+"""
+Binary encodings of OCR results for machine-to-machine clients.
+
+MessagePack carries the same payload as the JSON response, except that word and
+line geometry travel as packed little-endian columns (CompactOCRResult.to_dict
+with packed=True). An Arrow IPC stream holds one row per result; words and lines
+are list<struct> columns whose boxes are int32 child columns, and metadata,
+tables, layout and pages are JSON strings. Batch summary fields go into the Arrow
+schema metadata under b"batch".
+
+Both packages are optional and imported on first use, so the encoders raise
+ImportError when theirs is missing.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import orjson
+
+from core.ocr_columns import CompactOCRResult
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+def encode_msgpack(payload: Any) -> bytes:
+    """MessagePack encoding of a payload built with packed columns."""
+    import msgpack
+    return msgpack.packb(payload, use_bin_type=True)
+
+def _geometry_column(pa, columns: List[Any], with_angle: bool):
+    """list<struct> column of words or lines, one list per result, built from concatenated columns."""
+    counts = [len(c) for c in columns]
+    offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int32)
+    boxes = np.concatenate([c.boxes for c in columns]).astype(np.int32).reshape(-1, 4)
+    polygons = np.concatenate([c.polygons for c in columns]).astype(np.int32).reshape(-1)
+    children = [
+        pa.array([text for c in columns for text in c.text], type=pa.string()),
+        pa.array(np.concatenate([c.confidence for c in columns]).astype(np.float64)),
+        pa.array(boxes[:, 0]), pa.array(boxes[:, 1]), pa.array(boxes[:, 2]), pa.array(boxes[:, 3]),
+        pa.FixedSizeListArray.from_arrays(pa.array(polygons), 8),
+    ]
+    names = ["text", "confidence", "x", "y", "width", "height", "polygon"]
+    if with_angle:
+        children.append(pa.array(np.repeat([c.angle for c in columns], counts).astype(np.float64)))
+        names.append("textline_orientation_angle")
+    return pa.ListArray.from_arrays(pa.array(offsets), pa.StructArray.from_arrays(children, names=names))
+
+def encode_arrow_stream(results: List[CompactOCRResult], detail_level: Optional[str] = None,
+                        fields: Optional[List[str]] = None, batch: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Arrow IPC stream with one row per result, honoring the detail level and
+    field selection like the JSON response. Polygons are fixed-size lists of
+    eight int32 values (x1, y1, ..., x4, y4).
+    """
+    import pyarrow as pa
+
+    rows = [r.to_dict(detail_level, fields, packed=True) for r in results]
+    keys = list(rows[0]) if rows else []
+    scalar_types = {
+        "text": pa.string(), "confidence": pa.float64(), "processing_time": pa.float64(),
+        "word_count": pa.int64(), "line_count": pa.int64(), "file_path": pa.string(),
+        "success": pa.bool_(), "error_message": pa.string(), "engine_used": pa.string(),
+    }
+    arrays, names = [], []
+    for key in keys:
+        if key == "word_details":
+            arrays.append(_geometry_column(pa, [r.words for r in results], with_angle=False))
+        elif key == "text_lines":
+            arrays.append(_geometry_column(pa, [r.lines for r in results], with_angle=True))
+        elif key in scalar_types:
+            arrays.append(pa.array([row[key] for row in rows], type=scalar_types[key]))
+        elif key == "pages":  # Per-page results of multi-page images, unpacked
+            arrays.append(pa.array([
+                orjson.dumps([page.to_dict(detail_level, fields) for page in r.pages],
+                             option=orjson.OPT_SERIALIZE_NUMPY).decode() if r.pages is not None else None
+                for r in results
+            ], type=pa.string()))
+        else:  # metadata, tables, layout
+            arrays.append(pa.array([orjson.dumps(row[key], option=orjson.OPT_SERIALIZE_NUMPY).decode()
+                                    for row in rows], type=pa.string()))
+        names.append(key)
+
+    table = pa.Table.from_arrays(arrays, names=names)
+    if batch is not None:
+        table = table.replace_schema_metadata({b"batch": orjson.dumps(batch)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
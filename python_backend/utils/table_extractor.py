@@ -0,0 +1,252 @@
+"""
+Table structure extraction from OCR word boxes.
+
+Row and column separators come from gaps in the projected word boxes, or from
+ruling lines found in the page image when those are available. Words are then
+assigned to grid cells in one vectorized pass; a cell whose words cross a column
+separator spans every column it covers. Grids export to CSV and Markdown.
+"""
+import csv
+import io
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from core.ocr_columns import Box, WordColumns
+from models import BoundingBox, TableCell, TableStructure
+from config import (
+    TABLE_MIN_GUTTER_RATIO, TABLE_GUTTER_ROW_TOLERANCE,
+    TABLE_MIN_FILL_RATIO, TABLE_MAX_WORDS_PER_CELL, TABLE_RULING_MIN_LENGTH_RATIO
+)
+
+logger = logging.getLogger(__name__)
+
+RulingLines = Tuple[np.ndarray, np.ndarray]  # (y of horizontal lines, x of vertical lines)
+RulingLineSource = Callable[[int], RulingLines]  # minimum line length in pixels -> lines
+TABLE_EXPORT_FORMATS = ("csv", "markdown")
+
+@dataclass
+class Cell:
+    """Grid cell with the words it holds (indices into the page's WordColumns)."""
+    row: int
+    col: int
+    row_span: int
+    col_span: int
+    text: str
+    confidence: float
+    bbox: Box
+    word_ids: List[int]
+
+@dataclass
+class TableGrid:
+    """Detected table as a grid of cells."""
+    rows: int
+    columns: int
+    cells: List[Cell]
+    bbox: Box
+    detection_method: str  # 'gaps' or 'ruling_lines'
+    export: Optional[str] = None
+
+    def to_rows(self) -> List[List[str]]:
+        """Dense rows x columns text grid; spanned positions stay empty."""
+        grid = [[""] * self.columns for _ in range(self.rows)]
+        for cell in self.cells:
+            grid[cell.row][cell.col] = cell.text
+        return grid
+
+    def to_csv(self) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(self.to_rows())
+        return buffer.getvalue()
+
+    def to_markdown(self) -> str:
+        """GitHub-flavored Markdown table; the first grid row is the header."""
+        rows = [[text.replace("|", "\\|") for text in row] for row in self.to_rows()]
+        lines = ["| " + " | ".join(rows[0]) + " |", "|" + " --- |" * self.columns]
+        lines.extend("| " + " | ".join(row) + " |" for row in rows[1:])
+        return "\n".join(lines)
+
+    def render(self, export_format: str) -> str:
+        if export_format == "csv":
+            return self.to_csv()
+        if export_format == "markdown":
+            return self.to_markdown()
+        raise ValueError(f"Unsupported table export format: {export_format}")
+
+    def to_model(self) -> TableStructure:
+        """Materialize the response model (no re-validation)."""
+        def bbox(box: Box) -> BoundingBox:
+            return BoundingBox.model_construct(x=box.x, y=box.y, width=box.width, height=box.height)
+        return TableStructure.model_construct(
+            rows=self.rows,
+            columns=self.columns,
+            cells=[
+                TableCell.model_construct(
+                    row=c.row, col=c.col, row_span=c.row_span, col_span=c.col_span,
+                    text=c.text, confidence=c.confidence, bbox=bbox(c.bbox)
+                )
+                for c in self.cells
+            ],
+            bbox=bbox(self.bbox),
+            detection_method=self.detection_method,
+            export=self.export,
+        )
+
+def _coverage_gaps(starts: np.ndarray, ends: np.ndarray, max_count: int, min_width: float) -> np.ndarray:
+    """
+    Centers of the runs inside [min(starts), max(ends)) covered by at most
+    `max_count` of the intervals and wider than `min_width`. Runs touching the
+    extent edges are margins rather than separators and are dropped.
+    """
+    origin = int(starts.min())
+    size = int(ends.max()) - origin + 1
+    count = np.cumsum(np.bincount(starts - origin, minlength=size) - np.bincount(ends - origin, minlength=size))[:-1]
+    flips = np.diff(np.concatenate(([0], (count <= max_count).astype(np.int8), [0])))
+    run_starts, run_ends = np.flatnonzero(flips == 1), np.flatnonzero(flips == -1)
+    keep = (run_starts > 0) & (run_ends < len(count)) & ((run_ends - run_starts) > min_width)
+    run_starts, run_ends = run_starts[keep], run_ends[keep]
+    if max_count == 0:
+        # Uncovered runs are uniformly lowest; their midpoints are the separators
+        return origin + (run_starts + run_ends) / 2
+    # Separate at the widest least-covered stretch of each run, so the rows that
+    # do cross the gutter are the ones that span it
+    centers = []
+    for a, b in zip(run_starts.tolist(), run_ends.tolist()):
+        segment = count[a:b]
+        lowest = np.diff(np.concatenate(([0], (segment == segment.min()).astype(np.int8), [0])))
+        low_starts, low_ends = np.flatnonzero(lowest == 1), np.flatnonzero(lowest == -1)
+        widest = int(np.argmax(low_ends - low_starts))
+        centers.append(origin + a + (low_starts[widest] + low_ends[widest]) / 2)
+    return np.array(centers, dtype=np.float64)
+
+def _merge_intervals(starts: np.ndarray, ends: np.ndarray, group: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Union overlapping [start, end] intervals within each group. Returns the merged
+    (starts, ends), the sort order of the inputs and each sorted input's merged
+    interval index.
+    """
+    order = np.lexsort((starts, group))
+    s, e, g = starts[order], ends[order], group[order]
+    # Offset each group past the previous one so one running max never crosses groups
+    shift = g * (int(e.max() - s.min()) + 2)
+    reach = np.maximum.accumulate(e - s.min() + shift) - shift + s.min()
+    new = np.concatenate(([True], (g[1:] != g[:-1]) | (s[1:] > reach[:-1])))
+    first = np.flatnonzero(new)
+    return s[first], np.maximum.reduceat(e, first), order, np.cumsum(new) - 1
+
+def _build_grid(words: WordColumns, row_seps: np.ndarray, col_seps: np.ndarray, method: str,
+                require_tabular: bool = False) -> Optional[TableGrid]:
+    """
+    Assign words to the grid cut by the given separators. With `require_tabular`,
+    grids that are sparse or hold long runs of text per cell are rejected (None)
+    before any cell objects are built.
+    """
+    boxes = words.boxes.astype(np.int64)
+    left, top = boxes[:, 0], boxes[:, 1]
+    right, bottom = left + boxes[:, 2], top + boxes[:, 3]
+    center_y = top + boxes[:, 3] / 2
+
+    row = np.searchsorted(row_seps, center_y)
+    first_col = np.searchsorted(col_seps, left, side="right")
+    last_col = np.maximum(np.searchsorted(col_seps, right, side="left"), first_col)
+
+    # Words of a row whose column ranges overlap share a cell
+    _, _, order, cell_of_sorted = _merge_intervals(first_col, last_col, row)
+    cell = np.empty(len(words), dtype=np.int64)
+    cell[order] = cell_of_sorted
+
+    # Words inside a cell in reading order: text line band, then x
+    band = np.round(center_y / max(float(np.median(boxes[:, 3])), 1.0))
+    members = np.lexsort((left, band, cell))
+    starts = np.flatnonzero(np.concatenate(([True], cell[members][1:] != cell[members][:-1])))
+    cell_row = row[members[starts]]
+    cell_col = np.minimum.reduceat(first_col[members], starts)
+    cell_end = np.maximum.reduceat(last_col[members], starts)
+
+    # Drop grid rows and columns no cell touches (e.g. between double ruling lines)
+    used_rows = np.unique(cell_row)
+    row_index = np.searchsorted(used_rows, cell_row)
+    covered = np.zeros(len(col_seps) + 2, dtype=np.int64)
+    np.add.at(covered, cell_col, 1)
+    np.add.at(covered, cell_end + 1, -1)
+    col_used = np.cumsum(covered)[:-1] > 0
+    col_index = np.cumsum(col_used) - 1
+    n_rows, n_cols = len(used_rows), int(col_used.sum())
+    if n_rows < 2 or n_cols < 2:
+        return None
+    counts = np.diff(np.append(starts, len(members)))
+    if require_tabular:
+        spans = col_index[cell_end] - col_index[cell_col] + 1
+        if (spans.sum() / (n_rows * n_cols) < TABLE_MIN_FILL_RATIO or
+                np.median(counts) > TABLE_MAX_WORDS_PER_CELL):
+            return None
+
+    x_min = np.minimum.reduceat(left[members], starts)
+    y_min = np.minimum.reduceat(top[members], starts)
+    x_max = np.maximum.reduceat(right[members], starts)
+    y_max = np.maximum.reduceat(bottom[members], starts)
+    confidence = np.add.reduceat(words.confidence[members], starts) / counts
+
+    ids = members.tolist()
+    bounds = np.append(starts, len(members)).tolist()
+    cells = []
+    for k in range(len(starts)):
+        word_ids = ids[bounds[k]:bounds[k + 1]]
+        col = int(col_index[cell_col[k]])
+        cells.append(Cell(
+            row=int(row_index[k]), col=col, row_span=1,
+            col_span=int(col_index[cell_end[k]]) - col + 1,
+            text=" ".join(words.text[i] for i in word_ids),
+            confidence=float(confidence[k]),
+            bbox=Box(int(x_min[k]), int(y_min[k]), int(x_max[k] - x_min[k]), int(y_max[k] - y_min[k])),
+            word_ids=word_ids,
+        ))
+    cells.sort(key=lambda c: (c.row, c.col))
+
+    page = Box(int(left.min()), int(top.min()), int(right.max() - left.min()), int(bottom.max() - top.min()))
+    return TableGrid(rows=n_rows, columns=n_cols, cells=cells, bbox=page, detection_method=method)
+
+def extract_table(words: WordColumns, ruling_lines: Optional[RulingLineSource] = None) -> Optional[TableGrid]:
+    """
+    Detect a table over the page's words. Column gutters are x runs that at most
+    TABLE_GUTTER_ROW_TOLERANCE of the text rows cross; rows are separated by
+    uncovered y runs. When that finds columns and `ruling_lines` is given, it is
+    called (lazily, since it scans the image) with a minimum line length longer
+    than glyph strokes, and ruling lines inside the text extent take precedence
+    as separators. Returns None when no table is found.
+    """
+    if len(words) < 4:
+        return None
+
+    boxes = words.boxes.astype(np.int64)
+    left, top = boxes[:, 0], boxes[:, 1]
+    right, bottom = left + boxes[:, 2], top + boxes[:, 3]
+    median_height = float(np.median(boxes[:, 3]))
+
+    row_seps = _coverage_gaps(top, bottom, 0, 0)
+    row = np.searchsorted(row_seps, top + boxes[:, 3] / 2)
+    row_starts, row_ends, _, _ = _merge_intervals(left, right, row)
+    # Spanning rows (titles, merged cells) may cross a gutter; tiny grids get no slack
+    rows = len(row_seps) + 1
+    max_crossing = int(np.ceil(TABLE_GUTTER_ROW_TOLERANCE * rows)) if rows >= 4 else 0
+    col_seps = _coverage_gaps(row_starts, row_ends, max_crossing, TABLE_MIN_GUTTER_RATIO * median_height)
+    if not len(col_seps):
+        return None
+
+    if ruling_lines is not None:
+        try:
+            line_ys, line_xs = ruling_lines(int(TABLE_RULING_MIN_LENGTH_RATIO * median_height))
+        except Exception as e:
+            logger.warning(f"Ruling line detection failed, using box gaps: {e}")
+        else:
+            line_ys = line_ys[(line_ys > top.min()) & (line_ys < bottom.max())]
+            line_xs = line_xs[(line_xs > left.min()) & (line_xs < right.max())]
+            if len(line_ys) and len(line_xs):
+                grid = _build_grid(words, np.sort(line_ys), np.sort(line_xs), "ruling_lines")
+                if grid is not None:
+                    return grid
+
+    # Gap grids need to look like a table: well filled with short cells
+    return _build_grid(words, row_seps, col_seps, "gaps", require_tabular=True)
@@ -4,14 +4,29 @@ Handles proper text ordering, line grouping, and layout preservation.
 """
 import numpy as np
 import logging
-from typing import List, Tuple, Dict, Any
-from dataclasses import dataclass
+import re
+import threading
+from typing import List, Optional, Tuple, Dict, Any
+from dataclasses import dataclass, field
 from enum import Enum
 
-from models import WordDetail, TextLine, BoundingBox
+from core.ocr_columns import Box, WordColumns, LineColumns
+from utils.table_extractor import RulingLineSource, TableGrid, extract_table
+from utils.page_layout import StructuredLine, StructuredParagraph, StructuredBlock, StructuredPage, union_box
 
 logger = logging.getLogger(__name__)
 
+# Whitespace runs the normalizer rewrites; a lone space or line break is already normal.
+# Leading with a bare \s lets the regex engine skip non-whitespace at C speed.
+_WHITESPACE_RUN = re.compile(r'\s(?:\s|(?<![ \n]))\s*')
+
+def _normalize_whitespace_run(match: "re.Match[str]") -> str:
+    """Spaces collapse to one, a single line break stays, more become a paragraph break"""
+    breaks = match.group().count('\n')
+    if breaks > 1:
+        return '\n\n'
+    return '\n' if breaks else ' '
+
 class ReadingOrder(Enum):
     """Text reading order patterns"""
     LEFT_TO_RIGHT_TOP_TO_BOTTOM = "ltr_ttb"
@@ -30,14 +45,21 @@ class LayoutType(Enum):
 class TextBlock:
     """Represents a block of related text with spatial information"""
     text: str
-    bbox: BoundingBox
+    bbox: Box
     confidence: float
-    word_details: List[WordDetail]
-    text_lines: List[TextLine]
-    is_paragraph: bool = False
+    word_ids: List[int]  # Indices into the page's WordColumns
+    line_ids: List[int]  # Indices into the page's LineColumns
     column_index: int = 0
     block_type: str = "text"
 
+@dataclass
+class StructuredText:
+    """Post-processing output for one page"""
+    text: str
+    layout_type: LayoutType = LayoutType.SINGLE_COLUMN
+    tables: List[TableGrid] = field(default_factory=list)
+    layout: Optional[StructuredPage] = None  # Only when requested from process_page
+
 class AdvancedTextPostprocessor:
     """
     Advanced text post-processor that improves OCR output by:
@@ -45,401 +67,503 @@ class AdvancedTextPostprocessor:
     2. Grouping text into logical blocks and paragraphs
     3. Handling multi-column layouts and tables
     4. Preserving document structure
+    
+    Fragment merging and layout analysis are separate stages that can be
+    switched off; with layout analysis off, blocks are simply ordered as a
+    single column, which is the cheap path for plain-text bulk jobs.
     """
     
-    def __init__(self, reading_order: ReadingOrder = ReadingOrder.LEFT_TO_RIGHT_TOP_TO_BOTTOM):
+    def __init__(self, reading_order: ReadingOrder = ReadingOrder.LEFT_TO_RIGHT_TOP_TO_BOTTOM,
+                 enable_layout_analysis: bool = True, preserve_line_breaks: bool = True,
+                 merge_fragmented_words: bool = True):
         self.reading_order = reading_order
+        self.enable_layout_analysis = enable_layout_analysis
+        self.preserve_line_breaks = preserve_line_breaks
+        self.merge_fragmented_words = merge_fragmented_words
         self.line_height_threshold = 1.5  # For detecting line breaks
         self.paragraph_spacing_threshold = 2.0  # For detecting paragraph breaks
         self.column_gap_threshold = 0.1  # Minimum gap between columns (relative to page width)
+        self.fragment_gap_ratio = 0.15  # Max gap between word fragments (relative to word height)
+        self.fragment_height_ratio = 1.3  # Max height ratio between word fragments
         
-    def process_ocr_result(self, word_details: List[WordDetail], text_lines: List[TextLine]) -> str:
+    def process_ocr_result(self, words: WordColumns, lines: LineColumns) -> str:
         """
-        Main processing function that takes OCR word details and returns properly structured text.
+        Main processing function that takes OCR word columns and returns properly structured text.
         
         Args:
-            word_details: List of recognized words with bounding boxes
-            text_lines: Optional list of text lines from OCR engine
+            words: Recognized words with bounding boxes
+            lines: Optional text lines from OCR engine (may be empty)
             
         Returns:
             Properly structured text with preserved layout
         """
-        if not word_details:
-            return ""
+        return self.process_page(words, lines).text
+    
+    def process_page(self, words: WordColumns, lines: LineColumns,
+                     ruling_lines: Optional[RulingLineSource] = None,
+                     build_layout: bool = False) -> StructuredText:
+        """
+        Structure one page: the text plus the layout type and any detected table.
+        `ruling_lines` lazily supplies table ruling lines from the page image.
+        With `build_layout`, the page hierarchy (blocks, paragraphs, lines) is
+        returned too, referencing `words` and `lines` by index.
+        """
+        if not len(words):
+            return StructuredText(text="")
             
-        logger.debug(f"Processing {len(word_details)} word details")
+        logger.debug(f"Processing {len(words)} word details")
         
         try:
-            # Step 1: Analyze document layout
-            layout_type = self._analyze_layout(word_details)
+            # Step 1: Merge words the engine split into fragments
+            source_words, fragment_starts = words, None
+            if self.merge_fragmented_words:
+                words, lines, fragment_starts = self._merge_fragmented_words(words, lines)
+            
+            # Step 2: Analyze document layout
+            table = None
+            if self.enable_layout_analysis:
+                layout_type, table = self._analyze_layout(words, ruling_lines)
+            else:
+                layout_type = LayoutType.SINGLE_COLUMN
             logger.debug(f"Detected layout type: {layout_type}")
             
-            # Step 2: Group words into logical text blocks
-            if text_lines:
-                text_blocks = self._group_by_text_lines(text_lines)
+            # Step 3: Group words into logical text blocks
+            if len(lines):
+                text_blocks = self._group_by_text_lines(lines)
             else:
-                text_blocks = self._group_words_into_blocks(word_details)
+                text_blocks = self._group_words_into_blocks(words)
             
             logger.debug(f"Created {len(text_blocks)} text blocks")
             
-            # Step 3: Sort blocks according to reading order
-            sorted_blocks = self._sort_by_reading_order(text_blocks, layout_type)
+            # Step 4: Sort blocks according to reading order
+            sorted_blocks = self._sort_by_reading_order(text_blocks, layout_type, words)
             
-            # Step 4: Apply layout-specific processing
+            # Step 5: Apply layout-specific processing
             if layout_type == LayoutType.MULTI_COLUMN:
                 structured_text = self._process_multi_column_layout(sorted_blocks)
             elif layout_type == LayoutType.TABLE:
-                structured_text = self._process_table_layout(sorted_blocks)
+                structured_text = self._process_table_layout(table)
             else:
                 structured_text = self._process_single_column_layout(sorted_blocks)
             
-            # Step 5: Clean up and format final text
+            # Step 6: Clean up and format final text
             final_text = self._clean_and_format_text(structured_text)
             
             logger.debug(f"Final text length: {len(final_text)}")
-            return final_text
+            layout = None
+            if build_layout:
+                layout = self._build_page_layout(sorted_blocks, layout_type, source_words, fragment_starts)
+            return StructuredText(text=final_text, layout_type=layout_type,
+                                  tables=[table] if table is not None else [], layout=layout)
             
         except Exception as e:
             logger.error(f"Error in text post-processing: {e}")
             # Fallback to simple concatenation
-            return " ".join([word.text for word in word_details if word.text.strip()])
+            return StructuredText(text=" ".join([text for text in words.text if text.strip()]))
     
-    def _analyze_layout(self, word_details: List[WordDetail]) -> LayoutType:
-        """Analyze the document layout type based on word positions"""
-        if len(word_details) < 3:
-            return LayoutType.SINGLE_COLUMN
+    def _merge_fragmented_words(self, words: WordColumns,
+                                lines: LineColumns) -> Tuple[WordColumns, LineColumns, Optional[np.ndarray]]:
+        """
+        Join words the engine split in two, in one pass over baseline-sorted words.
+        The engine emits words line by line in reading order, so fragments are
+        consecutive words of the same line on the same baseline whose gap is below
+        fragment_gap_ratio of the word height and whose heights are similar.
+        Returns merged columns for the text pipeline, where lines holding a merged
+        word get their text rebuilt, and the index of each merged word's first
+        fragment in `words` (None when nothing was merged).
+        """
+        if len(words) < 2:
+            return words, lines, None
+        
+        boxes = words.boxes.astype(np.int64)
+        left, heights = boxes[:, 0], boxes[:, 3]
+        right = left + boxes[:, 2]
+        center_y = boxes[:, 1] + heights / 2
+        
+        prev_h, next_h = heights[:-1], heights[1:]
+        taller, shorter = np.maximum(prev_h, next_h), np.maximum(np.minimum(prev_h, next_h), 1)
+        gap = left[1:] - right[:-1]
+        joins = ((words.line_ids[1:] == words.line_ids[:-1]) &
+                 (left[1:] >= left[:-1]) &
+                 (gap <= prev_h * self.fragment_gap_ratio) &
+                 (np.abs(center_y[1:] - center_y[:-1]) <= taller * 0.5) &
+                 (taller <= shorter * self.fragment_height_ratio))
+        if not joins.any():
+            return words, lines, None
+        
+        # Runs of joined words collapse into one word each
+        starts = np.flatnonzero(np.concatenate(([True], ~joins)))
+        last = np.append(starts[1:], len(words)) - 1
+        x_min = np.minimum.reduceat(left, starts)
+        y_min = np.minimum.reduceat(boxes[:, 1], starts)
+        x_max = np.maximum.reduceat(right, starts)
+        y_max = np.maximum.reduceat(boxes[:, 1] + heights, starts)
+        counts = last - starts + 1
+        
+        # Polygon from the left corners of the first fragment and the right corners of the last
+        head_poly, tail_poly = words.polygons[starts], words.polygons[last]
+        polygons = np.stack([head_poly[:, 0], tail_poly[:, 1], tail_poly[:, 2], head_poly[:, 3]], axis=1)
+        
+        text = list(words.text)
+        runs = [(a, b + 1) for a, b in zip(starts.tolist(), last.tolist()) if b > a]
+        merged_text = {a: "".join(text[a:b]) for a, b in runs}
+        merged = WordColumns(
+            text=[merged_text.get(a, text[a]) for a in starts.tolist()],
+            confidence=np.add.reduceat(words.confidence, starts) / counts,
+            boxes=np.stack([x_min, y_min, x_max - x_min, y_max - y_min], axis=1).astype(np.int32),
+            polygons=polygons,
+            line_ids=words.line_ids[starts],
+        )
+        logger.debug(f"Merged {len(words) - len(merged)} word fragments")
+        
+        if len(lines):
+            line_text = list(lines.text)
+            for a, b in runs:
+                line_id = int(words.line_ids[a])
+                if line_id >= 0:
+                    line_text[line_id] = line_text[line_id].replace(" ".join(text[a:b]), merged_text[a], 1)
+            lines = LineColumns(line_text, lines.confidence, lines.boxes, lines.polygons, lines.angle)
+        return merged, lines, starts
+    
+    def _analyze_layout(self, words: WordColumns,
+                        ruling_lines: Optional[RulingLineSource] = None) -> Tuple[LayoutType, Optional[TableGrid]]:
+        """Analyze the document layout type based on word positions; tables come with their grid"""
+        if len(words) < 3:
+            return LayoutType.SINGLE_COLUMN, None
+        
+        # A table needs a consistent cell grid, not just several columns
+        table = extract_table(words, ruling_lines)
+        if table is not None:
+            return LayoutType.TABLE, table
             
-        # Get page dimensions
-        all_boxes = [word.bbox for word in word_details]
-        page_left = min(box.x for box in all_boxes)
-        page_right = max(box.x + box.width for box in all_boxes)
-        page_top = min(box.y for box in all_boxes)
-        page_bottom = max(box.y + box.height for box in all_boxes)
+        # Get page extent from the box columns
+        boxes = words.boxes
+        page_left = int(boxes[:, 0].min())
+        page_right = int((boxes[:, 0] + boxes[:, 2]).max())
         page_width = page_right - page_left
-        page_height = page_bottom - page_top
         
         # Analyze column structure
-        columns = self._detect_columns(word_details, page_width, page_left, page_right)
+        columns = self._detect_columns(boxes, page_width, page_left, page_right)
         
         if len(columns) > 1:
-            # Check if it looks like a table (regular grid pattern)
-            if self._looks_like_table(word_details):
-                return LayoutType.TABLE
-            else:
-                return LayoutType.MULTI_COLUMN
+            return LayoutType.MULTI_COLUMN, None
         else:
-            return LayoutType.SINGLE_COLUMN
+            return LayoutType.SINGLE_COLUMN, None
     
-    def _detect_columns(self, word_details: List[WordDetail], page_width: int, page_left: int, page_right: int) -> List[Tuple[int, int]]:
-        """Detect column boundaries in the document"""
-        # Group words by their X positions
-        x_positions = []
-        for word in word_details:
-            x_positions.append(word.bbox.x)
-            x_positions.append(word.bbox.x + word.bbox.width)
-        
-        x_positions.sort()
-        
-        # Find gaps that might indicate column boundaries
-        gaps = []
+    def _detect_columns(self, boxes: np.ndarray, page_width: int, page_left: int, page_right: int) -> List[Tuple[int, int]]:
+        """
+        Detect column boundaries from the x-projection of the boxes.
+        Coverage is built with one bincount over box start/end edges; runs of
+        uncovered x wider than the gap threshold separate columns.
+        """
+        if len(boxes) == 0:
+            return [(page_left, page_right)]
+
+        starts = boxes[:, 0].astype(np.int64)
+        ends = starts + boxes[:, 2]
+        origin = int(starts.min())
+        size = int(ends.max()) - origin + 1
+        edges = np.bincount(starts - origin, minlength=size) - np.bincount(ends - origin, minlength=size)
+        covered = np.cumsum(edges)[:-1] > 0
+
+        # Uncovered runs strictly between the first box start and the last box end
+        flips = np.diff(covered.astype(np.int8))
+        gap_starts = np.flatnonzero(flips == -1) + 1 + origin
+        gap_ends = np.flatnonzero(flips == 1) + 1 + origin
         threshold = page_width * self.column_gap_threshold
-        
-        for i in range(1, len(x_positions)):
-            gap = x_positions[i] - x_positions[i-1]
-            if gap > threshold:
-                gaps.append((x_positions[i-1], x_positions[i]))
+        wide = (gap_ends - gap_starts) > threshold
+        gaps = list(zip(gap_starts[wide].tolist(), gap_ends[wide].tolist()))
         
         # Convert gaps to column boundaries
-        columns = []
         if not gaps:
-            columns = [(page_left, page_right)]
-        else:
-            # Add first column
-            columns.append((page_left, gaps[0][0]))
-            
-            # Add middle columns
-            for i in range(len(gaps) - 1):
-                columns.append((gaps[i][1], gaps[i+1][0]))
-            
-            # Add last column
-            columns.append((gaps[-1][1], page_right))
-        
+            return [(page_left, page_right)]
+        columns = [(page_left, gaps[0][0])]
+        columns.extend((gaps[i][1], gaps[i + 1][0]) for i in range(len(gaps) - 1))
+        columns.append((gaps[-1][1], page_right))
         return columns
     
-    def _looks_like_table(self, word_details: List[WordDetail]) -> bool:
-        """Check if the layout looks like a table structure"""
-        # Simple heuristic: check for regular grid pattern
-        # This is a basic implementation that can be enhanced
-        
-        y_positions = sorted(set(word.bbox.y for word in word_details))
-        x_positions = sorted(set(word.bbox.x for word in word_details))
-        
-        # If we have multiple regular rows and columns, it might be a table
-        return len(y_positions) >= 3 and len(x_positions) >= 3
-    
-    def _group_by_text_lines(self, text_lines: List[TextLine]) -> List[TextBlock]:
+    def _group_by_text_lines(self, lines: LineColumns) -> List[TextBlock]:
         """Group text lines into text blocks"""
-        blocks = []
-        
-        for line in text_lines:
-            # Convert TextLine to TextBlock
-            word_detail = WordDetail(
-                text=line.text,
-                confidence=line.confidence,
-                bbox=line.bbox,
-                polygon=line.polygon
-            )
-            
-            block = TextBlock(
-                text=line.text,
-                bbox=line.bbox,
-                confidence=line.confidence,
-                word_details=[word_detail],
-                text_lines=[line]
-            )
-            blocks.append(block)
-        
-        return blocks
+        boxes = lines.boxes.tolist()
+        confidences = lines.confidence.tolist()
+        return [
+            TextBlock(text=lines.text[i], bbox=Box(*boxes[i]), confidence=confidences[i],
+                      word_ids=[], line_ids=[i])
+            for i in range(len(lines))
+        ]
     
-    def _group_words_into_blocks(self, word_details: List[WordDetail]) -> List[TextBlock]:
-        """Group individual words into logical text blocks"""
-        if not word_details:
+    def _group_words_into_blocks(self, words: WordColumns) -> List[TextBlock]:
+        """
+        Group individual words into line blocks.
+        Words are sorted by (y, x); a new block starts wherever the vertical
+        distance to the previous word exceeds the line height threshold.
+        """
+        if not len(words):
             return []
         
-        # Sort words by Y position first, then X position
-        sorted_words = sorted(word_details, key=lambda w: (w.bbox.y, w.bbox.x))
-        
+        boxes = words.boxes
+        order = np.lexsort((boxes[:, 0], boxes[:, 1]))
+        ys = boxes[order, 1].astype(np.float64)
+        heights = boxes[order, 3].astype(np.float64)
+
+        y_distance = np.abs(np.diff(ys))
+        avg_height = (heights[1:] + heights[:-1]) / 2
+        starts = np.concatenate(([0], np.flatnonzero(y_distance > avg_height * self.line_height_threshold) + 1))
+        return self._blocks_from_sorted_words(words, order, starts)
+    
+    def _blocks_from_sorted_words(self, words: WordColumns, order: np.ndarray, starts: np.ndarray) -> List[TextBlock]:
+        """Build one TextBlock per run of `order` beginning at each index in `starts`."""
+        boxes = words.boxes[order].astype(np.int64)
+        x_min = np.minimum.reduceat(boxes[:, 0], starts)
+        y_min = np.minimum.reduceat(boxes[:, 1], starts)
+        x_max = np.maximum.reduceat(boxes[:, 0] + boxes[:, 2], starts)
+        y_max = np.maximum.reduceat(boxes[:, 1] + boxes[:, 3], starts)
+        counts = np.diff(np.append(starts, len(order)))
+        confidence = np.add.reduceat(words.confidence[order], starts) / counts
+
+        ids = order.tolist()
+        bounds = np.append(starts, len(order)).tolist()
         blocks = []
-        current_block_words = [sorted_words[0]]
-        
-        for i in range(1, len(sorted_words)):
-            current_word = sorted_words[i]
-            prev_word = sorted_words[i-1]
-            
-            # Check if this word should be in the same block as the previous
-            y_distance = abs(current_word.bbox.y - prev_word.bbox.y)
-            avg_height = (current_word.bbox.height + prev_word.bbox.height) / 2
-            
-            # If words are on different lines (Y distance > line height threshold)
-            if y_distance > avg_height * self.line_height_threshold:
-                # Finish current block
-                if current_block_words:
-                    block = self._create_block_from_words(current_block_words)
-                    blocks.append(block)
-                
-                # Start new block
-                current_block_words = [current_word]
-            else:
-                # Add to current block
-                current_block_words.append(current_word)
-        
-        # Add the last block
-        if current_block_words:
-            block = self._create_block_from_words(current_block_words)
-            blocks.append(block)
-        
+        for k in range(len(starts)):
+            block_ids = ids[bounds[k]:bounds[k + 1]]
+            blocks.append(TextBlock(
+                text=" ".join(words.text[i] for i in block_ids),
+                bbox=Box(int(x_min[k]), int(y_min[k]), int(x_max[k] - x_min[k]), int(y_max[k] - y_min[k])),
+                confidence=float(confidence[k]),
+                word_ids=block_ids,
+                line_ids=[]
+            ))
         return blocks
     
-    def _create_block_from_words(self, words: List[WordDetail]) -> TextBlock:
-        """Create a TextBlock from a list of words"""
-        
-        # Combine text
-        text = " ".join(word.text for word in words)
-        
-        # Calculate combined bounding box
-        min_x = min(word.bbox.x for word in words)
-        min_y = min(word.bbox.y for word in words)
-        max_x = max(word.bbox.x + word.bbox.width for word in words)
-        max_y = max(word.bbox.y + word.bbox.height for word in words)
-        
-        combined_bbox = BoundingBox(
-            x=min_x,
-            y=min_y,
-            width=max_x - min_x,
-            height=max_y - min_y
-        )
-        
-        # Calculate average confidence
-        avg_confidence = sum(word.confidence for word in words) / len(words)
-        
-        return TextBlock(
-            text=text,
-            bbox=combined_bbox,
-            confidence=avg_confidence,
-            word_details=words,
-            text_lines=[]
-        )
+    @staticmethod
+    def _block_boxes(blocks: List[TextBlock]) -> np.ndarray:
+        """(n, 4) int64 array of block boxes."""
+        return np.array([block.bbox for block in blocks], dtype=np.int64).reshape(-1, 4)
     
-    def _sort_by_reading_order(self, blocks: List[TextBlock], layout_type: LayoutType) -> List[TextBlock]:
+    def _sort_by_reading_order(self, blocks: List[TextBlock], layout_type: LayoutType, words: WordColumns) -> List[TextBlock]:
         """Sort text blocks according to reading order"""
         if not blocks:
             return blocks
         
         if layout_type == LayoutType.MULTI_COLUMN:
-            return self._sort_multi_column_blocks(blocks)
+            return self._sort_multi_column_blocks(blocks, words)
         elif layout_type == LayoutType.TABLE:
             return self._sort_table_blocks(blocks)
         else:
             return self._sort_single_column_blocks(blocks)
     
     def _sort_single_column_blocks(self, blocks: List[TextBlock]) -> List[TextBlock]:
-        """Sort blocks for single column layout"""
+        """Sort blocks for single column layout (stable lexsort on box columns)"""
+        boxes = self._block_boxes(blocks)
+        x, y = boxes[:, 0], boxes[:, 1]
         if self.reading_order == ReadingOrder.LEFT_TO_RIGHT_TOP_TO_BOTTOM:
-            return sorted(blocks, key=lambda b: (b.bbox.y, b.bbox.x))
+            order = np.lexsort((x, y))
         elif self.reading_order == ReadingOrder.RIGHT_TO_LEFT_TOP_TO_BOTTOM:
-            return sorted(blocks, key=lambda b: (b.bbox.y, -b.bbox.x))
+            order = np.lexsort((-x, y))
         elif self.reading_order == ReadingOrder.TOP_TO_BOTTOM_LEFT_TO_RIGHT:
-            return sorted(blocks, key=lambda b: (b.bbox.x, b.bbox.y))
+            order = np.lexsort((y, x))
         else:  # TOP_TO_BOTTOM_RIGHT_TO_LEFT
-            return sorted(blocks, key=lambda b: (-b.bbox.x, b.bbox.y))
+            order = np.lexsort((y, -x))
+        return [blocks[i] for i in order]
     
-    def _sort_multi_column_blocks(self, blocks: List[TextBlock]) -> List[TextBlock]:
+    def _sort_multi_column_blocks(self, blocks: List[TextBlock], words: WordColumns) -> List[TextBlock]:
         """Sort blocks for multi-column layout"""
-        # Assign column indices to blocks
-        columns = self._detect_columns([block.word_details[0] for block in blocks if block.word_details], 
-                                     0, 0, 1000)  # Simplified for now
+        # Assign column indices to blocks, using each block's first word (or its line box)
+        first_boxes = np.array(
+            [words.boxes[block.word_ids[0]] if block.word_ids else block.bbox for block in blocks],
+            dtype=np.int64
+        ).reshape(-1, 4)
+        columns = self._detect_columns(first_boxes, 0, 0, 1000)  # Simplified for now
         
-        for block in blocks:
-            block.column_index = self._get_column_index(block, columns)
+        column_index = self._get_column_indices(self._block_boxes(blocks), columns)
+        for block, index in zip(blocks, column_index.tolist()):
+            block.column_index = index
         
         # Sort by column, then by Y position within each column
-        return sorted(blocks, key=lambda b: (b.column_index, b.bbox.y))
+        order = np.lexsort((self._block_boxes(blocks)[:, 1], column_index))
+        return [blocks[i] for i in order]
     
     def _sort_table_blocks(self, blocks: List[TextBlock]) -> List[TextBlock]:
         """Sort blocks for table layout"""
         # For tables, sort by row (Y position) first, then by column (X position)
-        return sorted(blocks, key=lambda b: (b.bbox.y, b.bbox.x))
+        boxes = self._block_boxes(blocks)
+        return [blocks[i] for i in np.lexsort((boxes[:, 0], boxes[:, 1]))]
     
-    def _get_column_index(self, block: TextBlock, columns: List[Tuple[int, int]]) -> int:
-        """Determine which column a block belongs to"""
-        block_center_x = block.bbox.x + block.bbox.width / 2
-        
-        for i, (col_start, col_end) in enumerate(columns):
-            if col_start <= block_center_x <= col_end:
-                return i
-        
-        return 0  # Default to first column
+    def _get_column_indices(self, boxes: np.ndarray, columns: List[Tuple[int, int]]) -> np.ndarray:
+        """Index of the first column containing each box's center x (0 when none does)"""
+        centers = boxes[:, 0] + boxes[:, 2] / 2
+        bounds = np.array(columns, dtype=np.float64).reshape(-1, 2)
+        inside = (bounds[None, :, 0] <= centers[:, None]) & (centers[:, None] <= bounds[None, :, 1])
+        return np.where(inside.any(axis=1), inside.argmax(axis=1), 0)
+    
+    def _paragraph_breaks(self, blocks: List[TextBlock]) -> List[bool]:
+        """Whether a paragraph break separates each pair of consecutive blocks (large vertical gap)"""
+        boxes = self._block_boxes(blocks)
+        vertical_gap = boxes[1:, 1] - (boxes[:-1, 1] + boxes[:-1, 3])
+        avg_height = (boxes[:-1, 3] + boxes[1:, 3]) / 2
+        return (vertical_gap > avg_height * self.paragraph_spacing_threshold).tolist()
     
     def _process_single_column_layout(self, blocks: List[TextBlock]) -> str:
         """Process single column layout"""
-        text_parts = []
+        if not blocks:
+            return ""
         
-        for i, block in enumerate(blocks):
-            text_parts.append(block.text)
-            
-            # Add line breaks between blocks based on spacing
-            if i < len(blocks) - 1:
-                next_block = blocks[i + 1]
-                vertical_gap = next_block.bbox.y - (block.bbox.y + block.bbox.height)
-                avg_height = (block.bbox.height + next_block.bbox.height) / 2
-                
-                # Add paragraph break for large gaps
-                if vertical_gap > avg_height * self.paragraph_spacing_threshold:
-                    text_parts.append("\n\n")
-                else:
-                    text_parts.append("\n")
+        # Line breaks between consecutive blocks, paragraph breaks for large gaps
+        paragraph = self._paragraph_breaks(blocks)
         
+        line_break = "\n" if self.preserve_line_breaks else " "
+        text_parts = [blocks[0].text]
+        for block, is_break in zip(blocks[1:], paragraph):
+            text_parts.append("\n\n" if is_break else line_break)
+            text_parts.append(block.text)
         return "".join(text_parts)
     
-    def _process_multi_column_layout(self, blocks: List[TextBlock]) -> str:
-        """Process multi-column layout"""
-        # Group blocks by column
+    def _column_groups(self, blocks: List[TextBlock]) -> List[Tuple[int, List[TextBlock]]]:
+        """(column index, blocks top to bottom) for each column, left to right"""
         columns_dict = {}
         for block in blocks:
-            col_idx = block.column_index
-            if col_idx not in columns_dict:
-                columns_dict[col_idx] = []
-            columns_dict[col_idx].append(block)
-        
-        # Process each column separately, then combine
-        column_texts = []
+            columns_dict.setdefault(block.column_index, []).append(block)
+        groups = []
         for col_idx in sorted(columns_dict.keys()):
-            col_blocks = sorted(columns_dict[col_idx], key=lambda b: b.bbox.y)
-            col_text = self._process_single_column_layout(col_blocks)
-            column_texts.append(col_text)
+            col_blocks = columns_dict[col_idx]
+            order = np.argsort(self._block_boxes(col_blocks)[:, 1], kind="stable")
+            groups.append((col_idx, [col_blocks[i] for i in order]))
+        return groups
+    
+    def _process_multi_column_layout(self, blocks: List[TextBlock]) -> str:
+        """Process multi-column layout"""
+        # Process each column separately, then combine
+        column_texts = [self._process_single_column_layout(col_blocks)
+                        for _, col_blocks in self._column_groups(blocks)]
         
         # Combine columns with appropriate separators
         return "\n\n--- Column Break ---\n\n".join(column_texts)
     
-    def _process_table_layout(self, blocks: List[TextBlock]) -> str:
-        """Process table layout"""
-        # Group blocks by rows (similar Y positions)
-        rows = []
-        current_row = []
-        
-        sorted_blocks = sorted(blocks, key=lambda b: (b.bbox.y, b.bbox.x))
-        
-        for i, block in enumerate(sorted_blocks):
-            if not current_row:
-                current_row = [block]
+    def _process_table_layout(self, table: TableGrid) -> str:
+        """Process table layout: one line per grid row, cells in column order"""
+        rows: Dict[int, List[str]] = {}
+        for cell in table.cells:
+            rows.setdefault(cell.row, []).append(cell.text)
+        return "\n".join(" | ".join(rows[row]) for row in sorted(rows))
+    
+    def _build_page_layout(self, blocks: List[TextBlock], layout_type: LayoutType, words: WordColumns,
+                           fragment_starts: Optional[np.ndarray]) -> StructuredPage:
+        """
+        Page hierarchy over the sorted blocks, split into paragraphs exactly where
+        the text has paragraph breaks. `words` are the words before fragment
+        merging, so word ids match the page's word columns; a merged word expands
+        back to all of its fragments.
+        """
+        if not blocks:
+            return StructuredPage(layout_type.value, [])
+        
+        # Words of each engine line, in engine order
+        by_line = np.argsort(words.line_ids, kind="stable")
+        line_bounds = np.searchsorted(words.line_ids[by_line], np.arange(int(words.line_ids.max(initial=-1)) + 2))
+        if fragment_starts is not None:
+            fragment_bounds = np.append(fragment_starts, len(words)).tolist()
+        
+        def line_of(block: TextBlock) -> StructuredLine:
+            if block.line_ids:
+                line_id = block.line_ids[0]
+                word_ids = by_line[line_bounds[line_id]:line_bounds[line_id + 1]].tolist()
+                return StructuredLine(block.text, block.bbox, block.confidence, word_ids, line_id)
+            if fragment_starts is None:
+                word_ids = list(block.word_ids)
             else:
-                # Check if this block is on the same row as the previous
-                prev_block = current_row[-1]
-                y_distance = abs(block.bbox.y - prev_block.bbox.y)
-                avg_height = (block.bbox.height + prev_block.bbox.height) / 2
-                
-                if y_distance < avg_height * 0.5:  # Same row
-                    current_row.append(block)
-                else:  # New row
-                    rows.append(current_row)
-                    current_row = [block]
-        
-        if current_row:
-            rows.append(current_row)
-        
-        # Format as table
-        table_text = []
-        for row in rows:
-            row_text = " | ".join(block.text for block in row)
-            table_text.append(row_text)
-        
-        return "\n".join(table_text)
+                word_ids = [i for k in block.word_ids for i in range(fragment_bounds[k], fragment_bounds[k + 1])]
+            return StructuredLine(block.text, block.bbox, block.confidence, word_ids)
+        
+        paragraph_ids = iter(range(len(blocks)))
+        
+        def paragraphs_of(column_blocks: List[TextBlock], split: bool) -> List[StructuredParagraph]:
+            runs = [[column_blocks[0]]]
+            breaks = self._paragraph_breaks(column_blocks) if split else [False] * (len(column_blocks) - 1)
+            for block, is_break in zip(column_blocks[1:], breaks):
+                if is_break:
+                    runs.append([])
+                runs[-1].append(block)
+            return [StructuredParagraph(next(paragraph_ids), [line_of(b) for b in run], union_box([b.bbox for b in run]))
+                    for run in runs]
+        
+        if layout_type == LayoutType.TABLE:
+            # The table covers the page; its rows are in grid order, not paragraphs
+            paragraphs = paragraphs_of(blocks, split=False)
+            return StructuredPage(layout_type.value, [
+                StructuredBlock(0, "table", 0, paragraphs, union_box([b.bbox for b in blocks]), table_index=0)
+            ])
+        groups = self._column_groups(blocks) if layout_type == LayoutType.MULTI_COLUMN else [(0, blocks)]
+        return StructuredPage(layout_type.value, [
+            StructuredBlock(block_id, "text", col_idx, paragraphs_of(col_blocks, split=True),
+                            union_box([b.bbox for b in col_blocks]))
+            for block_id, (col_idx, col_blocks) in enumerate(groups)
+        ])
     
     def _clean_and_format_text(self, text: str) -> str:
-        """Clean and format the final text"""
-        # Remove excessive whitespace
-        lines = text.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            # Clean each line
-            cleaned_line = ' '.join(line.split())  # Remove extra spaces
-            cleaned_lines.append(cleaned_line)
-        
-        # Join lines and clean up multiple consecutive newlines
-        result = '\n'.join(cleaned_lines)
-        
-        # Replace multiple consecutive newlines with double newlines (paragraph breaks)
-        import re
-        result = re.sub(r'\n{3,}', '\n\n', result)
-        
-        return result.strip()
+        """
+        Clean and format the final text in one regex pass: collapse spaces within
+        lines, drop spaces around line breaks and cap blank lines at one.
+        """
+        return _WHITESPACE_RUN.sub(_normalize_whitespace_run, text).strip()
+
+_ORDER_MAP = {
+    "ltr_ttb": ReadingOrder.LEFT_TO_RIGHT_TOP_TO_BOTTOM,
+    "rtl_ttb": ReadingOrder.RIGHT_TO_LEFT_TOP_TO_BOTTOM,
+    "ttb_ltr": ReadingOrder.TOP_TO_BOTTOM_LEFT_TO_RIGHT,
+    "ttb_rtl": ReadingOrder.TOP_TO_BOTTOM_RIGHT_TO_LEFT,
+}
+
+# Postprocessors hold only their options, so one shared instance per option set
+# serves every thread; keys use the resolved reading order to keep the set finite
+_postprocessor_registry: Dict[Tuple[ReadingOrder, bool, bool, bool], AdvancedTextPostprocessor] = {}
+_registry_lock = threading.Lock()
 
 # Factory function for easy usage
-def create_text_postprocessor(reading_order: str = "ltr_ttb") -> AdvancedTextPostprocessor:
-    """Create a text postprocessor with specified reading order"""
-    order_map = {
-        "ltr_ttb": ReadingOrder.LEFT_TO_RIGHT_TOP_TO_BOTTOM,
-        "rtl_ttb": ReadingOrder.RIGHT_TO_LEFT_TOP_TO_BOTTOM,
-        "ttb_ltr": ReadingOrder.TOP_TO_BOTTOM_LEFT_TO_RIGHT,
-        "ttb_rtl": ReadingOrder.TOP_TO_BOTTOM_RIGHT_TO_LEFT,
-    }
-    
-    order = order_map.get(reading_order, ReadingOrder.LEFT_TO_RIGHT_TOP_TO_BOTTOM)
-    return AdvancedTextPostprocessor(reading_order=order)
+def create_text_postprocessor(reading_order: str = "ltr_ttb", enable_layout_analysis: bool = True,
+                              preserve_line_breaks: bool = True,
+                              merge_fragmented_words: bool = True) -> AdvancedTextPostprocessor:
+    """Create a new text postprocessor with specified reading order and stages"""
+    order = _ORDER_MAP.get(reading_order, ReadingOrder.LEFT_TO_RIGHT_TOP_TO_BOTTOM)
+    return AdvancedTextPostprocessor(
+        reading_order=order,
+        enable_layout_analysis=enable_layout_analysis,
+        preserve_line_breaks=preserve_line_breaks,
+        merge_fragmented_words=merge_fragmented_words
+    )
+
+def get_text_postprocessor(reading_order: str = "ltr_ttb", enable_layout_analysis: bool = True,
+                           preserve_line_breaks: bool = True,
+                           merge_fragmented_words: bool = True) -> AdvancedTextPostprocessor:
+    """Shared, thread-safe text postprocessor for the given options (created on first use)"""
+    key = (_ORDER_MAP.get(reading_order, ReadingOrder.LEFT_TO_RIGHT_TOP_TO_BOTTOM),
+           enable_layout_analysis, preserve_line_breaks, merge_fragmented_words)
+    processor = _postprocessor_registry.get(key)
+    if processor is None:
+        with _registry_lock:
+            processor = _postprocessor_registry.get(key)
+            if processor is None:
+                processor = create_text_postprocessor(reading_order, enable_layout_analysis,
+                                                      preserve_line_breaks, merge_fragmented_words)
+                _postprocessor_registry[key] = processor
+    return processor
 
-def improve_text_structure(word_details: List[WordDetail], text_lines: List[TextLine], 
-                          reading_order: str = "ltr_ttb") -> str:
+def improve_text_structure(words: WordColumns, lines: LineColumns, 
+                          reading_order: str = "ltr_ttb", enable_layout_analysis: bool = True,
+                          preserve_line_breaks: bool = True, merge_fragmented_words: bool = True) -> str:
     """
     Convenience function to improve text structure from OCR results.
     
     Args:
-        word_details: List of word details from OCR
-        text_lines: Optional list of text lines from OCR
+        words: Word columns from OCR
+        lines: Line columns from OCR (may be empty)
         reading_order: Reading order pattern ("ltr_ttb", "rtl_ttb", "ttb_ltr", "ttb_rtl")
+        enable_layout_analysis: Detect columns/tables and paragraphs (off: single-column fast path)
+        preserve_line_breaks: Keep line breaks within paragraphs (off: reflow lines with spaces)
+        merge_fragmented_words: Join words the engine split into fragments
         
     Returns:
         Improved structured text
     """
-    processor = create_text_postprocessor(reading_order)
-    return processor.process_ocr_result(word_details, text_lines)
+    processor = get_text_postprocessor(reading_order, enable_layout_analysis,
+                                       preserve_line_breaks, merge_fragmented_words)
+    return processor.process_ocr_result(words, lines)